@@ -0,0 +1,83 @@
+"""Benchmark the id index against the former recursive `find_ids`.
+
+Synthetic bundles hold a `content` list of identified files, each with an
+identified author. Run with:
+
+    python benchmarks/bench_find_ids.py --sizes 1000 10000 100000
+"""
+import argparse
+import time
+from copy import copy
+
+from myr.resolver import DuplicatedIDError, find_ids, purge_id_keys
+
+
+def legacy_find_ids(structure: dict, ids: dict = {}):
+    """The recursive `find_ids`, as it was before the id index"""
+    ids = copy(ids)
+    for key, value in structure.items():
+        if isinstance(value, dict):
+            ids.update(legacy_find_ids(value, ids))
+            continue
+        if isinstance(value, list):
+            for item in value:
+                ids.update(legacy_find_ids(item, ids))
+            continue
+        if key != "id":
+            continue
+        if structure["id"] in ids:
+            raise DuplicatedIDError(f"Id {structure['id']} was found twice.")
+
+        ids[structure["id"]] = purge_id_keys(structure)
+
+    return ids
+
+
+def make_bundle(ids: int) -> dict:
+    return {
+        "type": "myr-bundle",
+        "content": [
+            {
+                "type": "file",
+                "id": f"file_{i}",
+                "path": f"data/file_{i}.csv",
+                "MIME_type": "text/csv",
+                "author": {"type": "person", "id": f"person_{i}", "name": "Someone"},
+            }
+            for i in range(ids // 2)
+        ],
+    }
+
+
+def timed(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start, result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument(
+        "--legacy-max",
+        type=int,
+        default=10000,
+        help="largest size to run the (quadratic) legacy function on",
+    )
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bundle = make_bundle(size)
+        elapsed, index = timed(find_ids, bundle)
+        # Looking up every id forces all the lazy purged copies
+        lookup, _ = timed(lambda: [index[x] for x in index])
+        line = f"ids={size:<8} index {elapsed:8.3f} s  index+lookups {elapsed + lookup:8.3f} s"
+        if size <= args.legacy_max:
+            legacy, expected = timed(legacy_find_ids, bundle)
+            assert expected == index, "The index differs from the legacy result"
+            line += f"  legacy {legacy:8.3f} s"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Benchmark the JSON backends on loading and dumping bundle metadata.
+
+Synthetic bundles hold a `content` list of files, each with an author.
+Backends that are not installed are skipped. Run with:
+
+    python benchmarks/bench_json.py --sizes 1000 10000 100000
+"""
+import argparse
+import time
+
+from myr import jsonio
+
+
+def make_bundle(entries: int) -> dict:
+    return {
+        "type": "myr-bundle",
+        "content": [
+            {
+                "type": "file",
+                "id": f"file_{i}",
+                "path": f"data/file_{i}.csv",
+                "MIME_type": "text/csv",
+                "size": i * 1024,
+                "author": {"type": "person", "name": "Someone", "ORCID": None},
+            }
+            for i in range(entries)
+        ],
+    }
+
+
+def timed(function, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        bundle = make_bundle(size)
+        for name in jsonio.BACKEND_PREFERENCE:
+            try:
+                jsonio.set_backend(name)
+            except ImportError:
+                continue
+            compact = jsonio.dumps(bundle)
+            pretty = jsonio.dumps(bundle, pretty=True)
+            assert jsonio.loads(compact) == bundle
+            load = timed(jsonio.loads, compact)
+            dump = timed(jsonio.dumps, bundle)
+            print(
+                f"entries={size:<8} {name:<9} load {load:8.3f} s  dump {dump:8.3f} s  "
+                f"size {len(compact) / 2**20:7.1f} MiB (pretty {len(pretty) / 2**20:.1f})"
+            )
+
+
+if __name__ == "__main__":
+    main()
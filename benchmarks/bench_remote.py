@@ -0,0 +1,80 @@
+"""Benchmark concurrent resolution of remote (@) keys.
+
+A local HTTP server stands in for the remote hosts, adding an artificial
+latency to every response. Run with:
+
+    python benchmarks/bench_remote.py --references 32 --latency 0.05
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from myr.resolver import RemoteFetcher, resolve_remote
+
+
+def make_server(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latency)
+            name = self.path.strip("/")
+            body = json.dumps({"name": name, "description": f"Document {name}"})
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body.encode())
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+
+
+def make_structure(base_url: str, references: int) -> dict:
+    return {
+        "type": "myr-bundle",
+        "people": {
+            # Every person is referenced twice, as it happens with co-authors
+            f"person_{i}": {"@details": f"{base_url}/person_{i // 2}"}
+            for i in range(references)
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--references", type=int, default=32)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8, 16])
+    args = parser.parse_args()
+
+    server = make_server(args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    structure = make_structure(base_url, args.references)
+
+    reference = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        with RemoteFetcher(max_workers=workers) as fetcher:
+            result = resolve_remote(structure, fetcher=fetcher)
+        elapsed = time.perf_counter() - start
+        if reference is None:
+            reference = result
+        assert result == reference, "Concurrent result differs from serial one"
+        print(
+            f"workers={workers:<4} {elapsed:8.3f} s "
+            f"({fetcher.requests_made} requests, "
+            f"{fetcher.connections_opened} connections, "
+            f"{fetcher.requests_saved} saved)"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Benchmark the startup time of the `myr` command line.
+
+Each command is run in a fresh interpreter, first to time it, then under
+`python -X importtime` to list the modules that were slowest to import. Run with:
+
+    python benchmarks/bench_startup.py --runs 20
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+COMMANDS: dict[str, list[str]] = {
+    "myr --help": ["--help"],
+    "myr create": ["create", "{tmp}/bundle", "--force"],
+}
+
+
+def run(arguments: list[str], importtime: bool = False) -> subprocess.CompletedProcess:
+    flags = ["-X", "importtime"] if importtime else []
+    return subprocess.run(
+        [sys.executable, *flags, "-m", "myr", *arguments],
+        capture_output=True,
+        check=True,
+    )
+
+
+def slowest_imports(stderr: bytes, count: int) -> list[tuple[int, str]]:
+    """Parse `-X importtime` output to the modules with the most cumulative time"""
+    imports = []
+    for line in stderr.decode().splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Only the top-level imports, as nested ones are counted in their parent
+        if not name.startswith("  "):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:count]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, command in COMMANDS.items():
+            arguments = [x.format(tmp=tmp) for x in command]
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                run(arguments)
+                times.append(time.perf_counter() - start)
+            print(
+                f"{label:<12} median {statistics.median(times) * 1000:7.1f} ms  "
+                f"min {min(times) * 1000:7.1f} ms"
+            )
+            for cumulative, name in slowest_imports(
+                run(arguments, importtime=True).stderr, args.top
+            ):
+                print(f"    {cumulative / 1000:7.1f} ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""Benchmark batch validation against validating objects one at a time.
+
+Synthetic content arrays mix files and persons, some of them invalid. Run with:
+
+    python benchmarks/bench_validate.py --sizes 1000 10000 100000
+"""
+import argparse
+import time
+
+from myr.checker import Specification
+from tests.data import COMPLEX_MYR_DATA
+
+
+def make_content(size: int) -> list[dict]:
+    content = []
+    for i in range(size):
+        if i % 2:
+            entry = {"type": "person", "name": f"Person {i}", "email": "a@b.c"}
+        else:
+            entry = {
+                "type": "file",
+                "path": f"data/file_{i}.csv",
+                "MIME_type": "text/csv",
+                "author": {"type": "person", "name": "Someone"},
+            }
+        if i % 10 == 0:
+            entry["nonsense"] = i
+        content.append(entry)
+    return content
+
+
+def timed(function, *args) -> tuple[float, object]:
+    start = time.perf_counter()
+    result = function(*args)
+    return (time.perf_counter() - start, result)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        content = make_content(size)
+        single_spec = Specification(COMPLEX_MYR_DATA["specification"])
+        batch_spec = Specification(COMPLEX_MYR_DATA["specification"])
+
+        single, expected = timed(lambda: [single_spec.validate(x) for x in content])
+        batch, found = timed(batch_spec.validate_batch, content)
+        assert [[y.violation.to_dict() for y in x] for x in found] == [
+            [y.violation.to_dict() for y in x] for x in expected
+        ], "Batch validation differs from single validation"
+        print(
+            f"objects={size:<8} single {single:8.3f} s  batch {batch:8.3f} s  "
+            f"({single / batch:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
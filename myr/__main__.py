@@ -1,8 +1,3 @@
-from myr.myr import main
-from myr.checker import MultipleViolationsError
+from myr.myr import myr_entrypoint
 
-try:
-    main()
-except MultipleViolationsError as e:
-    print(e.message)
-    exit(1)
+myr_entrypoint()
@@ -0,0 +1,216 @@
+import io
+import logging
+import mmap
+import tarfile
+from collections.abc import Mapping
+from pathlib import Path, PurePosixPath
+from typing import Optional, Union
+
+from myr import jsonio
+from myr.cache import RemoteCache
+from myr.lazy import LazyContext, LazyObject
+from myr.manifest import METADATA_NAME
+from myr.resolver import IdIndex, RemoteFetcher
+from myr.sidecar import read_sidecar
+
+log = logging.getLogger(__name__)
+
+Entry = Union[Mapping, str]
+"""A content entry, or the id of one"""
+
+
+class MemoryStream(io.RawIOBase):
+    """A read-only, seekable stream over a buffer, without copying it.
+
+    Data is only copied once, straight from the buffer to the one given to
+    `readinto`, so wrapping a memory-mapped file does not buffer it twice.
+    """
+
+    def __init__(self, buffer: memoryview) -> None:
+        self._buffer = buffer
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position}
+        start = base.get(whence, len(self._buffer))
+        self._position = max(0, start + offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        data = self._buffer[self._position : self._position + len(buffer)]
+        size = len(data)
+        memoryview(buffer).cast("B")[:size] = data
+        self._position += size
+        return size
+
+    def close(self) -> None:
+        self._buffer = memoryview(b"")
+        super().close()
+
+
+def _map(path: Path) -> Optional[mmap.mmap]:
+    # Empty files cannot be mapped
+    with path.open("rb") as stream:
+        if path.stat().st_size == 0:
+            return None
+        return mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Bundle:
+    """A myr bundle, either a folder or an uncompressed frozen bundle (`.tar`).
+
+    The metadata is only read when it is first accessed, and the remote and
+    relative keys of a folder bundle are only resolved when they are read,
+    so querying one content entry does not resolve the whole metadata.
+
+    The files described by the content of the bundle are memory-mapped when
+    they are accessed, so they can be read without copying them in memory.
+    Buffers taken from the bundle must be released before the bundle is closed.
+
+    Raises:
+        FileNotFoundError if there is no bundle at `path`.
+        ValueError if `path` is a compressed frozen bundle, which cannot be
+        memory-mapped.
+    """
+
+    def __init__(self, path: Path, offline: bool = False) -> None:
+        self.path: Path = path
+        self.offline: bool = offline
+        self._maps: dict[str, Optional[mmap.mmap]] = {}
+        self._members: Optional[dict[str, tuple[int, int]]] = None
+        self._metadata: Optional[Mapping] = None
+        self._context: Optional[LazyContext] = None
+        self._fetcher: Optional[RemoteFetcher] = None
+
+        if path.is_file():
+            with path.open("rb") as stream:
+                magic = stream.read(4)
+            if magic[:2] == b"\x1f\x8b" or magic == b"\x28\xb5\x2f\xfd":
+                raise ValueError(
+                    f"{path} is compressed: freeze it with `--compression none` "
+                    "to access it in place, or use `myr extract`"
+                )
+            with tarfile.open(path, "r:") as tar:
+                self._members = {
+                    x.name: (x.offset_data, x.size) for x in tar if x.isfile()
+                }
+        elif not (path / METADATA_NAME).exists():
+            raise FileNotFoundError(f"There is no bundle at {path}")
+
+    @property
+    def frozen(self) -> bool:
+        return self._members is not None
+
+    def _load(self) -> None:
+        if self.frozen:
+            # Frozen metadata is already resolved, so it is only indexed
+            self._metadata = jsonio.loads(self.buffer_file(METADATA_NAME).tobytes())
+            self._context = LazyContext(self._metadata, fetcher=None)
+            return
+        # An up to date sidecar also gives the ids, without walking the metadata
+        indexed = read_sidecar(self.path)
+        if indexed is not None:
+            data, ids = indexed.metadata, indexed.ids
+        else:
+            with (self.path / METADATA_NAME).open("rb") as stream:
+                data, ids = jsonio.load(stream), None
+        self._fetcher = RemoteFetcher(cache=RemoteCache(offline=self.offline))
+        self._context = LazyContext(data, self._fetcher, ids)
+        self._metadata = LazyObject(data, self._context)
+
+    @property
+    def metadata(self) -> Mapping:
+        """The resolved metadata of the bundle.
+
+        Frozen bundles are already resolved. For folder bundles, this is a
+        `LazyObject`: use `myr.lazy.materialize` to resolve it all at once.
+        """
+        if self._metadata is None:
+            self._load()
+        return self._metadata
+
+    @property
+    def ids(self) -> IdIndex:
+        """The index of the objects with an id in the metadata"""
+        if self._context is None:
+            self._load()
+        return self._context.ids
+
+    def entry_path(self, entry: Entry) -> str:
+        """Get the path of the file described by a content entry.
+
+        Raises:
+            KeyError if `entry` is the id of no object.
+            ValueError if the entry has no path, or it is outside the bundle.
+        """
+        if isinstance(entry, str):
+            entry = self.ids[entry]
+        path = entry.get("path")
+        if not isinstance(path, str):
+            raise ValueError(f"The entry {entry} describes no file")
+        normalized = PurePosixPath(path)
+        if normalized.is_absolute() or ".." in normalized.parts:
+            raise ValueError(f"The path {path} is outside of the bundle")
+        return str(normalized)
+
+    def _mapping(self, key: str) -> Optional[mmap.mmap]:
+        if key not in self._maps:
+            self._maps[key] = _map(self.path if self.frozen else self.path / key)
+        return self._maps[key]
+
+    def buffer_file(self, path: str) -> memoryview:
+        """Get a read-only, memory-mapped buffer of a file of the bundle.
+
+        Raises:
+            FileNotFoundError if there is no such file in the bundle.
+        """
+        if not self.frozen:
+            if not (self.path / path).is_file():
+                raise FileNotFoundError(f"There is no {path} in {self.path}")
+            mapping = self._mapping(path)
+            return memoryview(mapping if mapping is not None else b"")
+
+        if path not in self._members:
+            raise FileNotFoundError(f"There is no {path} in {self.path}")
+        offset, size = self._members[path]
+        # All members share the mapping of the whole archive
+        return memoryview(self._mapping(""))[offset : offset + size]
+
+    def buffer(self, entry: Entry) -> memoryview:
+        """Get a read-only, memory-mapped buffer of the file of a content entry"""
+        return self.buffer_file(self.entry_path(entry))
+
+    def open(self, entry: Entry) -> MemoryStream:
+        """Open the file of a content entry as a read-only stream"""
+        return MemoryStream(self.buffer(entry))
+
+    def close(self) -> None:
+        for key, mapping in self._maps.items():
+            if mapping is None:
+                continue
+            try:
+                mapping.close()
+            except BufferError:
+                log.warning(
+                    f"A buffer of {key or self.path} is still in use, "
+                    "it will be unmapped once it is released"
+                )
+        self._maps.clear()
+        if self._fetcher is not None:
+            self._fetcher.close()
+            self._fetcher = None
+
+    def __enter__(self) -> "Bundle":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,313 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Iterator, Optional
+
+from myr import jsonio
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where only threads are locked out
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+ACCESS_TIME_RESOLUTION: float = 60 * 60
+"""How old the saved access time of an entry must be for a read to save it again"""
+
+
+def canonical_digest(data) -> str:
+    """Hash JSON-compatible data, regardless of the order of its keys.
+
+    The data is always encoded by the standard library, as the bytes written
+    by the faster `jsonio` backends differ (e.g. in how floats are written),
+    which would change the digests saved in the caches along with the backend.
+    """
+    encoded = json.dumps(
+        data, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def user_cache_dir() -> Path:
+    """Get the folder where `myr` keeps its caches for the current user."""
+    base = os.environ.get("XDG_CACHE_HOME")
+    base_path = Path(base) if base else Path.home() / ".cache"
+    return base_path / "myr"
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    """Replace a file at once, through a temporary file of this writer only"""
+    descriptor, temp_name = tempfile.mkstemp(
+        prefix=f"{path.name}.", suffix=".tmp", dir=path.parent
+    )
+    try:
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(content)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    digest: str
+    """The sha256 digest of the content, which is also the name of its blob"""
+    size: int
+    fetched: float
+    """When the content was last fetched or revalidated (epoch seconds)"""
+    accessed: float
+    """When the content was last read (epoch seconds), for LRU eviction"""
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    def validators(self) -> dict[str, str]:
+        """Headers to revalidate this entry with a conditional request"""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class RemoteCache:
+    """A persistent, content-addressed on-disk cache of remote documents.
+
+    Contents are stored once per unique content (named by their sha256 digest)
+    under `blobs/`, while `index.json` maps each URL to its content and to the
+    `ETag` / `Last-Modified` validators sent by the server.
+
+    Entries younger than `ttl` seconds are served without touching the network.
+    Older entries are revalidated with a conditional request. When the blobs
+    exceed `max_size` bytes, the least recently used entries are evicted.
+    In `offline` mode, only cached content is served, however old it is.
+
+    Many processes can share the cache: the index is saved under a file lock,
+    merged with the entries other processes saved since it was loaded.
+    Reading an entry only saves its access time once in a while, as set by
+    `ACCESS_TIME_RESOLUTION`.
+    """
+
+    INDEX_NAME = "index.json"
+    LOCK_NAME = "index.lock"
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        ttl: float = 24 * 60 * 60,
+        max_size: int = 256 * 1024 * 1024,
+        offline: bool = False,
+    ) -> None:
+        self.path: Path = path if path is not None else user_cache_dir() / "remote"
+        self.ttl: float = ttl
+        self.max_size: int = max_size
+        self.offline: bool = offline
+        self._lock = threading.Lock()
+        self._index_mtime_ns: Optional[int] = None
+        """The modification time of the index, when it was last loaded or saved"""
+
+        (self.path / "blobs").mkdir(parents=True, exist_ok=True)
+        self._entries: dict[str, CacheEntry] = self._load_index()
+
+    def _load_index(self) -> dict[str, CacheEntry]:
+        index_path = self.path / self.INDEX_NAME
+        try:
+            self._index_mtime_ns = index_path.stat().st_mtime_ns
+            with index_path.open("rb") as stream:
+                raw_entries = jsonio.load(stream)
+            return {url: CacheEntry(**entry) for url, entry in raw_entries.items()}
+        except FileNotFoundError:
+            return {}
+        except (json.JSONDecodeError, TypeError) as e:
+            log.warning(f"Ignoring corrupted cache index at {index_path}: {e}")
+            return {}
+
+    def _merge_index(self) -> None:
+        """Merge the index saved by other processes into the entries.
+
+        The entry fetched last wins, with the latest access time of both.
+        Entries that are no longer saved, and whose content was evicted by
+        another process, are dropped.
+        """
+        saved = self._load_index()
+        for url, entry in list(self._entries.items()):
+            if url not in saved and not self._blob_path(entry.digest).exists():
+                del self._entries[url]
+        for url, other in saved.items():
+            entry = self._entries.get(url)
+            if entry is None:
+                self._entries[url] = other
+            elif other.fetched > entry.fetched:
+                other.accessed = max(other.accessed, entry.accessed)
+                self._entries[url] = other
+            else:
+                entry.accessed = max(other.accessed, entry.accessed)
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[None]:
+        """Lock the index against other threads, and other processes"""
+        with self._lock, (self.path / self.LOCK_NAME).open("ab") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+    def _save_index(self) -> None:
+        """Merge the saved index, evict old entries and save the index.
+
+        Must be called with the index locked.
+        """
+        self._merge_index()
+        self._evict()
+        index_path = self.path / self.INDEX_NAME
+        _write_atomic(
+            index_path,
+            jsonio.dumps({url: asdict(x) for url, x in self._entries.items()}),
+        )
+        self._index_mtime_ns = index_path.stat().st_mtime_ns
+
+    def _index_changed(self) -> bool:
+        try:
+            mtime_ns = (self.path / self.INDEX_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            return False
+        return mtime_ns != self._index_mtime_ns
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path / "blobs" / digest
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        """Get the cache entry of an URL, if it has one with readable content.
+
+        URLs that are not known yet are looked up again in the saved index,
+        if another process changed it since.
+        """
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None and self._index_changed():
+                self._merge_index()
+                entry = self._entries.get(url)
+        if entry is None or not self._blob_path(entry.digest).exists():
+            return None
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        """Test if an entry can be served without revalidating it"""
+        return self.offline or time.time() - entry.fetched < self.ttl
+
+    def read(self, entry: CacheEntry) -> bytes:
+        """Read the content of an entry, marking it as recently used"""
+        content = self._blob_path(entry.digest).read_bytes()
+        now = time.time()
+        with self._lock:
+            stale = now - entry.accessed >= ACCESS_TIME_RESOLUTION
+            entry.accessed = now
+        if stale:
+            with self._locked_index():
+                self._save_index()
+        return content
+
+    def refresh(self, entry: CacheEntry) -> None:
+        """Mark an entry as just revalidated by the server"""
+        with self._locked_index():
+            entry.fetched = time.time()
+            self._entries[entry.url] = entry
+            self._save_index()
+
+    def store(
+        self,
+        url: str,
+        content: bytes,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> CacheEntry:
+        """Store freshly fetched content for an URL"""
+        digest = hashlib.sha256(content).hexdigest()
+        blob_path = self._blob_path(digest)
+        if not blob_path.exists():
+            _write_atomic(blob_path, content)
+
+        now = time.time()
+        entry = CacheEntry(
+            url=url,
+            digest=digest,
+            size=len(content),
+            fetched=now,
+            accessed=now,
+            etag=etag,
+            last_modified=last_modified,
+        )
+        with self._locked_index():
+            self._entries[url] = entry
+            self._save_index()
+        return entry
+
+    def _evict(self) -> None:
+        # Blobs may be shared by many URLs, so they are sized only once, and
+        # removed only when the last URL pointing to them is evicted.
+        blob_sizes = {x.digest: x.size for x in self._entries.values()}
+        total_size = sum(blob_sizes.values())
+        by_age = sorted(self._entries.values(), key=lambda x: x.accessed)
+        for entry in by_age:
+            if total_size <= self.max_size:
+                break
+            log.debug(f"Evicting {entry.url} from the remote cache")
+            del self._entries[entry.url]
+            if any(x.digest == entry.digest for x in self._entries.values()):
+                continue
+            total_size -= entry.size
+            self._blob_path(entry.digest).unlink(missing_ok=True)
+
+
+@dataclass
+class CheckRecord:
+    """The result of the last check of a bundle, and what it depended on"""
+
+    metadata_digest: str
+    """The sha256 digest of the `myr-metadata.json` file"""
+    remotes: dict[str, str]
+    """The digest of every remote document used, by URL"""
+    specification_digest: str
+    """The canonical digest of the resolved specification"""
+    violations: list[dict]
+    """The serialized violations found in the bundle"""
+    entries: dict[str, list[dict]]
+    """The serialized violations of each content entry, by canonical digest.
+    Their locations are relative to the entry."""
+
+
+class CheckCache:
+    """A cache of the last check result of each bundle, in the user cache"""
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path: Path = path if path is not None else user_cache_dir() / "checks"
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def _record_path(self, bundle: Path) -> Path:
+        name = hashlib.sha256(str(bundle.resolve()).encode()).hexdigest()
+        return self.path / f"{name}.json"
+
+    def load(self, bundle: Path) -> Optional[CheckRecord]:
+        """Load the last check record of a bundle, if there is one"""
+        record_path = self._record_path(bundle)
+        if not record_path.exists():
+            return None
+        try:
+            with record_path.open("rb") as stream:
+                return CheckRecord(**jsonio.load(stream))
+        except (json.JSONDecodeError, TypeError) as e:
+            log.warning(f"Ignoring corrupted check record at {record_path}: {e}")
+            return None
+
+    def store(self, bundle: Path, record: CheckRecord) -> None:
+        """Store the check record of a bundle, replacing the last one"""
+        _write_atomic(self._record_path(bundle), jsonio.dumps(asdict(record)))
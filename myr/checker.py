@@ -1,10 +1,17 @@
 from enum import Enum
-from typing import Optional, Union, Literal, Any, NoReturn
-from functools import partial, total_ordering
+from typing import Optional, Union, Literal, Any, NoReturn, Callable, Iterable
+from functools import cached_property, partial, total_ordering
+from types import MappingProxyType
+from collections import OrderedDict
+from collections.abc import Mapping
 from dataclasses import dataclass
 from sys import exit
 from copy import copy
 import logging
+import re
+import threading
+
+from myr.cache import canonical_digest
 
 log = logging.getLogger(__name__)
 
@@ -21,6 +28,7 @@ class ViolationType(Enum):
     # Remote / relative keys error
     ID_COLLISION = "Id is not unique."
     ID_NOT_FOUND = "Id was not found."
+    INVALID_ID = "Id is not a string."
     INVALID_REMOTE = "The key did not point to a valid URL"
     REMOTE_NOT_JSON = "Response from remote key was not in valid JSON"
     # Gross object errors
@@ -41,6 +49,9 @@ class ViolationType(Enum):
     MISSING_KEY_VALUE = "The key has no `value`."
     UNKNOWN_KEY_VALUE = "The key has unknown `value`."
     MALFORMED_KEY_VALID_VALUES = "The entry of valid values for this key is wrong."
+    MALFORMED_KEY_PATTERN = (
+        "The pattern for this key is not a valid regular expression."
+    )
     # Double qualifier errors
     DUPLICATED_QUALIFIER = "The qualifier for this object is duplicated."
     # Invalid specification constants
@@ -50,6 +61,7 @@ class ViolationType(Enum):
     UNKNOWN_TYPE = "The object has a type which is not in the specification."
     UNKOWN_KEY = "Key was not found in the specification."
     WRONG_KEY_TYPE = "Key has unexpected type."
+    INVALID_KEY_VALUE = "Key value is not one of the valid values for the key."
 
 
 @total_ordering
@@ -80,6 +92,10 @@ class ViolationSeverity(Enum):
 
 
 class SpecificationViolation:
+    """A violation of the specification, as a lightweight record"""
+
+    __slots__ = ("location", "violation_type", "severity", "context")
+
     def __init__(
         self,
         location: Optional[str],
@@ -92,6 +108,31 @@ class SpecificationViolation:
         self.severity: ViolationSeverity = severity
         self.context: Optional[dict] = context
 
+    def to_dict(self) -> dict:
+        """Serialize the violation to a JSON-compatible dict"""
+        return {
+            "location": self.location,
+            "violation_type": (
+                self.violation_type.name if self.violation_type is not None else None
+            ),
+            "severity": self.severity.name,
+            "context": self.context,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SpecificationViolation":
+        """Load a violation serialized by `to_dict`"""
+        return cls(
+            location=data["location"],
+            violation_type=(
+                ViolationType[data["violation_type"]]
+                if data["violation_type"] is not None
+                else None
+            ),
+            severity=ViolationSeverity[data["severity"]],
+            context=data["context"],
+        )
+
 
 class InvalidSpecificationError(InvalidBundleError):
     """Raised when loading a specification fails"""
@@ -103,25 +144,168 @@ class InvalidSpecificationError(InvalidBundleError):
 class MultipleViolationsError(InvalidBundleError):
     """Raised when multiple violations are found."""
 
-    def __init__(self, violations: list[InvalidSpecificationError]) -> None:
+    def __init__(
+        self,
+        violations: list[InvalidSpecificationError],
+        sink: Optional["ViolationSink"] = None,
+    ) -> None:
         self.violations: list[InvalidSpecificationError] = violations
         """The input list of violations"""
-        output_str = f" --- FOUND {len(violations)} VIOLATIONS ---\n\n"
-        for i, violation in enumerate(violations, 1):
-            violation_context = violation.violation.context
-            output_str += (
-                f"[{i} / {len(violations)}] "
-                f"@ {violation.violation.location} "
-                f"-- {violation.violation.severity.value}: "
-                f"{violation.violation.violation_type.value}\n"
-            )
-        self.message: str = output_str
-        """A parsed summary message of all the violations."""
+        self.sink: Optional[ViolationSink] = sink
+        """The sink the violations were collected in, which may have dropped some"""
 
-        self.max_severity: ViolationSeverity = max(
-            [x.violation.severity for x in violations]
+    @cached_property
+    def message(self) -> str:
+        """A parsed summary message of all the violations.
+
+        It is only rendered when asked for, as it can be very long.
+        """
+        total = self.sink.total if self.sink is not None else len(self.violations)
+        lines = [f" --- FOUND {total} VIOLATIONS ---\n\n"]
+        lines.extend(
+            f"[{i} / {total}] "
+            f"@ {x.violation.location} "
+            f"-- {x.violation.severity.value}: "
+            f"{x.violation.violation_type.value}\n"
+            for i, x in enumerate(self.violations, 1)
         )
+        if self.sink is not None and self.sink.dropped:
+            lines.append(f"\n ... and {self.sink.dropped} more. All violations:\n")
+            lines.extend(
+                f"{count:>10} {violation_type.name}\n"
+                for violation_type, count in sorted(
+                    self.sink.counts.items(), key=lambda x: -x[1]
+                )
+            )
+        return "".join(lines)
+
+    @cached_property
+    def max_severity(self) -> ViolationSeverity:
         """The greatest severity among all violations"""
+        if self.sink is not None and self.sink.max_severity is not None:
+            return self.sink.max_severity
+        return max(x.violation.severity for x in self.violations)
+
+
+class ViolationLimitReached(InvalidBundleError):
+    """Raised by a `ViolationSink` to stop checking at a fail-fast violation"""
+
+    def __init__(self, violation: SpecificationViolation) -> None:
+        super().__init__(
+            f"Stopped at a {violation.severity.value} violation "
+            f"at {violation.location}"
+        )
+        self.violation: SpecificationViolation = violation
+
+
+class ViolationSink:
+    """Collects violations as they are found, in bounded memory.
+
+    Every violation is counted by type, but only the first `max_violations`
+    are kept, so that a badly broken bundle does not fill the memory with
+    millions of them.
+    """
+
+    __slots__ = (
+        "max_violations",
+        "fail_fast",
+        "violations",
+        "counts",
+        "total",
+        "max_severity",
+        "listener",
+        "stopped_at",
+    )
+
+    def __init__(
+        self,
+        max_violations: Optional[int] = None,
+        fail_fast: Optional[ViolationSeverity] = None,
+        listener: Optional[Callable[[SpecificationViolation], None]] = None,
+    ) -> None:
+        """Make an empty sink.
+
+        Args:
+            max_violations: How many violations to keep, at most. All of them
+                are kept if None.
+            fail_fast: Stop at the first violation at least this severe, by
+                raising `ViolationLimitReached`. Never stop if None.
+            listener: Called with every violation added, kept or not.
+        """
+        self.max_violations: Optional[int] = max_violations
+        self.fail_fast: Optional[ViolationSeverity] = fail_fast
+        self.listener: Optional[Callable[[SpecificationViolation], None]] = listener
+        self.violations: list[SpecificationViolation] = []
+        """The violations kept, in the order they were added"""
+        self.counts: dict[Optional[ViolationType], int] = {}
+        """How many violations of each type were added, kept or not"""
+        self.total: int = 0
+        self.max_severity: Optional[ViolationSeverity] = None
+        self.stopped_at: Optional[SpecificationViolation] = None
+        """The violation this sink failed fast at, if it did"""
+
+    def add(self, violation: SpecificationViolation) -> None:
+        """Add a violation.
+
+        Raises:
+            ViolationLimitReached if the violation is severe enough to fail fast.
+                The violation is added before raising.
+        """
+        self.total += 1
+        violation_type = violation.violation_type
+        self.counts[violation_type] = self.counts.get(violation_type, 0) + 1
+        severity = violation.severity
+        if self.max_severity is None or self.max_severity < severity:
+            self.max_severity = severity
+        if self.max_violations is None or len(self.violations) < self.max_violations:
+            self.violations.append(violation)
+        if self.listener is not None:
+            self.listener(violation)
+        if self.fail_fast is not None and not severity < self.fail_fast:
+            self.stopped_at = violation
+            raise ViolationLimitReached(violation)
+
+    def extend(self, violations: Iterable[SpecificationViolation]) -> None:
+        for violation in violations:
+            self.add(violation)
+
+    def merge(self, other: "ViolationSink") -> None:
+        """Add the violations kept by another sink, counting those it dropped.
+
+        Raises:
+            ViolationLimitReached if a violation is severe enough to fail fast,
+                or if the other sink failed fast.
+        """
+        kept: dict[Optional[ViolationType], int] = {}
+        for violation in other.violations:
+            kept[violation.violation_type] = kept.get(violation.violation_type, 0) + 1
+        for violation_type, count in other.counts.items():
+            dropped = count - kept.get(violation_type, 0)
+            if dropped:
+                self.counts[violation_type] = (
+                    self.counts.get(violation_type, 0) + dropped
+                )
+        self.total += other.dropped
+        if other.max_severity is not None and (
+            self.max_severity is None or self.max_severity < other.max_severity
+        ):
+            self.max_severity = other.max_severity
+
+        self.extend(other.violations)
+        if other.stopped_at is not None:
+            self.stopped_at = other.stopped_at
+            raise ViolationLimitReached(other.stopped_at)
+
+    @property
+    def dropped(self) -> int:
+        """How many violations were counted, but not kept"""
+        return self.total - len(self.violations)
+
+    def error(self) -> MultipleViolationsError:
+        """Get an error to raise with the violations kept"""
+        return MultipleViolationsError(
+            [InvalidSpecificationError(x) for x in self.violations], sink=self
+        )
 
 
 PossibleViolations = Union[list[SpecificationViolation], None]
@@ -131,7 +315,8 @@ def violation(
     violation_type: ViolationType, severity: ViolationSeverity, location: Optional[str]
 ) -> InvalidSpecificationError:
     """Wrapper to make violation errors quickly"""
-    log.debug(f"Making new violation: {violation_type}, {severity}, {location}")
+    if log.isEnabledFor(logging.DEBUG):
+        log.debug(f"Making new violation: {violation_type}, {severity}, {location}")
     return InvalidSpecificationError(
         violation=SpecificationViolation(
             location=location, violation_type=violation_type, severity=severity
@@ -151,6 +336,7 @@ class MyrKey:
     description: str
     value: Union[Literal["any"], Literal["text"], str]
     valid_values: list[Any]
+    pattern: Optional[str] = None
 
 
 @dataclass
@@ -160,7 +346,7 @@ class MyrType:
     required_keys: list[MyrKey]
     optional_keys: list[MyrKey]
 
-    @property
+    @cached_property
     def valid_keys(self) -> list[MyrKey]:
         all_keys = copy(self.required_keys)
         all_keys.extend(self.optional_keys)
@@ -171,12 +357,15 @@ def check_parsing_validity(specification: dict) -> None:
     """Check a specification for basic parsing validity.
 
     This includes:
+        - Being an object;
         - Having the `types` and `keys` keys;
         - Both the `types` and `keys` keys have lists as values;
 
     Raises:
         InvalidSpecificationError if some checks fail.
     """
+    if not isinstance(specification, dict):
+        raise critical_violation(ViolationType.INVALID_SPEC_FORMAT, location=f"/")
     if "types" not in specification:
         raise critical_violation(ViolationType.TYPES_UNDEFINED, location=f"/")
     if "keys" not in specification:
@@ -202,8 +391,13 @@ def parse_specification_keys(
     violations = []
     parsed_keys: dict[str, MyrKey] = {}
     for value in keys:
+        if not isinstance(value, dict):
+            violations.append(
+                error_violation(ViolationType.KEYS_VALUE_INVALID, location=f"/keys/")
+            )
+            continue
         # First of all, check if we have the valid keys.
-        if "qualifier" not in value:
+        if not isinstance(value.get("qualifier"), str):
             violations.append(
                 error_violation(ViolationType.MISSING_KEY_QUALIFIER, location=f"/keys/")
             )
@@ -224,6 +418,13 @@ def parse_specification_keys(
                 )
             )
             continue
+        if not isinstance(value["value"], str):
+            violations.append(
+                error_violation(
+                    ViolationType.UNKNOWN_KEY_VALUE, location=f"/keys/{key}/value"
+                )
+            )
+            continue
 
         if "valid_values" in value and value["valid_values"] is not None:
             if not isinstance(value["valid_values"], list):
@@ -234,7 +435,7 @@ def parse_specification_keys(
                     )
                 )
                 continue
-            if not all([isinstance(x, str) for x in value["valid_values"]]):
+            if not all(isinstance(x, str) for x in value["valid_values"]):
                 violations.append(
                     error_violation(
                         ViolationType.MALFORMED_KEY_VALID_VALUES,
@@ -243,11 +444,24 @@ def parse_specification_keys(
                 )
                 continue
 
+        if value.get("pattern") is not None:
+            try:
+                re.compile(value["pattern"])
+            except (TypeError, re.error):
+                violations.append(
+                    error_violation(
+                        ViolationType.MALFORMED_KEY_PATTERN,
+                        location=f"/keys/{key}/pattern/",
+                    )
+                )
+                continue
+
         parsed_keys[key] = MyrKey(
             qualifier=value["qualifier"],
             description=value["description"],
             value=value["value"],
             valid_values=value.get("valid_values"),
+            pattern=value.get("pattern"),
         )
 
     return (parsed_keys, violations)
@@ -259,8 +473,13 @@ def parse_specification_types(
     parsed_types: list[MyrType] = []
     violations: list[InvalidSpecificationError] = []
     for value in types:
+        if not isinstance(value, dict):
+            violations.append(
+                error_violation(ViolationType.TYPES_VALUE_INVALID, location=f"/types/")
+            )
+            continue
         # Again, check first if we have the keys.
-        if "qualifier" not in value:
+        if not isinstance(value.get("qualifier"), str):
             violations.append(
                 error_violation(
                     ViolationType.MISSING_TYPE_QUALIFIER, location=f"/types/"
@@ -275,7 +494,7 @@ def parse_specification_types(
                 )
             )
             continue
-        if "valid_keys" not in value:
+        if not isinstance(value.get("valid_keys"), list):
             violations.append(
                 error_violation(
                     ViolationType.MISSING_TYPE_VALID_KEYS, location=f"/types/{key}/"
@@ -287,7 +506,9 @@ def parse_specification_types(
         optional_keys = []
         found_violations = False
         for key_obj in value["valid_keys"]:
-            if "qualifier" not in key_obj:
+            if not isinstance(key_obj, dict) or not isinstance(
+                key_obj.get("qualifier"), str
+            ):
                 violations.append(
                     error_violation(
                         ViolationType.MISSING_TYPE_KEY_QUALIFIER,
@@ -335,7 +556,60 @@ def parse_specification_types(
     return (parsed_types, violations)
 
 
+RESERVED_KEYS: frozenset[str] = frozenset(["type", "id", "specification"])
+"""Keys that objects may have regardless of their type"""
+
+REFERENCE_PREFIXES: frozenset[str] = frozenset([">", "@"])
+"""Prefixes of relative and remote keys, which point to their values"""
+
+
+MAX_KEY_PLANS: int = 4096
+"""How many key plans a specification keeps, before starting over"""
+
+
+class ValueMatcher:
+    """Tells if a text value is valid for a key, compiled once per key.
+
+    A value is valid if it is one of the `valid_values` of the key, when the
+    key lists them, and if it fully matches its `pattern`, when it has one.
+    """
+
+    __slots__ = ("values", "pattern")
+
+    def __init__(self, key: MyrKey) -> None:
+        self.values: Optional[frozenset[str]] = (
+            frozenset(key.valid_values) if key.valid_values is not None else None
+        )
+        self.pattern: Optional[re.Pattern] = (
+            re.compile(key.pattern) if key.pattern is not None else None
+        )
+
+    def __call__(self, value: str) -> bool:
+        if self.values is not None and value not in self.values:
+            return False
+        return self.pattern is None or self.pattern.fullmatch(value) is not None
+
+
 class Specification:
+    """A compiled specification, ready to validate objects with.
+
+    Besides the parsed types and keys, the specification holds read-only
+    lookup tables, so that validating an object is a handful of hash lookups
+    and set operations. How to check the keys of each combination of type
+    and keys is worked out once, and reused for every object like it.
+    """
+
+    __slots__ = (
+        "original_specification",
+        "types",
+        "keys",
+        "required_keys",
+        "allowed_keys",
+        "valid_values",
+        "matchers",
+        "_plans",
+    )
+
     def __init__(self, specification: dict) -> None:
         """Parse a specification to a specification object.
 
@@ -356,7 +630,7 @@ class Specification:
         # We have a sort of circular dependency here, since the keys
         # may list valid types in the specification. We check them here.
         loop_violations: list[InvalidSpecificationError] = []
-        possible_types = [x.qualifier for x in types]
+        possible_types = {x.qualifier: x for x in types}
         for key, value in keys.items():
             # The "value" slot has what the key is
             if value.value in ["text", "any"]:
@@ -369,8 +643,292 @@ class Specification:
                 )
                 continue
         if loop_violations:
-            raise MultipleViolationsError(violations)
+            raise MultipleViolationsError(loop_violations)
 
         # Step 4 - Package types in the object
-        self.types: dict[str, MyrType]
         self.original_specification: dict = specification
+        self.types: Mapping[str, MyrType] = MappingProxyType(possible_types)
+        """Type qualifier -> type"""
+        self.keys: Mapping[str, MyrKey] = MappingProxyType(keys)
+        """Key qualifier -> key"""
+        self.required_keys: Mapping[str, frozenset[str]] = MappingProxyType(
+            {
+                x.qualifier: frozenset(y.qualifier for y in x.required_keys)
+                for x in types
+            }
+        )
+        """Type qualifier -> qualifiers of the keys the type requires"""
+        self.allowed_keys: Mapping[str, frozenset[str]] = MappingProxyType(
+            {x.qualifier: frozenset(y.qualifier for y in x.valid_keys) for x in types}
+        )
+        """Type qualifier -> qualifiers of all the keys the type can have"""
+        self.valid_values: Mapping[str, frozenset[str]] = MappingProxyType(
+            {
+                x.qualifier: frozenset(x.valid_values)
+                for x in keys.values()
+                if x.valid_values is not None
+            }
+        )
+        """Key qualifier -> values the key can take, for restricted keys only"""
+        self.matchers: Mapping[str, ValueMatcher] = MappingProxyType(
+            {
+                x.qualifier: ValueMatcher(x)
+                for x in keys.values()
+                if x.valid_values is not None or x.pattern is not None
+            }
+        )
+        """Key qualifier -> matcher of its values, for restricted keys only"""
+        self._plans: dict[tuple[str, tuple[str, ...]], _KeyPlan] = {}
+
+    def validate(
+        self, structure: dict, location: str = ""
+    ) -> list[InvalidSpecificationError]:
+        """Validate an object, and the typed objects nested in it.
+
+        Objects are checked against their own `type`. Values of keys with
+        a type as `value` are validated as objects of that type, while values
+        of `any` keys are only validated if they are (or are lists of)
+        objects with a `type`.
+
+        Args:
+            structure: The object to validate.
+            location: The location of the object, prepended to violations.
+
+        Returns:
+            A list of the violations found.
+        """
+        violations: list[SpecificationViolation] = []
+        self._validate(structure, location, violations.append)
+        return [InvalidSpecificationError(x) for x in violations]
+
+    def collect(self, structure: dict, sink: ViolationSink, location: str = "") -> None:
+        """Validate an object like `validate`, adding its violations to a sink.
+
+        Raises:
+            ViolationLimitReached if the sink fails fast on a violation.
+        """
+        self._validate(structure, location, sink.add)
+
+    def _validate(self, structure: dict, location: str, add: "AddViolation") -> None:
+        stack: list[tuple[dict, str]] = [(structure, location)]
+        while stack:
+            obj, pointer = stack.pop()
+            if not self._check_type(obj, pointer, add):
+                continue
+            plan = self._plan(obj["type"], tuple(obj))
+            children = self._apply_plan(obj, pointer, plan, add)
+            stack.extend(reversed(children))
+
+    def validate_batch(
+        self, objects: list[dict], locations: Optional[list[str]] = None
+    ) -> list[list[InvalidSpecificationError]]:
+        """Validate many objects at once, grouping them by type and keys.
+
+        The key plan of each group of objects with the same type and keys is
+        looked up once, and applied to every object of the group.
+
+        Args:
+            objects: The objects to validate.
+            locations: The location of each object, prepended to violations.
+
+        Returns:
+            The violations of each object, exactly as `validate` finds them.
+        """
+        return [
+            [InvalidSpecificationError(x) for x in violations]
+            for violations in self.collect_batch(objects, locations)
+        ]
+
+    def collect_batch(
+        self, objects: list[dict], locations: Optional[list[str]] = None
+    ) -> list[list[SpecificationViolation]]:
+        """Validate many objects like `validate_batch`, as violation records"""
+        locations = locations if locations is not None else [""] * len(objects)
+        results: list[list[SpecificationViolation]] = [[] for _ in objects]
+        groups: dict[tuple[str, tuple[str, ...]], list[int]] = {}
+        for i, obj in enumerate(objects):
+            if self._check_type(obj, locations[i], results[i].append):
+                groups.setdefault((obj["type"], tuple(obj)), []).append(i)
+
+        for (type_qualifier, shape), group in groups.items():
+            plan = self._plan(type_qualifier, shape)
+            for i in group:
+                add = results[i].append
+                for child, pointer in self._apply_plan(
+                    objects[i], locations[i], plan, add
+                ):
+                    self._validate(child, pointer, add)
+        return results
+
+    def _check_type(self, obj: dict, pointer: str, add: "AddViolation") -> bool:
+        """Check that an object has a known type, so its keys can be checked"""
+        if not isinstance(obj, dict) or "type" not in obj:
+            add(_error(ViolationType.MISSING_TYPE_KEY, f"{pointer}/"))
+            return False
+        if not isinstance(obj["type"], str) or obj["type"] not in self.types:
+            add(_error(ViolationType.UNKNOWN_TYPE, f"{pointer}/type"))
+            return False
+        return True
+
+    def _plan(self, type_qualifier: str, shape: tuple[str, ...]) -> "_KeyPlan":
+        """Get how to check the keys of objects of a type with the given keys.
+
+        The plan only depends on the type and on the keys, so it is computed
+        once and kept for every other object of the same shape.
+        """
+        plan = self._plans.get((type_qualifier, shape))
+        if plan is not None:
+            return plan
+
+        allowed = self.allowed_keys[type_qualifier]
+        present = set(shape)
+        if any(x[:1] in REFERENCE_PREFIXES for x in shape):
+            present = {x.lstrip(">@") for x in shape}
+        missing = tuple(sorted(self.required_keys[type_qualifier] - present))
+
+        checks: list[tuple[str, Optional[str]]] = []
+        for key in shape:
+            if key in RESERVED_KEYS:
+                continue
+            if key[:1] in REFERENCE_PREFIXES:
+                # Unresolved relative (>) or remote (@) keys: their values
+                # are not here to check, but the keys themselves must exist.
+                if key.lstrip(">@") not in allowed:
+                    checks.append((key, None))
+                continue
+            checks.append((key, self.keys[key].value if key in allowed else None))
+
+        plan = _KeyPlan(missing, tuple(checks))
+        if len(self._plans) >= MAX_KEY_PLANS:
+            self._plans.clear()
+        self._plans[(type_qualifier, shape)] = plan
+        return plan
+
+    def _apply_plan(
+        self,
+        obj: dict,
+        pointer: str,
+        plan: "_KeyPlan",
+        add: "AddViolation",
+    ) -> list[tuple[dict, str]]:
+        """Check the keys of an object, returning the nested objects to check"""
+        for key in plan.missing:
+            add(_error(ViolationType.MISSING_REQUIRED_KEY, f"{pointer}/{key}"))
+
+        children: list[tuple[dict, str]] = []
+        for key, kind in plan.checks:
+            if kind is None:
+                add(_error(ViolationType.UNKOWN_KEY, f"{pointer}/{key}"))
+                continue
+
+            value = obj[key]
+            if kind == "any":
+                if isinstance(value, dict) and "type" in value:
+                    children.append((value, f"{pointer}/{key}"))
+                elif isinstance(value, list):
+                    children.extend(
+                        (x, f"{pointer}/{key}/{i}")
+                        for i, x in enumerate(value)
+                        if isinstance(x, dict) and "type" in x
+                    )
+            elif kind == "text":
+                if not isinstance(value, str):
+                    add(_error(ViolationType.WRONG_KEY_TYPE, f"{pointer}/{key}"))
+                elif key in self.matchers and not self.matchers[key](value):
+                    add(_error(ViolationType.INVALID_KEY_VALUE, f"{pointer}/{key}"))
+            elif not isinstance(value, dict) or value.get("type") != kind:
+                add(_error(ViolationType.WRONG_KEY_TYPE, f"{pointer}/{key}"))
+            else:
+                children.append((value, f"{pointer}/{key}"))
+
+        return children
+
+
+AddViolation = Callable[[SpecificationViolation], None]
+
+
+def _error(violation_type: ViolationType, location: str) -> SpecificationViolation:
+    # Validation makes plain records, as it may find millions of violations
+    return SpecificationViolation(location, violation_type, ViolationSeverity.ERROR)
+
+
+@dataclass(frozen=True)
+class _KeyPlan:
+    """How to check the keys of objects with the same type and keys"""
+
+    missing: tuple[str, ...]
+    """The required keys that are missing, sorted"""
+    checks: tuple[tuple[str, Optional[str]], ...]
+    """The keys to check, in order, with their `value` (None if unknown)"""
+
+
+MAX_REGISTERED_SPECIFICATIONS: int = 64
+"""How many compiled specifications the registry keeps, at most"""
+
+
+class SpecificationRegistry:
+    """Compiled specifications, by the canonical digest of their definition.
+
+    Bundles that embed, or point to, the same specification share a single
+    compiled `Specification`, along with the key plans it learned. The least
+    recently used specifications are dropped when the registry is full.
+    """
+
+    def __init__(self, max_size: int = MAX_REGISTERED_SPECIFICATIONS) -> None:
+        self.max_size: int = max_size
+        self._specifications: OrderedDict[str, Specification] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: int = 0
+        """How many specifications were found already compiled"""
+        self.misses: int = 0
+
+    def get(self, specification: dict, digest: Optional[str] = None) -> Specification:
+        """Get a compiled specification, compiling it if it is not registered.
+
+        Args:
+            specification: The specification, as in the metadata.
+            digest: The canonical digest of the specification, if known.
+
+        Raises:
+            `MultipleViolationsError` if specification violations are found.
+                Invalid specifications are not registered.
+        """
+        if digest is None:
+            digest = canonical_digest(specification)
+        with self._lock:
+            compiled = self._specifications.get(digest)
+            if compiled is not None:
+                self._specifications.move_to_end(digest)
+                self.hits += 1
+                return compiled
+
+        # Compiled outside the lock: at worst, it is compiled twice at once
+        compiled = Specification(specification)
+        with self._lock:
+            self.misses += 1
+            self._specifications[digest] = compiled
+            while len(self._specifications) > self.max_size:
+                self._specifications.popitem(last=False)
+        return compiled
+
+    def clear(self) -> None:
+        with self._lock:
+            self._specifications.clear()
+
+    def __len__(self) -> int:
+        return len(self._specifications)
+
+
+SPECIFICATION_REGISTRY: SpecificationRegistry = SpecificationRegistry()
+"""The registry shared by the whole process"""
+
+
+def compile_specification(
+    specification: dict, digest: Optional[str] = None
+) -> Specification:
+    """Compile a specification, reusing it if it was already compiled.
+
+    Raises:
+        `MultipleViolationsError` if specification violations are found.
+    """
+    return SPECIFICATION_REGISTRY.get(specification, digest)
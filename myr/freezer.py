@@ -0,0 +1,379 @@
+import io
+import logging
+import os
+import struct
+import tarfile
+import time
+import zlib
+from bisect import bisect_right
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from myr import jsonio
+from myr.manifest import MANIFEST_NAME, METADATA_NAME, Manifest, dumps_manifest
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BLOCK_SIZE: int = 4 * 1024 * 1024
+"""How many uncompressed bytes go in each independently compressed block"""
+
+STATE_DIR: str = ".myr"
+"""The folder in a bundle where `myr` keeps its own files, never frozen"""
+
+COMPRESSIONS: dict[str, str] = {"gzip": ".tar.gz", "zstd": ".tar.zst", "none": ".tar"}
+"""The supported compressions, and the suffix of the archives they make"""
+
+INDEX_VERSION: int = 1
+"""The version of the seekable index format of gzip archives"""
+
+_TRAILER_SIZE: int = 34
+_TRAILER_ID: bytes = b"MY"
+_EMPTY_DEFLATE: bytes = b"\x03\x00"
+
+
+def _compress_block(block: bytes, level: int) -> bytes:
+    # Each block is a complete gzip member. zlib releases the GIL while
+    # compressing, so blocks are compressed in parallel by the threads.
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return compressor.compress(block) + compressor.flush()
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """A writable stream that gzips its data across many threads.
+
+    The data is cut in blocks, and each block is compressed on its own as a
+    complete gzip member. Members are written to the output in order, and
+    gzip readers decompress concatenated members as a single stream.
+    At most two blocks per thread are held in memory at once.
+
+    The offsets of the blocks written are kept in `blocks`, so the output can
+    later be decompressed from any block on.
+    """
+
+    def __init__(
+        self,
+        output: BinaryIO,
+        jobs: Optional[int] = None,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        level: int = 6,
+    ) -> None:
+        self.output: BinaryIO = output
+        self.block_size: int = block_size
+        self.level: int = level
+        self.jobs: int = jobs if jobs is not None else (os.cpu_count() or 1)
+
+        self.blocks: list[tuple[int, int]] = []
+        """The uncompressed and compressed offsets of each block written"""
+
+        self._buffer = bytearray()
+        self._position = 0
+        self._compressed_position = 0
+        self._pool = ThreadPoolExecutor(max_workers=self.jobs)
+        self._pending: deque[tuple[int, Future]] = deque()
+
+    def writable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        """The number of uncompressed bytes written so far"""
+        return self._position
+
+    def write(self, data) -> int:
+        self._position += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.block_size:
+            self._submit(bytes(self._buffer[: self.block_size]))
+            del self._buffer[: self.block_size]
+        return len(data)
+
+    def end_block(self) -> None:
+        """End the current block here, even if it is not full"""
+        if self._buffer:
+            self._submit(bytes(self._buffer))
+            self._buffer.clear()
+
+    def _submit(self, block: bytes) -> None:
+        # The block is always cut from the start of the buffer
+        start = self._position - len(self._buffer)
+        future = self._pool.submit(_compress_block, block, self.level)
+        self._pending.append((start, future))
+        while len(self._pending) > 2 * self.jobs:
+            self._write_next()
+
+    def _write_next(self) -> None:
+        start, future = self._pending.popleft()
+        compressed = future.result()
+        self.blocks.append((start, self._compressed_position))
+        self.output.write(compressed)
+        self._compressed_position += len(compressed)
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.end_block()
+        while self._pending:
+            self._write_next()
+        self._pool.shutdown()
+        super().close()
+
+
+@dataclass
+class ArchiveIndex:
+    """Where to find each member in a gzip archive, without decompressing it"""
+
+    blocks: list[tuple[int, int]]
+    """The uncompressed and compressed offsets of each gzip block"""
+    members: dict[str, tuple[int, int]]
+    """The uncompressed offset and size of the data of each file, by name"""
+
+    def locate(self, name: str) -> tuple[int, int, int]:
+        """Find where to start decompressing to read a member.
+
+        Returns:
+            The compressed offset of the block holding the start of the member,
+            how many decompressed bytes to skip from there, and the member size.
+
+        Raises:
+            KeyError if there is no such member in the archive.
+        """
+        offset, size = self.members[name]
+        block = bisect_right(self.blocks, (offset, float("inf"))) - 1
+        start, compressed_start = self.blocks[block]
+        return (compressed_start, offset - start, size)
+
+
+def _empty_gzip_member(flags: int, fields: bytes) -> bytes:
+    # A gzip member with no data, carrying `fields` in its header. Readers
+    # skip over it, so the decompressed stream is left unchanged.
+    header = b"\x1f\x8b\x08" + bytes([flags]) + b"\0\0\0\0\0\xff"
+    return header + fields + _EMPTY_DEFLATE + struct.pack("<II", 0, 0)
+
+
+def write_index(output: BinaryIO, index: ArchiveIndex) -> None:
+    """Append a seekable index to a gzip archive.
+
+    The index is the (JSON) comment of an empty gzip member, followed by
+    another empty member of exactly `_TRAILER_SIZE` bytes whose extra field
+    holds the offset of the index, so it can be found from the end of the file.
+    """
+    offset = output.tell()
+    content = jsonio.dumps(
+        {"version": INDEX_VERSION, "blocks": index.blocks, "members": index.members}
+    )
+    output.write(_empty_gzip_member(0x10, content + b"\0"))
+    subfield = _TRAILER_ID + struct.pack("<HQ", 8, offset)
+    output.write(_empty_gzip_member(0x04, struct.pack("<H", len(subfield)) + subfield))
+
+
+def read_index(path: Path) -> Optional[ArchiveIndex]:
+    """Read the seekable index of a gzip archive, if it has one"""
+    with path.open("rb") as stream:
+        stream.seek(0, os.SEEK_END)
+        end = stream.tell() - _TRAILER_SIZE
+        if end < 0:
+            return None
+        stream.seek(end)
+        trailer = stream.read(_TRAILER_SIZE)
+        if trailer[:4] != b"\x1f\x8b\x08\x04" or trailer[12:14] != _TRAILER_ID:
+            return None
+        (offset,) = struct.unpack("<Q", trailer[16:24])
+
+        stream.seek(offset)
+        member = stream.read(end - offset)
+    if member[:4] != b"\x1f\x8b\x08\x10":
+        return None
+    try:
+        content = jsonio.loads(member[10 : member.index(b"\0", 10)])
+        if content.get("version") != INDEX_VERSION:
+            log.warning(f"Ignoring the index of {path}, of unknown version")
+            return None
+        return ArchiveIndex(
+            blocks=[_offsets(x) for x in content["blocks"]],
+            members={k: _offsets(v) for k, v in content["members"].items()},
+        )
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        log.warning(f"Ignoring the malformed index of {path}: {e!r}")
+        return None
+
+
+def _offsets(value) -> tuple[int, int]:
+    first, second = value
+    if not isinstance(first, int) or not isinstance(second, int):
+        raise TypeError(f"Expected two integers, got {value!r}")
+    return (first, second)
+
+
+def _inflate(stream: BinaryIO, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    # Decompress consecutive gzip members, from the current position on, in
+    # pieces of at most `chunk_size` bytes however well the data compresses
+    decompressor = zlib.decompressobj(31)
+    while data := stream.read(chunk_size):
+        while True:
+            output = decompressor.decompress(data, chunk_size)
+            yield output
+            if decompressor.eof:
+                data = decompressor.unused_data
+                decompressor = zlib.decompressobj(31)
+            else:
+                data = decompressor.unconsumed_tail
+            # A full output may leave some of the consumed data to decompress
+            if not data and len(output) < chunk_size:
+                break
+
+
+def _open_tar_stream(stream: BinaryIO) -> tarfile.TarFile:
+    if stream.read(4) == b"\x28\xb5\x2f\xfd":
+        import zstandard
+
+        stream.seek(0)
+        reader = zstandard.ZstdDecompressor().stream_reader(stream)
+        return tarfile.open(fileobj=reader, mode="r|")
+    stream.seek(0)
+    return tarfile.open(fileobj=stream, mode="r|*")
+
+
+def extract_member(
+    path: Path, name: str, output: BinaryIO, index: Optional[ArchiveIndex] = None
+) -> None:
+    """Extract a single file from a frozen bundle.
+
+    With the seekable index of gzip archives, only the blocks holding the file
+    are decompressed. Other archives are decompressed up to the file.
+
+    Raises:
+        KeyError if there is no such file in the archive.
+    """
+    index = index if index is not None else read_index(path)
+    with path.open("rb") as stream:
+        if index is None:
+            log.debug(f"{path} has no index, scanning it for {name}")
+            with _open_tar_stream(stream) as tar:
+                for info in tar:
+                    if info.name == name and info.isfile():
+                        output.write(tar.extractfile(info).read())
+                        return
+            raise KeyError(f"There is no '{name}' in {path}")
+
+        compressed_start, skip, remaining = index.locate(name)
+        stream.seek(compressed_start)
+        for data in _inflate(stream):
+            if skip >= len(data):
+                skip -= len(data)
+                continue
+            data = data[skip : skip + remaining]
+            skip = 0
+            output.write(data)
+            remaining -= len(data)
+            if remaining == 0:
+                return
+
+
+def read_frozen_metadata(path: Path) -> dict:
+    """Read the metadata of a frozen bundle, without decompressing its data"""
+    output = io.BytesIO()
+    extract_member(path, METADATA_NAME, output)
+    return jsonio.loads(output.getvalue())
+
+
+def _zstd_writer(output: BinaryIO, jobs: Optional[int]) -> BinaryIO:
+    import zstandard
+
+    compressor = zstandard.ZstdCompressor(threads=jobs if jobs is not None else -1)
+    return compressor.stream_writer(output, closefd=False)
+
+
+def bundle_files(input_path: Path, exclude: tuple[Path, ...] = ()) -> list[Path]:
+    """List the data files of a bundle, as paths relative to the bundle.
+
+    The metadata file, the `myr` state folder, and any of the `exclude`
+    paths are not listed.
+    """
+    excluded = {x.resolve() for x in exclude}
+    excluded.add((input_path / METADATA_NAME).resolve())
+    files = []
+    for path in sorted(input_path.rglob("*")):
+        if path.is_dir() or path.resolve() in excluded:
+            continue
+        if path.relative_to(input_path).parts[0] == STATE_DIR:
+            continue
+        files.append(path.relative_to(input_path))
+    return files
+
+
+def _add_bytes(tar: tarfile.TarFile, name: str, content: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(content)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(content))
+
+
+def _last_member_data(tar: tarfile.TarFile) -> tuple[str, tuple[int, int]]:
+    # The data of the member just added ends the archive, padded to a block
+    info = tar.members[-1]
+    padded = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+    return (info.name, (tar.offset - padded, info.size))
+
+
+def freeze_bundle(
+    input_path: Path,
+    output_path: Path,
+    metadata: dict,
+    jobs: Optional[int] = None,
+    compression: str = "gzip",
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    manifest: Optional[Manifest] = None,
+) -> None:
+    """Freeze a bundle to a compressed tar archive.
+
+    The (resolved) metadata is written as the first member of the archive,
+    followed by the manifest, if given. For gzip, they are in blocks of their
+    own, so they can be read without decompressing any of the data files,
+    and a seekable index of all members is appended to the archive. Data files
+    are streamed into the archive, so they are never loaded in memory whole.
+
+    Args:
+        input_path: The bundle folder.
+        output_path: The archive to write.
+        metadata: The metadata to write in the archive.
+        jobs: How many threads to compress with. Defaults to the CPU count.
+        compression: One of the `COMPRESSIONS`.
+        block_size: The size of the gzip blocks compressed in parallel.
+        manifest: The manifest of the files of the bundle.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}'")
+
+    files = bundle_files(input_path, exclude=(output_path,))
+    log.info(f"Freezing {len(files)} files from {input_path} to {output_path}")
+    with output_path.open("wb") as output:
+        if compression == "gzip":
+            writer = ParallelGzipWriter(output, jobs=jobs, block_size=block_size)
+        elif compression == "zstd":
+            writer = _zstd_writer(output, jobs)
+        else:
+            # Uncompressed archives can be memory-mapped, see `myr.bundle`
+            writer = output
+
+        members: dict[str, tuple[int, int]] = {}
+        with writer, tarfile.open(
+            fileobj=writer, mode="w", format=tarfile.PAX_FORMAT
+        ) as tar:
+            _add_bytes(tar, METADATA_NAME, jsonio.dumps(metadata))
+            members.update([_last_member_data(tar)])
+            if manifest is not None:
+                _add_bytes(tar, MANIFEST_NAME, dumps_manifest(manifest))
+                members.update([_last_member_data(tar)])
+            if isinstance(writer, ParallelGzipWriter):
+                writer.end_block()
+
+            for file in files:
+                log.debug(f"Adding {file} to the archive")
+                tar.add(input_path / file, arcname=str(file), recursive=False)
+                members.update([_last_member_data(tar)])
+
+        if isinstance(writer, ParallelGzipWriter):
+            write_index(output, ArchiveIndex(blocks=writer.blocks, members=members))
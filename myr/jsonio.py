@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Optional, TextIO, Union
+
+log = logging.getLogger(__name__)
+
+BACKEND_PREFERENCE: tuple[str, ...] = ("orjson", "simdjson", "stdlib")
+"""The JSON backends, from the fastest. The first one installed is used."""
+
+BACKEND_VARIABLE: str = "MYR_JSON_BACKEND"
+"""An environment variable to force the use of a backend"""
+
+
+@dataclass(frozen=True)
+class JsonBackend:
+    name: str
+    loads: Callable[[Union[bytes, str]], Any]
+    """Decode a document. Raises any exception if the document is invalid."""
+    dumps: Callable[[Any, bool, bool], bytes]
+    """Encode an object to UTF-8, given whether to indent and to sort keys"""
+
+
+def _stdlib_dumps(obj, pretty: bool, sort_keys: bool) -> bytes:
+    if pretty:
+        return json.dumps(obj, indent=4, sort_keys=sort_keys).encode()
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode()
+
+
+def _stdlib_backend() -> JsonBackend:
+    return JsonBackend(name="stdlib", loads=json.loads, dumps=_stdlib_dumps)
+
+
+def _orjson_backend() -> JsonBackend:
+    import orjson
+
+    def dumps(obj, pretty: bool, sort_keys: bool) -> bytes:
+        # orjson only indents by two spaces, so pretty output, where speed
+        # does not matter, is left to the standard library
+        if pretty:
+            return _stdlib_dumps(obj, pretty, sort_keys)
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+    return JsonBackend(name="orjson", loads=orjson.loads, dumps=dumps)
+
+
+def _simdjson_backend() -> JsonBackend:
+    import simdjson
+
+    # simdjson only decodes, so encoding is left to the standard library
+    return JsonBackend(name="simdjson", loads=simdjson.loads, dumps=_stdlib_dumps)
+
+
+_FACTORIES: dict[str, Callable[[], JsonBackend]] = {
+    "orjson": _orjson_backend,
+    "simdjson": _simdjson_backend,
+    "stdlib": _stdlib_backend,
+}
+
+_backend: Optional[JsonBackend] = None
+
+
+def set_backend(name: Optional[str] = None) -> JsonBackend:
+    """Select the JSON backend used by `myr`.
+
+    Args:
+        name: One of the `BACKEND_PREFERENCE`. If not given, the one in the
+            `MYR_JSON_BACKEND` environment variable, or else the fastest
+            installed backend, is used.
+
+    Raises:
+        ValueError if the backend is unknown.
+        ImportError if the backend was asked for, but is not installed.
+    """
+    global _backend
+    name = name if name is not None else os.environ.get(BACKEND_VARIABLE)
+    if name is not None:
+        if name not in _FACTORIES:
+            raise ValueError(f"Unknown JSON backend '{name}'")
+        _backend = _FACTORIES[name]()
+        return _backend
+
+    for candidate in BACKEND_PREFERENCE:
+        try:
+            _backend = _FACTORIES[candidate]()
+            break
+        except ImportError:
+            continue
+    log.debug(f"Using the {_backend.name} JSON backend")
+    return _backend
+
+
+def get_backend() -> JsonBackend:
+    """Get the JSON backend in use, selecting it on first use"""
+    return _backend if _backend is not None else set_backend()
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Decode a JSON document with the fastest backend.
+
+    Documents the backend refuses are decoded again by the standard library,
+    which accepts a few more (e.g. `NaN`, or very large integers), and which
+    gives the position of the error in the documents that are truly invalid.
+
+    Raises:
+        json.JSONDecodeError if the document is not valid JSON.
+    """
+    backend = get_backend()
+    try:
+        return backend.loads(data)
+    except Exception:
+        if backend.name == "stdlib":
+            raise
+    return json.loads(data)
+
+
+def dumps(obj, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """Encode an object to UTF-8 JSON, compact unless `pretty` is True.
+
+    Objects the backend cannot encode (e.g. with non-string keys, or very large
+    integers) are encoded by the standard library instead.
+
+    Raises:
+        TypeError if the object cannot be encoded to JSON.
+    """
+    backend = get_backend()
+    try:
+        return backend.dumps(obj, pretty, sort_keys)
+    except TypeError:
+        if backend.name == "stdlib":
+            raise
+    return _stdlib_dumps(obj, pretty, sort_keys)
+
+
+def load(stream: Union[BinaryIO, TextIO]) -> Any:
+    return loads(stream.read())
+
+
+def dump(obj, stream: BinaryIO, pretty: bool = False) -> None:
+    stream.write(dumps(obj, pretty=pretty))
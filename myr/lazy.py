@@ -0,0 +1,211 @@
+import logging
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Optional
+
+from myr.resolver import IdIndex, RemoteFetcher, merge_specifications
+
+log = logging.getLogger(__name__)
+
+
+class LazyContext:
+    """What the lazy nodes of a structure share to resolve their keys.
+
+    Remote documents are fetched, and the ids of the structure are indexed,
+    only the first time a node needs them.
+    """
+
+    def __init__(
+        self,
+        root: dict,
+        fetcher: Optional[RemoteFetcher],
+        ids: Optional[IdIndex] = None,
+    ) -> None:
+        self.root: dict = root
+        self.fetcher: Optional[RemoteFetcher] = fetcher
+        self._ids: Optional[IdIndex] = ids
+        self._referenced: dict[str, LazyObject] = {}
+
+    @property
+    def ids(self) -> IdIndex:
+        if self._ids is None:
+            self._ids = IdIndex(self.root)
+        return self._ids
+
+    def referenced(self, identifier: str) -> "LazyObject":
+        """The object a relative key points to, shared by every reference.
+
+        Raises:
+            KeyError if there is no object with this id.
+        """
+        if identifier not in self._referenced:
+            self._referenced[identifier] = LazyObject(
+                self.ids[identifier], self, identifier in self.ids.listed, (), False
+            )
+        return self._referenced[identifier]
+
+
+def _wrap(value, context: LazyContext, in_list: bool, seen: tuple, relative: bool):
+    if isinstance(value, dict):
+        return LazyObject(value, context, in_list, seen, relative)
+    if isinstance(value, list):
+        return LazyList(value, context, seen, relative)
+    return value
+
+
+def materialize(value):
+    """Turn lazy nodes into plain, fully resolved dicts and lists"""
+    if isinstance(value, LazyObject):
+        return {key: materialize(x) for key, x in value.items()}
+    if isinstance(value, LazyList):
+        return [materialize(x) for x in value]
+    return value
+
+
+class LazyObject(Mapping):
+    """A read-only view of an object, resolving its keys when they are read.
+
+    Remote (@) and relative (>) keys are listed under their plain name, and
+    their value is only retrieved (and then kept) the first time it is read.
+    Nested objects and lists are wrapped in lazy nodes of their own, so
+    reading a key never resolves or copies more than that key.
+
+    The result is the same as `myr.resolver.resolve`: remote keys in objects
+    inside lists are left as they are, remote documents only have their own
+    remote keys resolved, and relative keys give the purged object they point
+    to, with its remote keys resolved as they are in place.
+
+    Raises:
+        (When reading a key)
+        ValueError if remote documents point to each other in a loop.
+        KeyError if a relative key points to an id that does not exist.
+    """
+
+    __slots__ = (
+        "_raw",
+        "_context",
+        "_in_list",
+        "_seen",
+        "_relative",
+        "_keys",
+        "_cache",
+    )
+
+    def __init__(
+        self,
+        raw: dict,
+        context: LazyContext,
+        in_list: bool = False,
+        seen: tuple[str, ...] = (),
+        relative: bool = True,
+    ) -> None:
+        self._raw = raw
+        self._context = context
+        self._in_list = in_list
+        self._seen = seen
+        self._relative = relative
+        self._keys: Optional[dict[str, str]] = None
+        self._cache: dict = {}
+
+    def _key_map(self) -> dict[str, str]:
+        # Later keys win over earlier ones with the same plain name, like
+        # they do when the structure is resolved all at once.
+        if self._keys is None:
+            self._keys = {}
+            for key in self._raw:
+                if key.startswith("@") and not self._in_list:
+                    self._keys[key.strip("@")] = key
+                elif key.startswith(">") and self._relative:
+                    self._keys[key.strip(">")] = key
+                else:
+                    self._keys[key] = key
+        return self._keys
+
+    def __getitem__(self, key: str):
+        if key not in self._cache:
+            self._cache[key] = self._resolve(self._key_map()[key])
+        return self._cache[key]
+
+    def _resolve(self, raw_key: str):
+        value = self._raw[raw_key]
+        if raw_key.startswith(">") and self._relative:
+            try:
+                return self._context.referenced(value)
+            except KeyError:
+                log.exception(f"Key {raw_key} maps to id {value}, which was not found.")
+                raise KeyError(value)
+
+        if raw_key.startswith("@") and not self._in_list:
+            return self._resolve_remote(raw_key, value)
+
+        return _wrap(value, self._context, self._in_list, self._seen, self._relative)
+
+    def _resolve_remote(self, raw_key: str, value):
+        urls = value if isinstance(value, list) else [value]
+        for url in urls:
+            if not isinstance(url, str):
+                raise ValueError(f"Invalid value for remote key '{raw_key}': {value}")
+            if url in self._seen:
+                raise ValueError(f"Remote key '{raw_key}' loops back to {url}")
+
+        # Every document is requested before waiting on any of them
+        futures = [(url, self._context.fetcher.fetch(url)) for url in urls]
+        documents = [
+            LazyObject(x.result(), self._context, False, (*self._seen, url), False)
+            for url, x in futures
+        ]
+        if not isinstance(value, list):
+            return documents[0]
+
+        fused = merge_specifications([materialize(x) for x in documents])
+        return _wrap(fused, self._context, False, self._seen, False)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._key_map())
+
+    def __len__(self) -> int:
+        return len(self._key_map())
+
+    def __contains__(self, key) -> bool:
+        return key in self._key_map()
+
+    def __repr__(self) -> str:
+        return f"LazyObject({self._raw!r})"
+
+
+class LazyList(Sequence):
+    """A read-only view of a list, wrapping its items in lazy nodes"""
+
+    __slots__ = ("_raw", "_context", "_seen", "_relative", "_cache")
+
+    def __init__(
+        self,
+        raw: list,
+        context: LazyContext,
+        seen: tuple[str, ...] = (),
+        relative: bool = True,
+    ) -> None:
+        self._raw = raw
+        self._context = context
+        self._seen = seen
+        self._relative = relative
+        self._cache: dict[int, object] = {}
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[x] for x in range(*index.indices(len(self._raw)))]
+        if index < 0:
+            index += len(self._raw)
+        if not 0 <= index < len(self._raw):
+            raise IndexError("list index out of range")
+        if index not in self._cache:
+            value = self._raw[index]
+            self._cache[index] = _wrap(
+                value, self._context, True, self._seen, self._relative
+            )
+        return self._cache[index]
+
+    def __len__(self) -> int:
+        return len(self._raw)
+
+    def __repr__(self) -> str:
+        return f"LazyList({self._raw!r})"
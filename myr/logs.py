@@ -0,0 +1,66 @@
+import logging
+
+FORMAT: str = "%(asctime)s [%(levelname)s] %(name)s: %(message)s"
+"""The format of the logging module messages"""
+
+LOG_LEVELS = {
+    0: logging.WARN,
+    1: logging.INFO,
+    2: logging.DEBUG,
+}
+
+
+class ColorFormatter(logging.Formatter):
+    def __init__(self, fmt: str) -> None:
+        super().__init__(fmt)
+        # colorama is only needed once logging is set up, not on import
+        from colorama import Back, Fore, Style
+
+        self.reset: str = Fore.RESET + Back.RESET + Style.NORMAL
+        self.name_color: str = Style.BRIGHT + Fore.BLUE
+        # Change this dictionary to suit your coloring needs!
+        self.colors: dict[str, str] = {
+            "WARNING": Fore.YELLOW,
+            "ERROR": Fore.RED,
+            "DEBUG": Style.BRIGHT + Fore.MAGENTA,
+            "INFO": Fore.GREEN,
+            "CRITICAL": Style.BRIGHT + Fore.RED,
+        }
+
+    def format(self, record):
+        color = self.colors.get(record.levelname, "")
+        if color:
+            record.name = self.name_color + record.name + self.reset
+            if record.levelname != "INFO":
+                record.msg = color + record.msg + self.reset
+            record.levelname = color + record.levelname + self.reset
+        return logging.Formatter.format(self, record)
+
+
+def setup_logging(verbosity: int = 0) -> None:
+    """Send the (colored) logs of `myr` to standard error.
+
+    Args:
+        verbosity: How many times `-v` was given on the command line.
+    """
+    from colorama import init
+
+    init(autoreset=True)
+
+    # TODO: Change this to the name of the module. This is the root logger.
+    root_logger = logging.getLogger("myr")
+    root_logger.propagate = False
+
+    stream_level = logging.ERROR
+    for i, level in LOG_LEVELS.items():
+        stream_level = level if verbosity >= i else stream_level
+    # The logger filters too, so that hot paths can skip building messages
+    # no handler would emit, with `log.isEnabledFor`.
+    root_logger.setLevel(stream_level)
+
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    stream_h = logging.StreamHandler()
+    stream_h.setFormatter(ColorFormatter(FORMAT))
+    stream_h.setLevel(stream_level)  # The level of the stream log is set here.
+    root_logger.addHandler(stream_h)
@@ -0,0 +1,149 @@
+import hashlib
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Optional
+
+from myr import jsonio
+from myr.traversal import Visitor, walk
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE: int = 8 * 1024 * 1024
+"""How many bytes are read (and hashed) at a time"""
+
+METADATA_NAME: str = "myr-metadata.json"
+"""The name of the metadata file at the root of every bundle"""
+
+MANIFEST_NAME: str = "myr-manifest.json"
+"""The name of the manifest in frozen bundles"""
+
+
+@dataclass
+class ManifestEntry:
+    path: str
+    """The path of the file, relative to the bundle"""
+    size: int
+    mtime_ns: int
+    digest: str
+    """The sha256 digest of the file"""
+
+
+Manifest = dict[str, ManifestEntry]
+
+
+def hash_file(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
+    """Compute the sha256 digest of a file, reading it in large chunks.
+
+    The chunks are read into a single reused buffer, and hashlib releases the
+    GIL while hashing them, so many files can be hashed in parallel threads.
+    """
+    digest = hashlib.sha256()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with path.open("rb", buffering=0) as stream:
+        while read := stream.readinto(buffer):
+            digest.update(view[:read])
+    return digest.hexdigest()
+
+
+class FileCollector(Visitor):
+    """Collects the `path` of every `file` object."""
+
+    def __init__(self) -> None:
+        self.paths: list[str] = []
+
+    def visit(self, node: dict, pointer: str, in_list: bool) -> None:
+        if node.get("type") == "file" and isinstance(node.get("path"), str):
+            self.paths.append(node["path"])
+
+
+def referenced_files(metadata: dict) -> list[str]:
+    """List the paths of the files referenced by some (resolved) metadata"""
+    collector = FileCollector()
+    walk(metadata, [collector])
+    return list(dict.fromkeys(collector.paths))
+
+
+def build_manifest(
+    root: Path,
+    paths: list[str],
+    jobs: Optional[int] = None,
+    previous: Optional[Manifest] = None,
+) -> Manifest:
+    """Hash files in parallel to build their manifest.
+
+    Args:
+        root: The folder the paths are relative to.
+        paths: The paths of the files to hash.
+        jobs: How many files to hash at once. Defaults to the CPU count.
+        previous: An earlier manifest of the same files. Files with the same
+            size and modification time as in it are not hashed again.
+
+    Raises:
+        FileNotFoundError if one of the files does not exist.
+    """
+    previous = previous if previous is not None else {}
+    manifest: Manifest = {}
+    to_hash: list[ManifestEntry] = []
+    for path in paths:
+        stat = (root / path).stat()
+        known = previous.get(path)
+        if (
+            known is not None
+            and known.size == stat.st_size
+            and known.mtime_ns == stat.st_mtime_ns
+        ):
+            manifest[path] = known
+            continue
+        entry = ManifestEntry(path, stat.st_size, stat.st_mtime_ns, digest="")
+        manifest[path] = entry
+        to_hash.append(entry)
+
+    log.info(f"Hashing {len(to_hash)} files ({len(paths) - len(to_hash)} unchanged)")
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        digests = pool.map(hash_file, [root / x.path for x in to_hash])
+        for entry, digest in zip(to_hash, digests):
+            entry.digest = digest
+
+    return manifest
+
+
+def verify_manifest(
+    root: Path, manifest: Manifest, jobs: Optional[int] = None
+) -> list[str]:
+    """Find the files that differ from their manifest.
+
+    Files with the same size and modification time as in the manifest are
+    trusted without hashing them again.
+
+    Returns:
+        The paths of the files that are missing or have changed.
+    """
+    present = [x for x in manifest if (root / x).is_file()]
+    current = build_manifest(root, present, jobs=jobs, previous=manifest)
+    return [
+        x
+        for x in manifest
+        if x not in current or current[x].digest != manifest[x].digest
+    ]
+
+
+def dumps_manifest(manifest: Manifest) -> bytes:
+    return jsonio.dumps([asdict(x) for x in manifest.values()])
+
+
+def load_manifest(path: Path) -> Manifest:
+    """Load a manifest saved with `save_manifest`"""
+    with path.open("rb") as stream:
+        entries = [ManifestEntry(**x) for x in jsonio.load(stream)]
+    return {x.path: x for x in entries}
+
+
+def save_manifest(manifest: Manifest, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_bytes(dumps_manifest(manifest))
+    os.replace(temp_path, path)
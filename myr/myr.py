@@ -1,9 +1,65 @@
+import hashlib
 import logging
+from functools import partial
 from pathlib import Path
-from typing import BinaryIO
+from queue import Empty
+from typing import TYPE_CHECKING, BinaryIO, Callable, Iterator, Optional
 import os
+import threading
 import json
-from myr.checker import MultipleViolationsError
+import sys
+from myr import jsonio
+from myr.cache import CheckCache, CheckRecord, RemoteCache, canonical_digest
+from myr.checker import (
+    InvalidSpecificationError,
+    MultipleViolationsError,
+    Specification,
+    SpecificationViolation,
+    ViolationLimitReached,
+    ViolationSeverity,
+    ViolationSink,
+    ViolationType,
+    compile_specification,
+    critical_violation,
+    error_violation,
+)
+from myr.freezer import (
+    COMPRESSIONS,
+    STATE_DIR,
+    bundle_files,
+    extract_member,
+    freeze_bundle,
+)
+from myr.logs import setup_logging
+from myr.manifest import (
+    METADATA_NAME,
+    build_manifest,
+    load_manifest,
+    referenced_files,
+    save_manifest,
+)
+from myr.resolver import (
+    DuplicatedIDError,
+    InvalidIDError,
+    InvalidRemoteError,
+    RemoteFetcher,
+    resolve,
+    retrieve_json,
+)
+from myr.report import REPORT_FORMATS, WRITERS, ViolationWriter
+from myr.sidecar import (
+    IndexedMetadata,
+    index_metadata,
+    load_metadata,
+    read_sidecar,
+    sidecar_path,
+    write_sidecar,
+)
+from myr.store import ChunkStore, freeze_to_store
+from myr.stream import validate_stream
+
+if TYPE_CHECKING:
+    import multiprocessing
 
 log = logging.getLogger(__name__)
 
@@ -29,7 +85,7 @@ BASE_MYR_DATA = {
 }
 
 
-def myr_create(path: Path, overwrite: bool = False) -> None:
+def myr_create(path: Path, overwrite: bool = False, pretty: bool = False) -> None:
     log.debug(f"Invoked `myr_create` with {path}")
     if path.exists() and not overwrite:
         log.error(f"{path} exists! Will not overwrite. Pass --force to ignore.")
@@ -38,20 +94,675 @@ def myr_create(path: Path, overwrite: bool = False) -> None:
     log.info(f"Creating new data-myr container @ {path}")
     if not path.exists():
         os.makedirs(path)
-    with (path / "myr-metadata.json").open("w+") as stream:
-        json.dump(BASE_MYR_DATA, stream, indent=4)
+    with (path / METADATA_NAME).open("wb") as stream:
+        jsonio.dump(BASE_MYR_DATA, stream, pretty=pretty)
+
+
+SEVERITY_EXIT_CODES: dict[ViolationSeverity, int] = {
+    ViolationSeverity.NOTE: 0,
+    ViolationSeverity.WARNING: 0,
+    ViolationSeverity.ERROR: 1,
+    ViolationSeverity.CRITICAL: 2,
+}
+"""The exit code of `myr` for the most severe violation found"""
+
+VALIDATION_CHUNK_SIZE: int = 1024
+"""How many content entries to validate at once, before reporting their violations"""
+
+MAX_RECORDED_VIOLATIONS: int = 10_000
+"""How many violations a bundle can have, at most, for its check to be cached"""
+
+
+def find_bundles(paths: list[Path]) -> list[Path]:
+    """Find the bundles in some paths.
+
+    Each path can be a bundle folder, a `myr-metadata.json` file or a folder
+    to search for bundles in. Paths with no bundles in them are kept as they
+    are, so that checking them reports the missing metadata.
+    """
+    bundles: list[Path] = []
+    for path in paths:
+        if path.is_file() and path.name == METADATA_NAME:
+            bundles.append(path.parent)
+            continue
+        found = sorted(x.parent for x in path.rglob(METADATA_NAME))
+        bundles.extend(found if found else [path])
+
+    return list(dict.fromkeys(bundles))
+
+
+def _remotes_unchanged(remotes: dict[str, str], remote_cache: RemoteCache) -> bool:
+    """Test if the remote documents used by a previous check are unchanged"""
+    for url, digest in remotes.items():
+        try:
+            # This serves fresh documents from the cache, without the network
+            retrieve_json(url, cache=remote_cache)
+        except InvalidSpecificationError:
+            return False
+        entry = remote_cache.lookup(url)
+        if entry is None or entry.digest != digest:
+            return False
+    return True
+
+
+def _validate_entries(
+    specification: Specification,
+    resolved: dict,
+    known_entries: dict[str, list[dict]],
+    sink: ViolationSink,
+) -> Optional[dict[str, list[dict]]]:
+    """Validate resolved metadata, reusing the results of unchanged entries.
+
+    The content entries are validated a chunk at a time, adding their
+    violations to the sink in order, so that only the violations of a chunk
+    are held at once.
+
+    Returns:
+        The serialized violations of each content entry, by their canonical
+        digest, or None if the sink dropped violations, as the result is then
+        not cached.
+    """
+    content = resolved.get("content")
+    content_key = specification.keys.get("content")
+    if (
+        not isinstance(content, list)
+        or content_key is None
+        or content_key.value != "any"
+    ):
+        specification.collect(resolved, sink)
+        return {}
+
+    # Validating the bundle with no entries, then each entry on its own, is
+    # the same as validating it whole.
+    specification.collect({**resolved, "content": []}, sink)
+    entries: Optional[dict[str, list[dict]]] = {}
+    for start in range(0, len(content), VALIDATION_CHUNK_SIZE):
+        chunk = content[start : start + VALIDATION_CHUNK_SIZE]
+        found: dict[str, list[dict]] = {}
+        digests: list[Optional[str]] = []
+        to_validate: dict[str, dict] = {}
+        for entry in chunk:
+            if not isinstance(entry, dict) or "type" not in entry:
+                digests.append(None)
+                continue
+            digest = canonical_digest(entry)
+            digests.append(digest)
+            if digest in known_entries:
+                found[digest] = known_entries[digest]
+            elif entries is not None and digest in entries:
+                found[digest] = entries[digest]
+            elif digest not in found:
+                to_validate[digest] = entry
+
+        # New entries are validated together, grouped by type
+        results = specification.collect_batch(list(to_validate.values()))
+        for digest, violations in zip(to_validate, results):
+            found[digest] = [x.to_dict() for x in violations]
+
+        for i, digest in enumerate(digests, start=start):
+            if digest is None:
+                continue
+            for serialized in found[digest]:
+                violation = SpecificationViolation.from_dict(serialized)
+                violation.location = f"/content/{i}{violation.location}"
+                sink.add(violation)
+
+        if entries is not None and sink.dropped:
+            entries = None
+        if entries is not None:
+            entries.update(found)
+
+    return entries
+
+
+def check_bundle(
+    path: Path,
+    offline: bool = False,
+    use_cache: bool = True,
+    sidecar: bool = False,
+    remote_cache: Optional[RemoteCache] = None,
+    indexed: Optional[IndexedMetadata] = None,
+    sink: Optional[ViolationSink] = None,
+) -> list[SpecificationViolation]:
+    """Check a single bundle for validity.
+
+    Unless `use_cache` is False, the result is cached in the user cache. A
+    bundle whose metadata and remote documents are unchanged since its last
+    check is not checked again, and if only some of its content entries
+    changed, only those are validated again. Bundles with more than
+    `MAX_RECORDED_VIOLATIONS` violations, or whose check stopped early, are
+    not cached.
+
+    The metadata is read from the sidecar of the bundle when it is up to
+    date, instead of being parsed again.
+
+    Args:
+        path: The bundle folder.
+        offline: Only use cached remote documents, never the network.
+        use_cache: Use (and update) the cache of check results.
+        sidecar: Write a sidecar, if the bundle does not have one already.
+        remote_cache: The remote cache to use, instead of opening the user one.
+            Its own `offline` setting is used.
+        indexed: The current metadata of the bundle, if already parsed.
+        sink: Where to add the violations as they are found. A new sink that
+            keeps all of them is used if None.
+
+    Returns:
+        The violations kept by the sink.
+
+    Raises:
+        ViolationLimitReached if the sink fails fast.
+    """
+    if sink is None:
+        sink = ViolationSink()
+    _check_bundle(path, offline, use_cache, sidecar, remote_cache, indexed, sink)
+    return sink.violations
+
+
+def _check_bundle(
+    path: Path,
+    offline: bool,
+    use_cache: bool,
+    sidecar: bool,
+    remote_cache: Optional[RemoteCache],
+    indexed: Optional[IndexedMetadata],
+    sink: ViolationSink,
+) -> Optional[dict]:
+    """Check a single bundle, see `check_bundle`.
+
+    Returns:
+        The resolved metadata of the bundle, if it was resolved: not when the
+        bundle is unchanged since its last check, or cannot be resolved.
+    """
+    log.debug(f"Checking bundle {path}")
+    metadata_path = path / METADATA_NAME
+    if not metadata_path.exists():
+        sink.add(
+            critical_violation(ViolationType.METADATA_NOT_FOUND, location="/").violation
+        )
+        return None
+
+    # A sidecar gives the digest, and the parsed metadata, without parsing it
+    if indexed is None:
+        indexed = read_sidecar(path)
+    if indexed is None:
+        stat = metadata_path.stat()
+        content = metadata_path.read_bytes()
+        metadata_digest = hashlib.sha256(content).hexdigest()
+    else:
+        metadata_digest = indexed.digest
+    if remote_cache is None:
+        remote_cache = RemoteCache(offline=offline)
+    check_cache = CheckCache() if use_cache else None
+    record = check_cache.load(path) if check_cache is not None else None
+    if (
+        record is not None
+        and record.metadata_digest == metadata_digest
+        and _remotes_unchanged(record.remotes, remote_cache)
+    ):
+        log.debug(f"{path} is unchanged since its last check")
+        sink.extend(SpecificationViolation.from_dict(x) for x in record.violations)
+        return None
+
+    try:
+        if indexed is None:
+            indexed = index_metadata(content, digest=metadata_digest)
+            if sidecar or sidecar_path(path).exists():
+                write_sidecar(path, indexed, stat)
+        data = indexed.metadata
+        if not isinstance(data, dict):
+            raise critical_violation(ViolationType.INVALID_SPEC_FORMAT, location="/")
+
+        # Report every problem with ids at once, before resolving them.
+        violations = [
+            error_violation(ViolationType.ID_NOT_FOUND, location=pointer).violation
+            for pointer, identifier in indexed.references
+            if not isinstance(identifier, str) or identifier not in indexed.ids
+        ]
+        if violations:
+            sink.extend(violations)
+            return None
+
+        with RemoteFetcher(cache=remote_cache) as fetcher:
+            resolved, _ = resolve(data, fetcher=fetcher)
+            cached = {x: remote_cache.lookup(x) for x in fetcher.urls}
+        # Documents evicted right after they were fetched, e.g. as larger than
+        # the cache, cannot be told unchanged later: the result is not cached.
+        remotes: Optional[dict[str, str]] = {
+            url: entry.digest for url, entry in cached.items() if entry is not None
+        }
+        if len(remotes) < len(cached):
+            log.debug(f"Not caching the check of {path}, as its remotes are gone")
+            remotes = None
+
+        if not isinstance(resolved.get("specification"), dict):
+            raise critical_violation(
+                ViolationType.INVALID_SPEC_FORMAT, location="/specification"
+            )
+        specification_digest = canonical_digest(resolved["specification"])
+        specification = compile_specification(
+            resolved["specification"], digest=specification_digest
+        )
+    except json.JSONDecodeError as e:
+        log.error(f"Failed to decode {metadata_path}: {e}")
+        sink.add(
+            critical_violation(
+                ViolationType.INVALID_SPEC_FORMAT, location="/"
+            ).violation
+        )
+        return None
+    except DuplicatedIDError as e:
+        log.error(str(e))
+        sink.add(
+            error_violation(ViolationType.ID_COLLISION, location=e.location).violation
+        )
+        return None
+    except InvalidIDError as e:
+        log.error(str(e))
+        sink.add(
+            error_violation(ViolationType.INVALID_ID, location=e.location).violation
+        )
+        return None
+    except InvalidRemoteError as e:
+        log.error(str(e))
+        sink.add(
+            error_violation(ViolationType.INVALID_REMOTE, location=e.location).violation
+        )
+        return None
+    except MultipleViolationsError as e:
+        sink.extend(x.violation for x in e.violations)
+        return None
+    except InvalidSpecificationError as e:
+        sink.add(e.violation)
+        return None
+
+    known_entries = (
+        record.entries
+        if record is not None and record.specification_digest == specification_digest
+        else {}
+    )
+    # The violations go on to the sink, and are kept for the cache up to a point
+    recorder = ViolationSink(max_violations=MAX_RECORDED_VIOLATIONS, listener=sink.add)
+    entries = _validate_entries(specification, resolved, known_entries, recorder)
+
+    if (
+        check_cache is not None
+        and remotes is not None
+        and entries is not None
+        and not recorder.dropped
+    ):
+        check_cache.store(
+            path,
+            CheckRecord(
+                metadata_digest=metadata_digest,
+                remotes=remotes,
+                specification_digest=specification_digest,
+                violations=[x.to_dict() for x in recorder.violations],
+                entries=entries,
+            ),
+        )
+
+    return resolved
+
+
+def stream_check_bundle(
+    path: Path,
+    offline: bool = False,
+    sink: Optional[ViolationSink] = None,
+) -> list[SpecificationViolation]:
+    """Check a single bundle, reading its metadata one content entry at a time.
+
+    Memory is bounded by the largest entry, rather than by the metadata, but
+    the relative (>) and remote (@) keys of the entries are not resolved, so
+    their values are not checked, and the result is not cached. See
+    `validate_stream`.
+
+    Returns:
+        The violations kept by the sink.
+
+    Raises:
+        ViolationLimitReached if the sink fails fast.
+    """
+    log.debug(f"Checking bundle {path} as a stream")
+    if sink is None:
+        sink = ViolationSink()
+    found = validate_stream(path / METADATA_NAME, cache=RemoteCache(offline=offline))
+    sink.extend(x.violation for x in found)
+    return sink.violations
+
+
+def _check_to_sink(
+    bundle: Path,
+    max_violations: Optional[int] = None,
+    fail_fast: Optional[ViolationSeverity] = None,
+    listener: Optional[Callable[[SpecificationViolation], None]] = None,
+    stream: bool = False,
+    **options,
+) -> ViolationSink:
+    """Check a bundle into a sink of its own, see `check_bundle`"""
+    sink = ViolationSink(max_violations, fail_fast, listener)
+    try:
+        if stream:
+            stream_check_bundle(bundle, offline=options["offline"], sink=sink)
+        else:
+            check_bundle(bundle, sink=sink, **options)
+    except ViolationLimitReached as e:
+        log.debug(f"Stopped checking {bundle}: {e}")
+    # The sink goes back to the parent process, and its listener cannot
+    sink.listener = None
+    return sink
+
+
+_violation_queue: Optional["multiprocessing.Queue"] = None
+"""Where the workers of `iter_check_bundles` stream their violations"""
+
+
+def _init_worker(queue: Optional["multiprocessing.Queue"]) -> None:
+    global _violation_queue
+    _violation_queue = queue
+
+
+def _check_in_worker(bundle: Path, **options) -> ViolationSink:
+    queue = _violation_queue
+    listener = None if queue is None else (lambda x: queue.put((bundle, x)))
+    return _check_to_sink(bundle, listener=listener, **options)
+
+
+def _write_queued(queue: "multiprocessing.Queue", writer: ViolationWriter) -> None:
+    """Write the violations streamed by the workers, until a None comes"""
+    while True:
+        try:
+            item = queue.get_nowait()
+        except Empty:
+            writer.flush()
+            item = queue.get()
+        if item is None:
+            writer.flush()
+            return
+        writer.write(*item)
+
+
+def iter_check_bundles(
+    bundles: list[Path],
+    jobs: int,
+    offline: bool = False,
+    use_cache: bool = True,
+    sidecar: bool = False,
+    max_violations: Optional[int] = None,
+    fail_fast: Optional[ViolationSeverity] = None,
+    writer: Optional[ViolationWriter] = None,
+    stream: bool = False,
+) -> Iterator[tuple[Path, ViolationSink]]:
+    """Check bundles across a process pool, yielding results as they come.
+
+    Each bundle is checked into a sink of its own, which keeps at most
+    `max_violations` of them and stops at `fail_fast`, so that only that many
+    are sent back from the workers. Results are yielded in the same order as
+    the bundles.
+
+    If a writer is given, every violation is written to it as soon as it is
+    found, whether the sink keeps it or not. With `stream`, the bundles are
+    checked by `stream_check_bundle`.
+    """
+    options = dict(
+        offline=offline,
+        use_cache=use_cache,
+        sidecar=sidecar,
+        max_violations=max_violations,
+        fail_fast=fail_fast,
+        stream=stream,
+    )
+    if jobs == 1 or len(bundles) == 1:
+        for bundle in bundles:
+            listener = None if writer is None else partial(writer.write, bundle)
+            found = _check_to_sink(bundle, listener=listener, **options)
+            if writer is not None:
+                writer.flush()
+            yield (bundle, found)
+        return
+
+    # multiprocessing is slow to import, and only needed for many bundles
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    queue = multiprocessing.Queue() if writer is not None else None
+    pool = ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=(queue,)
+    )
+    if queue is not None:
+        write_thread = threading.Thread(target=_write_queued, args=(queue, writer))
+        write_thread.start()
+    try:
+        yield from zip(bundles, pool.map(partial(_check_in_worker, **options), bundles))
+    finally:
+        # If the caller stops early, the bundles not yet checked are dropped
+        pool.shutdown(cancel_futures=True)
+        if queue is not None:
+            # The workers are gone, and all they streamed is queued before this
+            queue.put(None)
+            write_thread.join()
+
+
+def _server_results(
+    results: Iterator[tuple[Path, list[SpecificationViolation]]],
+    bundles: list[Path],
+    fallback: Callable[[list[Path]], Iterator[tuple[Path, ViolationSink]]],
+    max_violations: Optional[int] = None,
+    fail_fast: Optional[ViolationSeverity] = None,
+    writer: Optional[ViolationWriter] = None,
+) -> Iterator[tuple[Path, ViolationSink]]:
+    """Put the violations of each bundle checked by a server in a sink.
+
+    If the server fails, or stops answering, the bundles it did not check yet
+    are checked with `fallback` instead.
+    """
+    from myr.server import ServerError
+
+    checked = set()
+    try:
+        while True:
+            try:
+                bundle, violations = next(results)
+            except StopIteration:
+                return
+            except (OSError, ServerError) as e:
+                log.error(f"The server failed to check bundles, checking locally: {e}")
+                yield from fallback([x for x in bundles if x not in checked])
+                return
+            checked.add(bundle)
+            listener = None if writer is None else partial(writer.write, bundle)
+            found = ViolationSink(max_violations, fail_fast, listener)
+            try:
+                found.extend(violations)
+            except ViolationLimitReached:
+                pass
+            if writer is not None:
+                writer.flush()
+            yield (bundle, found)
+    finally:
+        results.close()
 
 
-def myr_check_path(path: Path) -> None:
-    log.debug(f"Invoked `myr_check` with {path}")
-    raise NotImplementedError()
+def myr_check_path(
+    paths: list[Path],
+    jobs: Optional[int] = None,
+    offline: bool = False,
+    use_cache: bool = True,
+    sidecar: bool = False,
+    max_violations: Optional[int] = None,
+    fail_fast: Optional[ViolationSeverity] = None,
+    writer: Optional[ViolationWriter] = None,
+    server: Optional[Path] = None,
+    stream: bool = False,
+) -> None:
+    """Check the bundles in some paths, in parallel.
 
+    Args:
+        paths: The paths to check, see `find_bundles`.
+        jobs: How many bundles to check at the same time. Defaults to the
+            number of CPUs.
+        offline: Only use cached remote documents, never the network.
+        use_cache: Use (and update) the cache of check results.
+        sidecar: Write a sidecar in the bundles that do not have one.
+        max_violations: How many violations to report, at most. The others
+            are only counted.
+        fail_fast: Stop checking at the first violation at least this severe.
+        writer: Also write every violation there, as soon as it is found.
+        server: The socket of a `myr serve` server to check the bundles with,
+            if one is running there. `jobs` is then ignored.
+        stream: Check the bundles with `stream_check_bundle`, in bounded
+            memory but without resolving keys in the content. Always local.
 
-def myr_freeze(input_path: Path, output_path: Path) -> None:
+    Raises:
+        MultipleViolationsError with the violations of all the bundles,
+        if any are found. Their locations are prefixed by their bundle.
+    """
+    log.debug(f"Invoked `myr_check` with {paths}")
+    bundles = find_bundles(paths)
+    if server is not None and stream:
+        log.warning("Streamed checks are not done by the server, checking locally")
+        server = None
+    if server is not None:
+        from myr.server import ServerClient, is_server_running
+
+        if not is_server_running(server):
+            log.warning(f"No server is running on {server}, checking locally")
+            server = None
+
+    jobs = jobs if jobs is not None else os.cpu_count()
+    check_locally = partial(
+        iter_check_bundles,
+        jobs=jobs,
+        offline=offline,
+        use_cache=use_cache,
+        sidecar=sidecar,
+        max_violations=max_violations,
+        fail_fast=fail_fast,
+        writer=writer,
+        stream=stream,
+    )
+    if server is not None:
+        log.info(f"Checking {len(bundles)} bundles on the server at {server}")
+        results = _server_results(
+            ServerClient(server).check(
+                bundles, offline=offline, use_cache=use_cache, sidecar=sidecar
+            ),
+            bundles,
+            check_locally,
+            max_violations=max_violations,
+            fail_fast=fail_fast,
+            writer=writer,
+        )
+    else:
+        log.info(f"Checking {len(bundles)} bundles with {jobs} jobs")
+        results = check_locally(bundles)
+
+    sink = ViolationSink(max_violations=max_violations, fail_fast=fail_fast)
+    try:
+        for bundle, found in results:
+            if not found.total:
+                log.info(f"{bundle} is valid")
+                continue
+            log.info(f"{bundle} has {found.total} violations")
+            for violation in found.violations:
+                violation.location = f"{bundle}:{violation.location}"
+            sink.merge(found)
+    except ViolationLimitReached as e:
+        log.error(f"Stopping the check: {e}")
+    finally:
+        results.close()
+
+    if sink.total:
+        raise sink.error()
+
+
+def myr_freeze(
+    input_path: Path,
+    output_path: Path,
+    jobs: Optional[int] = None,
+    compression: str = "gzip",
+    offline: bool = False,
+    store: Optional[Path] = None,
+    version: Optional[str] = None,
+) -> None:
+    """Freeze a bundle to a compressed archive, with its metadata resolved.
+
+    If a `store` is given, the bundle is frozen as a new `version` in that
+    chunk store instead, and `output_path` is ignored.
+
+    Raises:
+        MultipleViolationsError if the bundle is not valid.
+        ImportError if freezing with zstd, without `zstandard` installed.
+        FileNotFoundError if a file in the bundle metadata does not exist.
+    """
     log.debug(
         f"Invoked `myr_freeze` with input - {input_path} - and output - {output_path}"
     )
-    raise NotImplementedError()
+    if compression == "zstd":
+        try:
+            import zstandard  # noqa: F401
+        except ImportError as e:
+            raise ImportError(
+                "Freezing with zstd needs `zstandard`: pip install zstandard"
+            ) from e
+
+    remote_cache = RemoteCache(offline=offline)
+    sink = ViolationSink()
+    metadata = _check_bundle(
+        input_path,
+        offline=offline,
+        use_cache=True,
+        sidecar=False,
+        remote_cache=remote_cache,
+        indexed=None,
+        sink=sink,
+    )
+    errors = [x for x in sink.violations if x.severity >= ViolationSeverity.ERROR]
+    if errors:
+        log.error(f"Refusing to freeze {input_path}, as it is not valid.")
+        raise MultipleViolationsError([InvalidSpecificationError(x) for x in errors])
+
+    if metadata is None:
+        # Unchanged since its last check, the bundle was not resolved again
+        metadata, _ = resolve(load_metadata(input_path).metadata, cache=remote_cache)
+
+    # The manifest of the last freeze spares hashing the unchanged files again
+    manifest_path = input_path / STATE_DIR / "manifest.json"
+    previous = load_manifest(manifest_path) if manifest_path.exists() else None
+    paths = referenced_files(metadata)
+    if store is not None:
+        # Every file goes in the store, so every file needs its digest
+        paths.extend(str(x) for x in bundle_files(input_path))
+        paths = list(dict.fromkeys(paths))
+    manifest = build_manifest(input_path, paths, jobs=jobs, previous=previous)
+    save_manifest(manifest, manifest_path)
+
+    if store is not None:
+        name = freeze_to_store(
+            input_path, ChunkStore(store), metadata, manifest, name=version, jobs=jobs
+        )
+        log.info(f"Frozen {input_path} to {store} as version {name}")
+        return
+
+    freeze_bundle(
+        input_path,
+        output_path,
+        metadata,
+        jobs=jobs,
+        compression=compression,
+        manifest=manifest,
+    )
+    log.info(f"Frozen {input_path} to {output_path}")
+
+
+def myr_extract(archive: Path, name: str, output: BinaryIO) -> None:
+    """Extract a single file from a frozen bundle to a stream.
+
+    Raises:
+        KeyError if there is no such file in the frozen bundle.
+    """
+    log.debug(f"Invoked `myr_extract` on {archive} for {name}")
+    extract_member(archive, name, output)
 
 
 def main() -> None:
@@ -61,9 +772,6 @@ def main() -> None:
     parser = argparse.ArgumentParser(
         prog="myr", description="Package your data in a FAIR way."
     )
-    # This line is ignored as I set the verbosity in __init__.py
-    # TODO: In theory I could import the same parser from __init__ and save
-    # this line of code, but it seems a bit obscure. Consider it?
     parser.add_argument(
         "-v", "--verbose", action="count", help="increase verbosity", default=0
     )
@@ -80,11 +788,80 @@ def main() -> None:
         action="store_true",
         help="force creation, ignoring existing files",
     )
+    create_cmd.add_argument(
+        "--pretty",
+        action="store_true",
+        help="write indented metadata, instead of compact metadata",
+    )
 
     # `myr check` - checks a myr bundle for validity
     check_cmd = subparsers.add_parser("check", help="check a myr bundle for validity.")
     check_cmd.add_argument(
-        "path", default=".", type=Path, help="where to check", nargs="?"
+        "paths",
+        default=[Path(".")],
+        type=Path,
+        help="bundles, or folders to search bundles in",
+        nargs="*",
+    )
+    check_cmd.add_argument(
+        "-j",
+        "--jobs",
+        default=None,
+        type=int,
+        help="how many bundles to check at once (default: number of CPUs)",
+    )
+    check_cmd.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use cached remote documents",
+    )
+    check_cmd.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="check every bundle again, even if unchanged since the last check",
+    )
+    check_cmd.add_argument(
+        "--sidecar",
+        action="store_true",
+        help="keep a pre-parsed copy of the metadata in each bundle, to load faster",
+    )
+    check_cmd.add_argument(
+        "--max-violations",
+        default=None,
+        type=int,
+        help="how many violations to list, at most (default: all)",
+    )
+    check_cmd.add_argument(
+        "--fail-fast",
+        default=None,
+        choices=[x.name.lower() for x in ViolationSeverity],
+        help="stop at the first violation at least this severe",
+    )
+    check_cmd.add_argument(
+        "--stream",
+        action="store_true",
+        help=(
+            "read the metadata one content entry at a time, for very large "
+            "bundles: relative (>) and remote (@) keys in the content are then "
+            "not resolved nor checked, and results are not cached"
+        ),
+    )
+    check_cmd.add_argument(
+        "--server",
+        action="store_true",
+        help="check on the `myr serve` server, if one is running",
+    )
+    check_cmd.add_argument(
+        "--socket", default=None, type=Path, help="socket of the server to use"
+    )
+    check_cmd.add_argument(
+        "--format",
+        default="text",
+        choices=REPORT_FORMATS,
+        help=(
+            "how to report violations: a summary at the end (text), or each one "
+            "on standard output as soon as it is found (jsonl, sarif)"
+        ),
     )
 
     # `myr freeze` - freezes a myr bundle
@@ -95,23 +872,148 @@ def main() -> None:
     freeze_cmd.add_argument(
         "--output", default=None, type=Path, help="output frozen bundle filename"
     )
+    freeze_cmd.add_argument(
+        "-j",
+        "--jobs",
+        default=None,
+        type=int,
+        help="how many threads to compress with (default: number of CPUs)",
+    )
+    freeze_cmd.add_argument(
+        "--compression",
+        default="gzip",
+        choices=list(COMPRESSIONS),
+        help="how to compress the frozen bundle (zstd needs `zstandard`)",
+    )
+    freeze_cmd.add_argument(
+        "--store",
+        default=None,
+        type=Path,
+        help="freeze to this deduplicated chunk store, instead of an archive",
+    )
+    freeze_cmd.add_argument(
+        "--version",
+        default=None,
+        help="name of the version in the chunk store (default: current time)",
+    )
+    freeze_cmd.add_argument(
+        "--offline",
+        action="store_true",
+        help="only use cached remote documents",
+    )
+
+    # `myr serve` - keeps specifications and metadata warm for repeated checks
+    serve_cmd = subparsers.add_parser(
+        "serve", help="check bundles for `myr check --server`, over a local socket."
+    )
+    serve_cmd.add_argument(
+        "--socket",
+        default=None,
+        type=Path,
+        help="socket to listen on (default: in $XDG_RUNTIME_DIR or the user cache)",
+    )
+
+    # `myr extract` - extracts a single file from a frozen myr bundle
+    extract_cmd = subparsers.add_parser(
+        "extract", help="extract a file from a frozen myr bundle."
+    )
+    extract_cmd.add_argument("archive", type=Path, help="frozen bundle to read")
+    extract_cmd.add_argument(
+        "name", default=None, help="path of the file in the bundle", nargs="?"
+    )
+    extract_cmd.add_argument(
+        "--metadata", action="store_true", help="extract the bundle metadata"
+    )
+    extract_cmd.add_argument(
+        "-o",
+        "--output",
+        default=None,
+        type=Path,
+        help="file to extract to (default: standard output)",
+    )
 
     args = parser.parse_args()
+    setup_logging(args.verbose)
     log.debug(f"Parsed args: {args}")
 
     match args.command:
         case "create":
-            myr_create(args.path.expanduser().resolve(), args.force)
+            myr_create(args.path.expanduser().resolve(), args.force, args.pretty)
         case "check":
-            myr_check_path(args.path.expanduser().resolve())
+            fail_fast = (
+                ViolationSeverity[args.fail_fast.upper()]
+                if args.fail_fast is not None
+                else None
+            )
+            server = None
+            if args.server:
+                from myr.server import default_socket_path
+
+                server = (
+                    args.socket if args.socket is not None else default_socket_path()
+                )
+            check = partial(
+                myr_check_path,
+                [x.expanduser().resolve() for x in args.paths],
+                jobs=args.jobs,
+                offline=args.offline,
+                use_cache=not args.no_cache,
+                sidecar=args.sidecar,
+                fail_fast=fail_fast,
+                server=server,
+                stream=args.stream,
+            )
+            if args.format == "text":
+                check(max_violations=args.max_violations)
+                return
+
+            # Violations are streamed, so none are kept for a final summary
+            try:
+                with WRITERS[args.format](sys.stdout.buffer) as writer:
+                    check(max_violations=0, writer=writer)
+            except MultipleViolationsError as e:
+                exit(SEVERITY_EXIT_CODES[e.max_severity])
+        case "serve":
+            from myr.server import serve
+
+            serve(args.socket)
         case "freeze":
             input_path = args.input_path.expanduser().resolve()
             outfile = (
-                input_path.parent / f"{input_path.stem}.tar.gz"
+                input_path.parent / f"{input_path.stem}{COMPRESSIONS[args.compression]}"
                 if args.output is None
                 else args.output
             )
-            myr_freeze(input_path, outfile)
+            try:
+                myr_freeze(
+                    input_path,
+                    outfile,
+                    jobs=args.jobs,
+                    compression=args.compression,
+                    offline=args.offline,
+                    store=args.store,
+                    version=args.version,
+                )
+            except ImportError as e:
+                log.error(str(e))
+                exit(1)
+            except FileNotFoundError as e:
+                log.error(f"A file in the bundle metadata does not exist: {e.filename}")
+                exit(1)
+        case "extract":
+            name = METADATA_NAME if args.metadata else args.name
+            if name is None:
+                extract_cmd.error("give the name of a file, or --metadata")
+            archive = args.archive.expanduser().resolve()
+            try:
+                if args.output is None:
+                    myr_extract(archive, name, sys.stdout.buffer)
+                else:
+                    with args.output.open("wb") as stream:
+                        myr_extract(archive, name, stream)
+            except KeyError:
+                log.error(f"There is no '{name}' in {archive}")
+                exit(1)
         case _:
             parser.print_help()
 
@@ -121,4 +1023,4 @@ def myr_entrypoint():
         main()
     except MultipleViolationsError as e:
         print(e.message)
-        exit(1)
+        exit(SEVERITY_EXIT_CODES[e.max_severity])
@@ -0,0 +1,132 @@
+import logging
+from pathlib import Path
+from typing import BinaryIO
+
+from myr import jsonio
+from myr.checker import SpecificationViolation, ViolationSeverity, ViolationType
+from myr.manifest import METADATA_NAME
+
+log = logging.getLogger(__name__)
+
+REPORT_FORMATS: tuple[str, ...] = ("text", "jsonl", "sarif")
+"""The formats `myr check` can report violations in"""
+
+SARIF_SCHEMA: str = "https://json.schemastore.org/sarif-2.1.0.json"
+
+SARIF_LEVELS: dict[ViolationSeverity, str] = {
+    ViolationSeverity.CRITICAL: "error",
+    ViolationSeverity.ERROR: "error",
+    ViolationSeverity.WARNING: "warning",
+    ViolationSeverity.NOTE: "note",
+}
+
+
+class ViolationWriter:
+    """Writes violations to a binary stream, as soon as they are found.
+
+    Nothing is kept in memory: every violation is written right away, and the
+    stream is flushed whenever no more violations are waiting.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        self.stream: BinaryIO = stream
+
+    def write(self, bundle: Path, violation: SpecificationViolation) -> None:
+        """Write a violation found in a bundle.
+
+        Args:
+            bundle: The bundle folder.
+            violation: The violation, with its location in the bundle metadata.
+        """
+        raise NotImplementedError()
+
+    def flush(self) -> None:
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Write what the format needs after the last violation"""
+        self.flush()
+
+    def __enter__(self) -> "ViolationWriter":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class JsonLinesWriter(ViolationWriter):
+    """Writes each violation as a JSON object, on a line of its own"""
+
+    def write(self, bundle: Path, violation: SpecificationViolation) -> None:
+        record = {"bundle": str(bundle), **violation.to_dict()}
+        self.stream.write(jsonio.dumps(record) + b"\n")
+
+
+class SarifWriter(ViolationWriter):
+    """Writes violations as the results of a single SARIF 2.1.0 run.
+
+    The log is written as it goes: the header, with every violation type as
+    a rule, first, then each result, and the closing brackets on `close`.
+    """
+
+    def __init__(self, stream: BinaryIO) -> None:
+        super().__init__(stream)
+        rules = [
+            {"id": x.name, "shortDescription": {"text": x.value}} for x in ViolationType
+        ]
+        tool = {"driver": {"name": "myr", "rules": rules}}
+        # The results are left open, to be written one at a time
+        self.stream.write(
+            b'{"$schema":'
+            + jsonio.dumps(SARIF_SCHEMA)
+            + b',"version":"2.1.0","runs":[{"tool":'
+            + jsonio.dumps(tool)
+            + b',"results":['
+        )
+        self._rule_index: dict[ViolationType, int] = {
+            x: i for i, x in enumerate(ViolationType)
+        }
+        self._first: bool = True
+
+    def write(self, bundle: Path, violation: SpecificationViolation) -> None:
+        result = {
+            "level": SARIF_LEVELS[violation.severity],
+            "message": {
+                "text": (
+                    violation.violation_type.value
+                    if violation.violation_type is not None
+                    else violation.severity.value
+                )
+            },
+            "locations": [
+                {
+                    "physicalLocation": {
+                        "artifactLocation": {
+                            "uri": (bundle / METADATA_NAME).absolute().as_uri()
+                        }
+                    },
+                    "logicalLocations": [
+                        {"fullyQualifiedName": violation.location, "kind": "object"}
+                    ],
+                }
+            ],
+            "properties": {"severity": violation.severity.name},
+        }
+        if violation.violation_type is not None:
+            result["ruleId"] = violation.violation_type.name
+            result["ruleIndex"] = self._rule_index[violation.violation_type]
+        if violation.context is not None:
+            result["properties"]["context"] = violation.context
+        self.stream.write((b"" if self._first else b",") + jsonio.dumps(result))
+        self._first = False
+
+    def close(self) -> None:
+        self.stream.write(b"]}]}\n")
+        super().close()
+
+
+WRITERS: dict[str, type[ViolationWriter]] = {
+    "jsonl": JsonLinesWriter,
+    "sarif": SarifWriter,
+}
+"""The writers of the machine-readable formats in `REPORT_FORMATS`"""
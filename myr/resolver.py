@@ -1,132 +1,663 @@
 import logging
-import requests
-import sys
+import threading
 import json
-from copy import copy
-from functools import reduce
-from myr.checker import check_parsing_validity
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections.abc import Iterator, Mapping
+from typing import TYPE_CHECKING, Optional
+from myr import jsonio
+from myr.cache import RemoteCache
+from myr.checker import (
+    ViolationType,
+    check_parsing_validity,
+    critical_violation,
+    error_violation,
+)
+from myr.traversal import (
+    Rewrite,
+    Visitor,
+    json_pointer,
+    pointer_in_list,
+    resolve_pointer,
+    transform,
+    walk,
+)
+
+if TYPE_CHECKING:
+    import requests
 
 log = logging.getLogger(__name__)
 
 
+SPECIFICATION_SECTIONS: tuple[str, ...] = ("types", "keys")
+"""The lists that are fused when specifications are merged"""
+
+
+def merge_specifications(specifications: list[dict]) -> dict:
+    """Merge specifications into one, in order, without modifying them.
+
+    Each specification is checked for parsing validity once. The merged lists
+    are new, but the types and keys in them are the very objects of the
+    specifications, not copies. A qualifier defined again by a later
+    specification is dropped if the definition is the same, so that layered
+    specifications can share a common base.
+
+    Raises:
+        InvalidSpecificationError if a specification cannot be parsed, or if
+        two specifications define the same qualifier differently.
+    """
+    for specification in specifications:
+        check_parsing_validity(specification)
+
+    merged: dict[str, list] = {}
+    for section in SPECIFICATION_SECTIONS:
+        entries: list = []
+        # Qualifier -> its definition, and the specification it came from
+        index: dict[str, tuple[dict, int]] = {}
+        for source, specification in enumerate(specifications):
+            for entry in specification[section]:
+                qualifier = entry.get("qualifier") if isinstance(entry, dict) else None
+                if not isinstance(qualifier, str):
+                    # Left for the specification parser to report
+                    entries.append(entry)
+                    continue
+                if qualifier not in index:
+                    index[qualifier] = (entry, source)
+                elif index[qualifier][1] != source:
+                    if index[qualifier][0] == entry:
+                        continue
+                    log.error(
+                        f"Specification {source} redefines the {section[:-1]} "
+                        f"'{qualifier}' differently"
+                    )
+                    raise error_violation(
+                        ViolationType.DUPLICATED_QUALIFIER,
+                        location=f"/{section}/{qualifier}/",
+                    )
+                entries.append(entry)
+        merged[section] = entries
+
+    return merged
+
+
 def fuse_specifications(left, right) -> dict:
-    # Test if the two specifications are at least usable
-    check_parsing_validity(left)
-    check_parsing_validity(right)
+    """Merge two specifications, see `merge_specifications`"""
+    return merge_specifications([left, right])
 
-    new_specification = {}
-    new_specification["types"] = left["types"]
-    new_specification["types"].extend(right["types"])
-    new_specification["keys"] = left["keys"]
-    new_specification["keys"].extend(right["keys"])
 
-    return new_specification
+def retrieve_json(
+    url,
+    cache: Optional[RemoteCache] = None,
+    session: Optional["requests.Session"] = None,
+) -> dict:
+    """Retrieve and decode a remote JSON document.
 
-def retrieve_json(url) -> dict:
-    try:
-        response = requests.get(url=url)
-    except requests.exceptions.RequestException as e:
-        log.exception(f"Failed to retrieve data from {url}: {e}")
-        sys.exit(1)
+    If a `cache` is given, fresh cached content is used directly, stale
+    content is revalidated with the server, and new content is stored.
+    If a `session` is given, its pooled connections are reused.
+
+    Raises:
+        InvalidSpecificationError if the document could not be retrieved or
+        was not valid JSON.
+    """
+    entry = cache.lookup(url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        log.debug(f"Serving {url} from the remote cache")
+        content = cache.read(entry)
+    elif cache is not None and cache.offline:
+        log.error(f"Cannot retrieve {url}: it is not cached and we are offline.")
+        raise critical_violation(ViolationType.INVALID_REMOTE, location=url)
+    else:
+        # Only imported when the network is needed, as it is slow to import
+        import requests
+
+        headers = entry.validators() if entry is not None else {}
+        get = session.get if session is not None else requests.get
+        try:
+            response = get(url=url, headers=headers)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            log.error(f"Failed to retrieve data from {url}: {e}")
+            raise critical_violation(ViolationType.INVALID_REMOTE, location=url)
+
+        if entry is not None and response.status_code == 304:
+            log.debug(f"Cached content of {url} is still valid")
+            cache.refresh(entry)
+            content = cache.read(entry)
+        else:
+            content = response.content
+            if cache is not None:
+                cache.store(
+                    url,
+                    content,
+                    etag=response.headers.get("ETag"),
+                    last_modified=response.headers.get("Last-Modified"),
+                )
 
     try:
-        decoded_data = json.loads(response.content)
+        decoded_data = jsonio.loads(content)
     except json.JSONDecodeError as e:
-        log.exception(f"Content of the pointed URL was not valid JSON: {e}")
+        log.error(f"Content of the pointed URL was not valid JSON: {e}")
+        raise critical_violation(ViolationType.REMOTE_NOT_JSON, location=url)
 
     return decoded_data
 
 
-def resolve_remote(structure: dict) -> dict:
-    """Resolve remote (@) keys to local keys"""
+DEFAULT_MAX_WORKERS: int = 8
+"""Default number of remote documents fetched at the same time"""
+
+
+class RemoteFetcher:
+    """Retrieves remote documents concurrently over a pooled HTTP session.
+
+    Connections are kept alive and reused across requests. Requests for an URL
+    that is already being (or has already been) retrieved by this fetcher
+    share the same request and the same decoded result.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        cache: Optional[RemoteCache] = None,
+    ) -> None:
+        self.cache: Optional[RemoteCache] = cache
+        self.max_workers: int = max_workers
+        self._session: Optional["requests.Session"] = None
+        self._adapter: Optional["requests.adapters.HTTPAdapter"] = None
+
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._requests: dict[str, Future] = {}
+
+        self.requests_made: int = 0
+        """How many distinct URLs were requested"""
+        self.requests_saved: int = 0
+        """How many requests were avoided by sharing an earlier request"""
+        self._connections_closed: int = 0
+
+    @property
+    def urls(self) -> list[str]:
+        """The URLs requested so far"""
+        with self._lock:
+            return list(self._requests)
+
+    @property
+    def session(self) -> "requests.Session":
+        """The HTTP session, only made when a document is first requested"""
+        if self._session is None:
+            import requests
+
+            self._session = requests.Session()
+            self._adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.max_workers, pool_maxsize=self.max_workers
+            )
+            self._session.mount("http://", self._adapter)
+            self._session.mount("https://", self._adapter)
+        return self._session
+
+    @property
+    def connections_opened(self) -> int:
+        """How many HTTP connections were opened by the session"""
+        if self._adapter is None:
+            return self._connections_closed
+        pools = self._adapter.poolmanager.pools
+        return self._connections_closed + sum(
+            pool.num_connections
+            for pool in (pools.get(key) for key in pools.keys())
+            if pool is not None
+        )
+
+    def fetch(self, url: str) -> Future:
+        """Start retrieving a document, returning a future with its content"""
+        with self._lock:
+            if url in self._requests:
+                self.requests_saved += 1
+                return self._requests[url]
+            self.requests_made += 1
+            future = self._pool.submit(
+                retrieve_json, url, cache=self.cache, session=self.session
+            )
+            self._requests[url] = future
+            return future
+
+    def close(self) -> None:
+        self._pool.shutdown()
+        # Closing the session drops its pools, and their counters with them.
+        self._connections_closed = self.connections_opened
+        if self._session is not None:
+            self._session.close()
+
+    def __enter__(self) -> "RemoteFetcher":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class InvalidRemoteError(ValueError):
+    """Raised when a remote key is not an URL, or loops back to itself"""
+
+    def __init__(self, message: str, location: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.location: Optional[str] = location
+        """The JSON pointer to the remote key. In a remote document, it is
+        given as a fragment of the URL of the document."""
+
+
+class RemoteCollector(Visitor):
+    """Collects the URLs pointed to by remote (@) keys.
+
+    Like `resolve_remote`, only objects that are not inside lists are
+    inspected, and the documents pointed to are not (they are not fetched yet).
+
+    Raises:
+        InvalidRemoteError if a remote key is not an URL, or a list of URLs
+        for the specification.
+    """
+
+    def __init__(self) -> None:
+        self.urls: list[str] = []
+        """The URLs found, once for each time they were referenced"""
+        self.references: list[tuple[str, str]] = []
+        """The JSON pointer to each remote key, and each URL it points to"""
+
+    def visit(self, node: dict, pointer: str, in_list: bool) -> None:
+        if in_list:
+            return
+        for key, value in node.items():
+            if not key.startswith("@"):
+                continue
+            new_key = key.strip("@")
+            if new_key == "specification" and isinstance(value, list):
+                urls = value
+            else:
+                urls = [value]
+            if not all(isinstance(x, str) for x in urls):
+                raise InvalidRemoteError(
+                    f"Invalid value for remote key '@{new_key}': {value}",
+                    location=json_pointer(pointer, key),
+                )
+            self.urls.extend(urls)
+            self.references.extend((json_pointer(pointer, key), x) for x in urls)
+
+
+def collect_remote_urls(structure: dict) -> list[str]:
+    """Collect the URLs pointed to by all the remote (@) keys in a structure.
+
+    Returns:
+        A list of URLs, once for each time they were referenced.
+    """
+    collector = RemoteCollector()
+    walk(structure, [collector])
+    return collector.urls
+
+
+def fetch_remote_documents(
+    structure: dict, fetcher: RemoteFetcher, urls: Optional[list[str]] = None
+) -> dict[str, dict]:
+    """Fetch every document reachable through remote (@) keys.
+
+    The documents are fetched one depth at a time: all URLs found at a given
+    depth are retrieved in parallel by the fetcher, and the retrieved
+    documents are then scanned for the URLs of the next depth.
+
+    Args:
+        structure: The structure to fetch the documents of.
+        fetcher: The fetcher to retrieve the documents with.
+        urls: The URLs referenced by the structure, if already collected.
+
+    Returns:
+        A dict mapping each URL to its (unresolved) decoded document.
+
+    Raises:
+        InvalidRemoteError if a remote key in a document is not an URL.
+    """
+    documents: dict[str, dict] = {}
+    pending = urls if urls is not None else collect_remote_urls(structure)
+    while pending:
+        log.debug(f"Fetching {len(pending)} remote documents")
+        futures = [(url, fetcher.fetch(url)) for url in pending]
+        retrieved = {url: future.result() for url, future in futures}
+        documents.update(retrieved)
+
+        pending = []
+        for url, document in retrieved.items():
+            try:
+                pending.extend(collect_remote_urls(document))
+            except InvalidRemoteError as e:
+                raise InvalidRemoteError(str(e), location=f"{url}#{e.location}")
+        pending = [x for x in pending if x not in documents]
+
+    return documents
+
+
+def check_remote_loops(
+    references: list[tuple[str, str]], documents: dict[str, dict]
+) -> None:
+    """Check that no remote key leads to documents pointing to each other.
+
+    Args:
+        references: The JSON pointer to each remote key, and its URL.
+        documents: Every document reachable from the keys, by URL.
+
+    Raises:
+        InvalidRemoteError at the first remote key that leads to a loop.
+    """
+    looping: dict[str, bool] = {}
+
+    def loops(url: str, path: set[str]) -> bool:
+        # A document loops if it is on the current path, or leads to a loop
+        if url in path:
+            return True
+        if url not in looping:
+            path.add(url)
+            looping[url] = any(
+                loops(x, path) for x in collect_remote_urls(documents[url])
+            )
+            path.discard(url)
+        return looping[url]
+
+    for pointer, url in references:
+        if loops(url, set()):
+            raise InvalidRemoteError(
+                f"Remote key at '{pointer}' leads to documents that loop back "
+                f"to each other, from {url}",
+                location=pointer,
+            )
 
-    new_data: dict = {}
-    for key, value in structure.item():
-        if not key.startswith("@"):
-            if isinstance(value, dict):
-                value = resolve_remote(value)
-            new_data[key] = value
-            continue
+
+def _remote_rewrite(documents: dict[str, dict], seen: tuple[str, ...]) -> Rewrite:
+    def rewrite(key: str, value, in_list: bool):
+        if in_list or not key.startswith("@"):
+            return (key, value, True)
 
         new_key = key.strip("@")
+        urls = value if isinstance(value, list) else [value]
+        for url in urls:
+            if url in seen:
+                raise ValueError(f"Remote key '@{new_key}' loops back to {url}")
+        resolved = [
+            substitute_remote(documents[x], documents, (*seen, x)) for x in urls
+        ]
+
+        if isinstance(value, list):
+            return (new_key, merge_specifications(resolved), False)
+        return (new_key, resolved[0], False)
+
+    return rewrite
 
-        if new_key == "specification":
-            # Edge case: specifications could be lists of URLs
-            if isinstance(value, list):
-                retrieved_data = [retrieve_json(x) for x in value]
-                decoded_data = reduce(fuse_specifications, retrieved_data)
 
-        if not isinstance(value, str):
-            raise ValueError(f"Invalid value for remote key '@{new_key}': {value}")
+def substitute_remote(
+    structure: dict, documents: dict[str, dict], _seen: tuple[str, ...] = ()
+) -> dict:
+    """Replace remote (@) keys with the already-retrieved documents they point to.
 
-        decoded_data = retrieve_json(value)
-        # Ok, we successfully got our new data, now let's resolve it too
-        decoded_data = resolve_remote(decoded_data)
+    Raises:
+        ValueError if the remote documents point to each other in a loop.
+    """
+    return transform(structure, _remote_rewrite(documents, _seen))
 
-        new_data[new_key] = decoded_data
 
-    return new_data
+def resolve_remote(
+    structure: dict,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache: Optional[RemoteCache] = None,
+    fetcher: Optional[RemoteFetcher] = None,
+) -> dict:
+    """Resolve remote (@) keys to local keys
+
+    Remote documents are fetched concurrently, one depth at a time, and the
+    result is the same as resolving each key in turn. Every URL is retrieved
+    only once, and all references to it share the same decoded document.
+
+    Args:
+        structure: The structure to resolve.
+        max_workers: The maximum number of documents to fetch at the same time.
+        cache: An optional on-disk cache to retrieve the documents through.
+        fetcher: A fetcher to use instead of a new one for this resolution.
+            `max_workers` and `cache` are ignored if this is given.
+    """
+    if fetcher is not None:
+        documents = fetch_remote_documents(structure, fetcher)
+        return substitute_remote(structure, documents)
+
+    with RemoteFetcher(max_workers=max_workers, cache=cache) as fetcher:
+        documents = fetch_remote_documents(structure, fetcher)
+        log.debug(
+            f"Made {fetcher.requests_made} requests over "
+            f"{fetcher.connections_opened} connections, "
+            f"saving {fetcher.requests_saved} requests"
+        )
+    return substitute_remote(structure, documents)
 
 
 class DuplicatedIDError(ValueError):
     """Raised when duplicated IDs are found in the data"""
-    pass
+
+    def __init__(self, message: str, location: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.location: Optional[str] = location
+        """The JSON pointer to the second object with the id"""
+
+
+class InvalidIDError(ValueError):
+    """Raised when an id is not a string"""
+
+    def __init__(self, message: str, location: Optional[str] = None) -> None:
+        super().__init__(message)
+        self.location: Optional[str] = location
+        """The JSON pointer to the id"""
+
+
+def _purge_rewrite(key: str, value, in_list: bool):
+    return None if key == "id" else (key, value, True)
 
 
 def purge_id_keys(structure: dict) -> dict:
-    new_dict = {}
-    for key, value in structure.items():
-        if key == "id":
-            continue
-        if isinstance(value, dict):
-            value = purge_id_keys(value)
-        if isinstance(value, list):
-            value = [purge_id_keys(x) for x in value]
-        new_dict[key] = value
-    return new_dict
-
-
-def find_ids(structure: dict, ids: dict = {}):
-    ids = copy(ids)
-    log.debug(f"Finding ids in {structure} with starting ids {ids}")
-    for key, value in structure.items():
-        if isinstance(value, dict):
-            ids.update(find_ids(value, ids))
-            continue
-        if isinstance(value, list):
-            for item in value:
-                ids.update(find_ids(item, ids))
-            continue
-        if key != "id":
-            continue
-        if structure["id"] in ids:
+    return transform(structure, _purge_rewrite)
+
+
+class IdIndex(Mapping, Visitor):
+    """An index of the identified (`id`-carrying) objects in a structure.
+
+    The index is filled by visiting the structure, either on its own or
+    alongside other passes in a shared `walk`. It maps each id to its object
+    with every `id` key removed, but the purged copy of an object is only made
+    (and then kept) the first time the id is looked up. The purged copy still
+    has its remote (@) keys: see `ReferencedObjects` for the objects with
+    those resolved.
+
+    Raises:
+        DuplicatedIDError if the same id is found twice.
+        InvalidIDError if an id is not a string.
+    """
+
+    def __init__(self, structure: Optional[dict] = None) -> None:
+        self.objects: dict[str, dict] = {}
+        """The identified objects, as they are in the structure"""
+        self.locations: dict[str, str] = {}
+        """The JSON pointer to each identified object"""
+        self.listed: set[str] = set()
+        """The ids of the objects nested inside a list, whose remote keys are
+        left as they are"""
+        self._purged: dict[str, dict] = {}
+
+        if structure is not None:
+            walk(structure, [self])
+
+    @classmethod
+    def from_locations(cls, structure: dict, locations: dict[str, str]) -> "IdIndex":
+        """Rebuild the index of a structure from its `locations`, without a walk"""
+        index = cls()
+        for identifier, pointer in locations.items():
+            index.objects[identifier] = resolve_pointer(structure, pointer)
+            index.locations[identifier] = pointer
+            if pointer_in_list(structure, pointer):
+                index.listed.add(identifier)
+        return index
+
+    def visit(self, node: dict, pointer: str, in_list: bool) -> None:
+        if "id" in node:
+            self._add(node, pointer, in_list)
+
+    def _add(self, node: dict, pointer: str, in_list: bool = False) -> None:
+        identifier = node["id"]
+        if not isinstance(identifier, str):
+            raise InvalidIDError(
+                f"Id {identifier!r} at '{pointer}' is not a string.",
+                location=json_pointer(pointer, "id"),
+            )
+        if identifier in self.objects:
             raise DuplicatedIDError(
-                f"Id {structure['id']} was found twice in the data."
+                f"Id {identifier} was found twice in the data: "
+                f"at '{self.locations[identifier]}' and at '{pointer}'.",
+                location=pointer,
             )
+        self.objects[identifier] = node
+        self.locations[identifier] = pointer
+        if in_list:
+            self.listed.add(identifier)
 
-        ids[structure["id"]] = purge_id_keys(structure)
+    def __getitem__(self, identifier: str) -> dict:
+        if identifier not in self._purged:
+            self._purged[identifier] = purge_id_keys(self.objects[identifier])
+        return self._purged[identifier]
 
-    return ids
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.objects)
 
+    def __len__(self) -> int:
+        return len(self.objects)
 
-def resolve_relative(structure: dict, ids: dict) -> dict:
-    # Enumerate the IDs
-    resolved = {}
-    for key, value in structure.items():
-        if isinstance(value, dict):
-            resolved[key] = resolve_relative(value, ids)
-            continue
-        if isinstance(value, list):
-            resolved[key] = [resolve_relative(x, ids) for x in value]
-            continue
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.objects
+
+
+class ReferencedObjects(Mapping):
+    """What relative (>) keys resolve to: identified objects, resolved.
+
+    Each object is purged of its `id` keys, and has its remote (@) keys
+    resolved as they are in place in the structure (that is, unless it is
+    nested inside a list), so that a relative key gives the same object
+    whether the remote keys of the structure are resolved before or after.
+    Each object is only resolved once, the first time it is looked up.
+    """
+
+    def __init__(self, ids: IdIndex, documents: dict[str, dict]) -> None:
+        self.ids: IdIndex = ids
+        self.documents: dict[str, dict] = documents
+        self._resolved: dict[str, dict] = {}
+
+    def __getitem__(self, identifier: str) -> dict:
+        if identifier not in self._resolved:
+            purged = self.ids[identifier]
+            if identifier not in self.ids.listed:
+                purged = substitute_remote(purged, self.documents)
+            self._resolved[identifier] = purged
+        return self._resolved[identifier]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.ids)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, identifier) -> bool:
+        return identifier in self.ids
+
+
+class RelativeCollector(Visitor):
+    """Collects the ids pointed to by relative (>) keys."""
+
+    def __init__(self) -> None:
+        self.references: list[tuple[str, str]] = []
+        """The JSON pointer to each relative key, and the id it points to"""
+
+    def visit(self, node: dict, pointer: str, in_list: bool) -> None:
+        for key, value in node.items():
+            if key.startswith(">"):
+                self.references.append((json_pointer(pointer, key), value))
+
+
+def find_ids(structure: dict) -> IdIndex:
+    """Find all the identified objects in a structure.
+
+    Returns:
+        An `IdIndex` mapping each id to its object, without `id` keys.
+    """
+    log.debug("Finding ids in structure")
+    return IdIndex(structure)
+
+
+def _relative_rewrite(ids: Mapping) -> Rewrite:
+    def rewrite(key: str, value, in_list: bool):
         if not key.startswith(">"):
-            resolved[key] = value
-            continue
+            return (key, value, True)
 
         new_key = key.strip(">")
         try:
-            resolved[new_key] = ids[value]
+            return (new_key, ids[value], False)
         except KeyError:
             log.exception(f"Key {new_key} maps to id {value} but no such ID was found.")
             raise KeyError
-    return resolved
+
+    return rewrite
+
+
+def resolve_relative(structure: dict, ids: Mapping) -> dict:
+    return transform(structure, _relative_rewrite(ids))
+
+
+def resolve(
+    structure: dict,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    cache: Optional[RemoteCache] = None,
+    fetcher: Optional[RemoteFetcher] = None,
+) -> tuple[dict, IdIndex]:
+    """Resolve both remote (@) and relative (>) keys of a structure.
+
+    The structure is only traversed twice: once to index its ids and collect
+    its remote URLs, and once to rebuild it with both kinds of keys resolved.
+    Relative keys can only point to ids in the structure itself, not to ids
+    in the remote documents.
+
+    This differs from `resolve_remote` followed by `resolve_relative` in one
+    way: the relative keys and `id` keys of remote documents are left as they
+    are, while the sequential pipeline resolves relative keys everywhere.
+    With a remote document `{"name": "a", ">boss": "me"}`, `resolve` keeps
+    the `>boss` key, and the sequential pipeline replaces it by the object
+    with the `me` id. Both give the same result for structures whose remote
+    documents have no relative keys.
+
+    Args:
+        See `resolve_remote`.
+
+    Returns:
+        A tuple with the resolved structure and the index of its ids.
+
+    Raises:
+        DuplicatedIDError if the same id is found twice.
+        InvalidIDError if an id is not a string.
+        InvalidRemoteError if a remote key is not an URL, or if remote
+        documents point to each other in a loop.
+        KeyError if a relative key points to an id that does not exist.
+    """
+    ids = IdIndex()
+    remotes = RemoteCollector()
+    walk(structure, [ids, remotes])
+
+    if fetcher is not None:
+        documents = fetch_remote_documents(structure, fetcher, remotes.urls)
+    else:
+        with RemoteFetcher(max_workers=max_workers, cache=cache) as fetcher:
+            documents = fetch_remote_documents(structure, fetcher, remotes.urls)
+    check_remote_loops(remotes.references, documents)
+
+    remote_rewrite = _remote_rewrite(documents, ())
+    relative_rewrite = _relative_rewrite(ReferencedObjects(ids, documents))
+
+    def rewrite(key: str, value, in_list: bool):
+        if key.startswith(">"):
+            return relative_rewrite(key, value, in_list)
+        return remote_rewrite(key, value, in_list)
+
+    return (transform(structure, rewrite), ids)
@@ -0,0 +1,298 @@
+import logging
+import os
+import socket
+import socketserver
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterator, Optional
+
+from myr import jsonio
+from myr.cache import RemoteCache, user_cache_dir
+from myr.checker import SpecificationViolation
+from myr.manifest import METADATA_NAME
+from myr.resolver import DuplicatedIDError, resolve
+from myr.sidecar import IndexedMetadata, index_metadata, read_sidecar
+
+log = logging.getLogger(__name__)
+
+SOCKET_NAME: str = "myr.sock"
+
+MAX_CACHED_BUNDLES: int = 256
+"""How many parsed bundle metadata the server keeps in memory, at most"""
+
+
+def default_socket_path() -> Path:
+    """The socket of the server: in the user runtime folder, if there is one"""
+    runtime = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime:
+        return Path(runtime) / SOCKET_NAME
+    return user_cache_dir() / SOCKET_NAME
+
+
+class ServerError(Exception):
+    """Raised by the client when the server could not handle a request"""
+
+    pass
+
+
+class ServerState:
+    """What the server keeps warm in memory, between requests.
+
+    Compiled specifications are kept by the process-wide registry of
+    `myr.checker`.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.remote_caches: dict[bool, RemoteCache] = {}
+        """The remote cache, with its index loaded, offline or not"""
+        self.metadata: OrderedDict[
+            Path, tuple[tuple[int, int], IndexedMetadata]
+        ] = OrderedDict()
+        """The parsed metadata of the bundles checked last, with its size and mtime"""
+
+    def remote_cache(self, offline: bool) -> RemoteCache:
+        with self._lock:
+            if offline not in self.remote_caches:
+                self.remote_caches[offline] = RemoteCache(offline=offline)
+            return self.remote_caches[offline]
+
+    def indexed(self, bundle: Path) -> Optional[IndexedMetadata]:
+        """Get the parsed metadata of a bundle, if unchanged since last parsed.
+
+        Metadata that cannot be parsed is left for `check_bundle` to report.
+        """
+        metadata_path = bundle / METADATA_NAME
+        try:
+            stat = metadata_path.stat()
+        except OSError:
+            return None
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self.metadata.get(bundle)
+            if cached is not None and cached[0] == key:
+                self.metadata.move_to_end(bundle)
+                return cached[1]
+
+        # Parsed outside the lock: at worst, it is parsed twice at once
+        try:
+            indexed = read_sidecar(bundle) or index_metadata(metadata_path.read_bytes())
+        except (ValueError, DuplicatedIDError):
+            return None
+        with self._lock:
+            self.metadata[bundle] = (key, indexed)
+            if len(self.metadata) > MAX_CACHED_BUNDLES:
+                self.metadata.popitem(last=False)
+        return indexed
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """Handles JSON requests, one per line, answering with JSON lines"""
+
+    server: "MyrServer"
+
+    def handle(self) -> None:
+        try:
+            for line in self.rfile:
+                self.answer(line)
+                self.send({"done": True})
+                if self.server.stopping:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # The client stopped reading, e.g. to fail fast
+            log.debug("The client closed the connection")
+
+    def answer(self, line: bytes) -> None:
+        try:
+            request = jsonio.loads(line)
+            command = request["command"]
+            handler = getattr(self.server, f"handle_{command}", None)
+            if handler is None:
+                raise ValueError(f"Unknown command '{command}'")
+            for response in handler(request):
+                self.send(response)
+        except (BrokenPipeError, ConnectionResetError):
+            raise
+        except Exception as e:
+            log.exception(f"Failed to handle request: {line[:200]!r}")
+            self.send({"error": f"{type(e).__name__}: {e}"})
+
+    def send(self, response: dict) -> None:
+        self.wfile.write(jsonio.dumps(response) + b"\n")
+        self.wfile.flush()
+
+
+def _is_stale_socket(path: Path) -> bool:
+    """Test if nothing listens on a socket file anymore.
+
+    A server that is slow to answer is still there: only a refused connection
+    tells that its socket was left behind.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        probe.settimeout(1)
+        try:
+            probe.connect(str(path))
+        except ConnectionRefusedError:
+            return True
+        except OSError:
+            return False
+    return False
+
+
+class MyrServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Checks bundles for clients, over a Unix socket.
+
+    Each connection is handled in a thread of its own, with a `ServerState`
+    shared by all of them, so that a long check does not block the others,
+    or a ping. Each request is a JSON object on one line, with a `command`:
+
+    - `check`, with `bundles` and optionally `offline`, `use_cache` and
+      `sidecar`, answers with `{"bundle": ..., "violations": [...]}` for each
+      bundle, as soon as it is checked.
+    - `resolve`, with a `bundle` and optionally `offline`, answers with
+      `{"metadata": ...}`, the resolved metadata of the bundle.
+    - `ping` answers with `{"pid": ...}`, and `shutdown` stops the server.
+
+    The answers to every request end with `{"done": true}`, preceded by
+    `{"error": ...}` if the request failed.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: Path) -> None:
+        if path.exists():
+            if not _is_stale_socket(path):
+                raise OSError(f"A server is already listening on {path}")
+            path.unlink()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Only the user running the server can talk to it, from the start
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(path), _RequestHandler)
+        finally:
+            os.umask(umask)
+        self.path: Path = path
+        self.state: ServerState = ServerState()
+        self.stopping: bool = False
+
+    def handle_check(self, request: dict) -> Iterator[dict]:
+        # Imported here, as `myr.myr` also imports this module
+        from myr.myr import check_bundle
+
+        offline = request.get("offline", False)
+        for bundle in (Path(x) for x in request["bundles"]):
+            violations = check_bundle(
+                bundle,
+                offline=offline,
+                use_cache=request.get("use_cache", True),
+                sidecar=request.get("sidecar", False),
+                remote_cache=self.state.remote_cache(offline),
+                indexed=self.state.indexed(bundle),
+            )
+            yield {
+                "bundle": str(bundle),
+                "violations": [x.to_dict() for x in violations],
+            }
+
+    def handle_resolve(self, request: dict) -> Iterator[dict]:
+        bundle = Path(request["bundle"])
+        indexed = self.state.indexed(bundle)
+        if indexed is None:
+            raise ValueError(f"Could not load the metadata of {bundle}")
+        cache = self.state.remote_cache(request.get("offline", False))
+        metadata, _ = resolve(indexed.metadata, cache=cache)
+        yield {"metadata": metadata}
+
+    def handle_ping(self, request: dict) -> Iterator[dict]:
+        yield {"pid": os.getpid()}
+
+    def handle_shutdown(self, request: dict) -> Iterator[dict]:
+        self.stopping = True
+        # `shutdown` waits for this request to be handled, so it cannot be
+        # called from here
+        threading.Thread(target=self.shutdown).start()
+        yield {"pid": os.getpid()}
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.path.unlink(missing_ok=True)
+
+
+def serve(path: Optional[Path] = None) -> None:
+    """Run a server on a socket until it is asked to shut down, or interrupted"""
+    path = path if path is not None else default_socket_path()
+    with MyrServer(path) as server:
+        log.info(f"Serving on {path} (pid {os.getpid()})")
+        try:
+            server.serve_forever(poll_interval=0.1)
+        except KeyboardInterrupt:
+            log.info("Interrupted, shutting down")
+
+
+class ServerClient:
+    """Sends requests to a running server"""
+
+    def __init__(self, path: Optional[Path] = None, timeout: float = 600) -> None:
+        self.path: Path = path if path is not None else default_socket_path()
+        self.timeout: float = timeout
+
+    def request(self, command: str, **arguments) -> Iterator[dict]:
+        """Send a request, yielding the answers as they come.
+
+        Raises:
+            OSError if the server cannot be reached.
+            ServerError if the server could not handle the request.
+        """
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.settimeout(self.timeout)
+            connection.connect(str(self.path))
+            connection.sendall(jsonio.dumps({"command": command, **arguments}) + b"\n")
+            with connection.makefile("rb") as stream:
+                for line in stream:
+                    response = jsonio.loads(line)
+                    if "error" in response:
+                        raise ServerError(response["error"])
+                    if response.get("done"):
+                        return
+                    yield response
+        raise ServerError("The server closed the connection")
+
+    def check(
+        self,
+        bundles: list[Path],
+        offline: bool = False,
+        use_cache: bool = True,
+        sidecar: bool = False,
+    ) -> Iterator[tuple[Path, list[SpecificationViolation]]]:
+        """Check bundles on the server, yielding results as they come"""
+        for response in self.request(
+            "check",
+            bundles=[str(x) for x in bundles],
+            offline=offline,
+            use_cache=use_cache,
+            sidecar=sidecar,
+        ):
+            yield (
+                Path(response["bundle"]),
+                [SpecificationViolation.from_dict(x) for x in response["violations"]],
+            )
+
+    def resolve(self, bundle: Path, offline: bool = False) -> dict:
+        """Get the resolved metadata of a bundle from the server"""
+        (response,) = self.request("resolve", bundle=str(bundle), offline=offline)
+        return response["metadata"]
+
+    def shutdown(self) -> None:
+        for _ in self.request("shutdown"):
+            pass
+
+
+def is_server_running(path: Optional[Path] = None) -> bool:
+    """Test if a server is listening on a socket"""
+    try:
+        for _ in ServerClient(path, timeout=1).request("ping"):
+            pass
+    except (OSError, ServerError):
+        return False
+    return True
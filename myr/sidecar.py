@@ -0,0 +1,224 @@
+import hashlib
+import hmac
+import logging
+import marshal
+import mmap
+import os
+import secrets
+import struct
+import sys
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from myr import jsonio
+from myr.cache import user_cache_dir
+from myr.freezer import STATE_DIR
+from myr.manifest import METADATA_NAME
+from myr.resolver import IdIndex, RelativeCollector
+from myr.traversal import walk
+
+log = logging.getLogger(__name__)
+
+SIDECAR_NAME: str = "metadata.bin"
+"""The name of the sidecar, in the `myr` state folder of the bundle"""
+
+KEY_NAME: str = "sidecar.key"
+"""The name of the secret key sidecars are signed with, in the user cache"""
+
+_MAGIC: bytes = b"MYRSIDE\x02"
+_HEADER = struct.Struct("<8sBBQQ32sQ32s")
+"""Magic, Python version, size and mtime of the JSON file, its sha256
+digest, the size of the marshalled payload and its signature"""
+
+
+@dataclass
+class IndexedMetadata:
+    """Parsed bundle metadata, with the index of its ids and references.
+
+    The compiled specification is not part of it, as it also depends on the
+    remote documents of the bundle: it is cached by the digest of the resolved
+    specification, in `myr.checker.SPECIFICATION_REGISTRY`, instead.
+    """
+
+    metadata: dict
+    digest: str
+    """The sha256 digest of the `myr-metadata.json` file"""
+    ids: IdIndex
+    references: list[tuple[str, str]]
+    """The JSON pointer to each relative key, and the id it points to"""
+
+
+def sidecar_path(bundle: Path) -> Path:
+    return bundle / STATE_DIR / SIDECAR_NAME
+
+
+@lru_cache(maxsize=None)
+def _load_key(path: Path) -> bytes:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        pass
+    # Linked in place, so that concurrent writers all end up with the same key
+    path.parent.mkdir(parents=True, exist_ok=True)
+    descriptor, temp_name = tempfile.mkstemp(dir=path.parent)
+    try:
+        with os.fdopen(descriptor, "wb") as stream:
+            stream.write(secrets.token_bytes(32))
+        os.link(temp_name, path)
+    except FileExistsError:
+        pass
+    finally:
+        os.unlink(temp_name)
+    return path.read_bytes()
+
+
+def _sign(digest: bytes, payload: memoryview) -> bytes:
+    """Sign a payload with the key of the user, so that only the sidecars they
+    wrote are unmarshalled: `marshal` is not safe against crafted data, and
+    bundles can come from anyone."""
+    signature = hmac.new(_load_key(user_cache_dir() / KEY_NAME), digest, "sha256")
+    signature.update(payload)
+    return signature.digest()
+
+
+def index_metadata(content: bytes, digest: Optional[str] = None) -> IndexedMetadata:
+    """Parse metadata, and index its ids and relative references in one walk.
+
+    Raises:
+        json.JSONDecodeError if the metadata is not valid JSON.
+        DuplicatedIDError if the same id is found twice.
+        InvalidIDError if an id is not a string.
+    """
+    data = jsonio.loads(content)
+    ids = IdIndex()
+    references = RelativeCollector()
+    # Metadata that is not an object is left for the checks to report
+    if isinstance(data, (dict, list)):
+        walk(data, [ids, references])
+    return IndexedMetadata(
+        metadata=data,
+        digest=digest if digest is not None else hashlib.sha256(content).hexdigest(),
+        ids=ids,
+        references=references.references,
+    )
+
+
+def write_sidecar(bundle: Path, indexed: IndexedMetadata, stat: os.stat_result) -> None:
+    """Write the sidecar of a bundle.
+
+    Args:
+        bundle: The bundle folder.
+        indexed: The parsed metadata of the bundle.
+        stat: The stat of `myr-metadata.json`, taken before it was read.
+    """
+    payload = marshal.dumps(
+        {
+            "metadata": indexed.metadata,
+            "ids": indexed.ids.locations,
+            "references": indexed.references,
+        }
+    )
+    digest = bytes.fromhex(indexed.digest)
+    header = _HEADER.pack(
+        _MAGIC,
+        *sys.version_info[:2],
+        stat.st_size,
+        stat.st_mtime_ns,
+        digest,
+        len(payload),
+        _sign(digest, memoryview(payload)),
+    )
+    path = sidecar_path(bundle)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    temp_path.write_bytes(header + payload)
+    os.replace(temp_path, path)
+
+
+def read_sidecar(bundle: Path) -> Optional[IndexedMetadata]:
+    """Read the sidecar of a bundle, if it has one for its current metadata.
+
+    The sidecar is memory-mapped, and its payload decoded straight from the
+    mapping. It is only used if `myr-metadata.json` still has the sha256
+    digest it was made from. The digest is only computed again when the size
+    or modification time of the file changed since it was last checked, and
+    the sidecar then records them, for the next reads.
+
+    Sidecars that were not signed with the key of the current user are
+    ignored.
+    """
+    path = sidecar_path(bundle)
+    try:
+        stat = (bundle / METADATA_NAME).stat()
+        with path.open("rb") as stream:
+            mapping = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    with mapping, memoryview(mapping) as view:
+        if len(view) < _HEADER.size:
+            return None
+        header = _HEADER.unpack_from(view)
+        magic, major, minor, size, mtime_ns, digest, length, signature = header
+        # The marshal format may change across Python versions
+        if magic != _MAGIC or (major, minor) != sys.version_info[:2]:
+            return None
+        if size != stat.st_size:
+            return None
+        rehashed = mtime_ns != stat.st_mtime_ns
+        if rehashed:
+            content = (bundle / METADATA_NAME).read_bytes()
+            if hashlib.sha256(content).digest() != digest:
+                return None
+        with view[_HEADER.size : _HEADER.size + length] as payload:
+            if not hmac.compare_digest(_sign(digest, payload), signature):
+                log.warning(f"Ignoring the sidecar at {path}, signed by someone else")
+                return None
+            try:
+                content = marshal.loads(payload)
+            except (EOFError, ValueError, TypeError):
+                log.warning(f"Ignoring the corrupted sidecar at {path}")
+                return None
+
+    if rehashed:
+        # Only the modification time changes, which readers check the digest on
+        header = _HEADER.pack(*header[:4], stat.st_mtime_ns, *header[5:])
+        try:
+            with path.open("r+b") as stream:
+                stream.write(header)
+        except OSError as e:
+            log.debug(f"Could not refresh the sidecar at {path}: {e}")
+
+    data = content["metadata"]
+    return IndexedMetadata(
+        metadata=data,
+        digest=digest.hex(),
+        ids=IdIndex.from_locations(data, content["ids"]),
+        references=[tuple(x) for x in content["references"]],
+    )
+
+
+def load_metadata(bundle: Path, write: bool = False) -> IndexedMetadata:
+    """Load the metadata of a bundle, through its sidecar if possible.
+
+    If there is no usable sidecar, the metadata is parsed, and the sidecar is
+    written again if it exists (or if `write` is True).
+
+    Raises:
+        FileNotFoundError if the bundle has no `myr-metadata.json`.
+        json.JSONDecodeError if the metadata is not valid JSON.
+        DuplicatedIDError if the same id is found twice.
+    """
+    indexed = read_sidecar(bundle)
+    if indexed is not None:
+        log.debug(f"Loaded the metadata of {bundle} from its sidecar")
+        return indexed
+
+    stat = (bundle / METADATA_NAME).stat()
+    indexed = index_metadata((bundle / METADATA_NAME).read_bytes())
+    if write or sidecar_path(bundle).exists():
+        write_sidecar(bundle, indexed, stat)
+    return indexed
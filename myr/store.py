@@ -0,0 +1,274 @@
+import hashlib
+import logging
+import os
+import random
+import tempfile
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+
+from myr import jsonio
+from myr.manifest import METADATA_NAME, Manifest, ManifestEntry
+
+log = logging.getLogger(__name__)
+
+MIN_CHUNK_SIZE: int = 256 * 1024
+AVERAGE_CHUNK_SIZE: int = 1024 * 1024
+MAX_CHUNK_SIZE: int = 4 * 1024 * 1024
+
+
+def _gear_table() -> tuple[int, ...]:
+    # A random 64 bits value for each byte value. The table is fixed, so the
+    # same content is always cut in the same places.
+    generator = random.Random(0x6D7972)
+    return tuple(generator.getrandbits(64) for _ in range(256))
+
+
+GEAR_TABLE: tuple[int, ...] = _gear_table()
+
+_GEAR_BITS: int = 64
+"""How many bytes, at most, a Gear hash depends on: one per bit"""
+
+
+def _find_boundary(data: bytes, start: int, end: int, mask: int) -> int:
+    """Find where a chunk starting at `start` ends, at `end` at the latest"""
+    gear = GEAR_TABLE
+    value = 0
+    # The hash only depends on the last 64 bytes: they are hashed first, so
+    # that the boundaries do not depend on where the chunk started.
+    for byte in data[max(0, start - _GEAR_BITS) : start]:
+        value = ((value << 1) + gear[byte]) & 0xFFFFFFFFFFFFFFFF
+    position = start
+    for byte in data[start:end]:
+        value = ((value << 1) + gear[byte]) & 0xFFFFFFFFFFFFFFFF
+        position += 1
+        if not value & mask:
+            return position
+    return end
+
+
+def iter_chunks(
+    stream: BinaryIO,
+    min_size: int = MIN_CHUNK_SIZE,
+    average_size: int = AVERAGE_CHUNK_SIZE,
+    max_size: int = MAX_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Cut a stream in content-defined chunks.
+
+    A Gear hash rolls over the bytes: each byte shifts the hash left by one
+    bit and adds the value of the byte in `GEAR_TABLE`, so the hash depends
+    on the last 64 bytes only. A chunk ends where the top bits of the hash
+    are all 0 (past `min_size`), or at `max_size`. As a boundary only depends
+    on the bytes right before it, inserting or removing data only changes the
+    chunks around the edit. The number of bits tested is such that chunks
+    are `average_size` long on average.
+    """
+    bits = max(1, (average_size - min_size).bit_length() - 1)
+    mask = ((1 << bits) - 1) << (_GEAR_BITS - bits)
+    buffer = b""
+    eof = False
+    while True:
+        if len(buffer) < max_size and not eof:
+            data = stream.read(max_size)
+            eof = not data
+            buffer += data
+            continue
+        if not buffer:
+            return
+
+        start = min(min_size, len(buffer))
+        end = min(max_size, len(buffer))
+        cut = _find_boundary(buffer, start, end, mask)
+        yield buffer[:cut]
+        buffer = buffer[cut:]
+
+
+@dataclass
+class StoredFile:
+    digest: str
+    """The sha256 digest of the whole file"""
+    chunks: list[str]
+    """The digests of the chunks of the file, in order"""
+    new_chunks: int = 0
+    """How many of the chunks were not in the store before"""
+
+
+class ChunkStore:
+    """A content-addressed store of files, cut in deduplicated chunks.
+
+    The store holds:
+        - `chunks/`: every unique chunk, compressed and named by its digest;
+        - `files/`: the list of chunks of every unique file, by its digest;
+        - `versions/`: the index of every frozen version of a bundle, with
+          its metadata and the digest of each of its files.
+
+    A chunk (or file) is only written once, no matter how many files (or
+    versions) contain it.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path: Path = path
+        for folder in ("chunks", "files", "versions"):
+            (path / folder).mkdir(parents=True, exist_ok=True)
+
+    def _write(self, path: Path, content: bytes) -> None:
+        """Write a file atomically, even if other writers store the same path.
+
+        Every writer has its own temporary file. As the same path always gets
+        the same content, losing the race to another writer is fine.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        descriptor, temp_name = tempfile.mkstemp(
+            prefix=f"{path.name}.", suffix=".tmp", dir=path.parent
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as stream:
+                stream.write(content)
+            os.replace(temp_name, path)
+        except OSError:
+            Path(temp_name).unlink(missing_ok=True)
+            if not path.exists():
+                raise
+
+    def _chunk_path(self, digest: str) -> Path:
+        return self.path / "chunks" / digest[:2] / digest
+
+    def put_chunk(self, chunk: bytes) -> tuple[str, bool]:
+        """Store a chunk, if it is not stored already.
+
+        Returns:
+            A tuple with the digest of the chunk, and whether it was new.
+        """
+        digest = hashlib.sha256(chunk).hexdigest()
+        path = self._chunk_path(digest)
+        if path.exists():
+            return (digest, False)
+        self._write(path, zlib.compress(chunk))
+        return (digest, True)
+
+    def get_chunk(self, digest: str) -> bytes:
+        return zlib.decompress(self._chunk_path(digest).read_bytes())
+
+    def get_file(self, digest: str) -> Optional[list[str]]:
+        """Get the chunks of a stored file, or None if it is not stored"""
+        path = self.path / "files" / digest
+        if not path.exists():
+            return None
+        return jsonio.loads(path.read_bytes())
+
+    def put_file(self, path: Path) -> StoredFile:
+        """Store a file, chunk by chunk"""
+        file_digest = hashlib.sha256()
+        stored = StoredFile(digest="", chunks=[])
+        with path.open("rb") as stream:
+            for chunk in iter_chunks(stream):
+                file_digest.update(chunk)
+                digest, new = self.put_chunk(chunk)
+                stored.chunks.append(digest)
+                stored.new_chunks += new
+        stored.digest = file_digest.hexdigest()
+        self._write(self.path / "files" / stored.digest, jsonio.dumps(stored.chunks))
+        return stored
+
+    def read_file(self, digest: str, output: BinaryIO) -> None:
+        """Write the content of a stored file to a stream, chunk by chunk"""
+        chunks = self.get_file(digest)
+        if chunks is None:
+            raise KeyError(f"File {digest} is not in the store")
+        for chunk in chunks:
+            output.write(self.get_chunk(chunk))
+
+    def save_version(self, name: str, index: dict) -> None:
+        self._write(self.path / "versions" / f"{name}.json", jsonio.dumps(index))
+
+    def load_version(self, name: str) -> dict:
+        with (self.path / "versions" / f"{name}.json").open("rb") as stream:
+            return jsonio.load(stream)
+
+    def versions(self) -> list[str]:
+        return sorted(x.stem for x in (self.path / "versions").glob("*.json"))
+
+
+def freeze_to_store(
+    input_path: Path,
+    store: ChunkStore,
+    metadata: dict,
+    manifest: Manifest,
+    name: Optional[str] = None,
+    jobs: Optional[int] = None,
+) -> str:
+    """Freeze a bundle as a new version in a chunk store.
+
+    Files whose digest (from the manifest) is already in the store are not
+    read at all. The others are chunked, and only their new chunks are
+    written, across a thread pool. Files with the same digest are only read
+    and stored once.
+
+    Args:
+        input_path: The bundle folder.
+        store: The store to freeze the bundle in.
+        metadata: The (resolved) metadata of the bundle.
+        manifest: The manifest of every file to freeze.
+        name: The name of the version. Defaults to the current UTC time.
+        jobs: How many files to store at once. Defaults to the CPU count.
+
+    Returns:
+        The name of the new version.
+    """
+    name = name if name is not None else time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    # The files to store, by digest: copies of a file are stored once
+    to_store: dict[str, list[ManifestEntry]] = {}
+    for entry in manifest.values():
+        if entry.digest in to_store:
+            to_store[entry.digest].append(entry)
+        elif store.get_file(entry.digest) is None:
+            to_store[entry.digest] = [entry]
+    log.info(
+        f"Storing {len(to_store)} new files "
+        f"({len(manifest) - sum(len(x) for x in to_store.values())} already stored)"
+    )
+
+    new_chunks = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(
+            store.put_file, [input_path / x[0].path for x in to_store.values()]
+        )
+        for entries, stored in zip(to_store.values(), results):
+            new_chunks += stored.new_chunks
+            if stored.digest == entries[0].digest:
+                continue
+            log.warning(f"{entries[0].path} changed while it was being frozen")
+            entries[0].digest = stored.digest
+            # Its copies were not stored along with it
+            for entry in entries[1:]:
+                copy = store.put_file(input_path / entry.path)
+                entry.digest = copy.digest
+                new_chunks += copy.new_chunks
+    log.info(f"Stored {new_chunks} new chunks")
+
+    store.save_version(
+        name,
+        {
+            "name": name,
+            "metadata": metadata,
+            "files": {
+                x.path: {"size": x.size, "digest": x.digest} for x in manifest.values()
+            },
+        },
+    )
+    return name
+
+
+def restore_version(store: ChunkStore, name: str, output_path: Path) -> None:
+    """Rebuild a bundle folder from one of its versions in a chunk store"""
+    index = store.load_version(name)
+    output_path.mkdir(parents=True, exist_ok=True)
+    with (output_path / METADATA_NAME).open("wb") as stream:
+        jsonio.dump(index["metadata"], stream)
+    for path, entry in index["files"].items():
+        (output_path / path).parent.mkdir(parents=True, exist_ok=True)
+        with (output_path / path).open("wb") as stream:
+            store.read_file(entry["digest"], stream)
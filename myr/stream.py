@@ -0,0 +1,243 @@
+import json
+import logging
+from pathlib import Path
+from typing import Iterator, NamedTuple, Optional, TextIO
+
+from myr.cache import RemoteCache
+from myr.checker import (
+    InvalidSpecificationError,
+    MultipleViolationsError,
+    Specification,
+    ViolationType,
+    compile_specification,
+    critical_violation,
+    error_violation,
+)
+from myr.resolver import InvalidRemoteError, resolve_remote
+
+log = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE: int = 1024 * 1024
+"""How many characters are read from the metadata file at a time"""
+
+
+class MetadataItem(NamedTuple):
+    key: str
+    """The top-level key the value belongs to"""
+    index: Optional[int]
+    """The index of the value in the `content` array, or None for other keys"""
+    value: object
+
+
+class _IncrementalReader:
+    """Decodes JSON values from a text stream, reading it a chunk at a time"""
+
+    def __init__(self, stream: TextIO, chunk_size: int) -> None:
+        self.stream = stream
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.position = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _read(self, size: int) -> None:
+        # Drop what was already consumed before growing the buffer
+        self.buffer = self.buffer[self.position :]
+        self.position = 0
+        chunk = self.stream.read(size)
+        if not chunk:
+            self.eof = True
+        self.buffer += chunk
+
+    def peek(self) -> str:
+        """Get the next non-whitespace character, without consuming it"""
+        while True:
+            while self.position < len(self.buffer):
+                if not self.buffer[self.position].isspace():
+                    return self.buffer[self.position]
+                self.position += 1
+            if self.eof:
+                raise json.JSONDecodeError("Unexpected end of file", self.buffer, 0)
+            self._read(self.chunk_size)
+
+    def expect(self, characters: str) -> str:
+        """Consume the next non-whitespace character, which must be one of these"""
+        character = self.peek()
+        if character not in characters:
+            raise json.JSONDecodeError(
+                f"Expected one of '{characters}'", self.buffer, self.position
+            )
+        self.position += 1
+        return character
+
+    def value(self) -> object:
+        """Decode the next value in the stream"""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+                # A value touching the end of the buffer could be cut short
+                # (e.g. a number), so we only trust it if something follows.
+                if end < len(self.buffer) or self.eof:
+                    self.position = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            # Read more and more each time, to keep retries few for big values
+            self._read(size)
+            size *= 2
+
+
+def iter_metadata(
+    stream: TextIO, chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> Iterator[MetadataItem]:
+    """Incrementally decode a `myr-metadata.json` stream.
+
+    The top-level keys are yielded as they are decoded, except for the
+    `content` array, which is yielded one entry at a time (unless it is
+    empty, in which case it is yielded whole). Only a single
+    entry (or top-level value) is held in memory at once.
+
+    Raises:
+        json.JSONDecodeError if the stream is not valid JSON, or is not an
+        object at the top level.
+    """
+    reader = _IncrementalReader(stream, chunk_size)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.value()
+        if not isinstance(key, str):
+            raise json.JSONDecodeError("Expected a key", reader.buffer, 0)
+        reader.expect(":")
+
+        if key == "content" and reader.peek() == "[":
+            reader.expect("[")
+            index = 0
+            if reader.peek() == "]":
+                reader.expect("]")
+                yield MetadataItem(key, None, [])
+            else:
+                while True:
+                    yield MetadataItem(key, index, reader.value())
+                    index += 1
+                    if reader.expect(",]") == "]":
+                        break
+        else:
+            yield MetadataItem(key, None, reader.value())
+
+        if reader.expect(",}") == "}":
+            return
+
+
+def _load_specification(
+    header: dict, cache: Optional[RemoteCache]
+) -> Optional[Specification]:
+    """Compile the specification of the metadata, if it has one yet.
+
+    Raises:
+        InvalidSpecificationError if the specification is not an object.
+        InvalidRemoteError if a remote specification is not an URL.
+    """
+    if "@specification" in header:
+        specification = resolve_remote(
+            {"@specification": header["@specification"]}, cache=cache
+        )
+    elif "specification" in header:
+        specification = header
+    else:
+        return None
+    if not isinstance(specification["specification"], dict):
+        raise critical_violation(
+            ViolationType.INVALID_SPEC_FORMAT, location="/specification"
+        )
+    return compile_specification(specification["specification"])
+
+
+def _validate_entry(
+    specification: Specification, item: MetadataItem
+) -> list[InvalidSpecificationError]:
+    # Entries are validated like the values of the `any` key they are in
+    if not isinstance(item.value, dict) or "type" not in item.value:
+        return []
+    return specification.validate(item.value, location=f"/{item.key}/{item.index}")
+
+
+def validate_stream(
+    path: Path,
+    specification: Optional[Specification] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[RemoteCache] = None,
+) -> Iterator[InvalidSpecificationError]:
+    """Validate a `myr-metadata.json` file without loading it whole.
+
+    Each `content` entry is validated against the specification as soon as it
+    is decoded, so memory is bounded by the largest entry rather than by the
+    file. If the file has its specification after the `content` array, the
+    file is read a second time. Relative (>) and remote (@) keys of the
+    entries are not resolved, so their values are not checked: `myr check`
+    only uses it when given `--stream`.
+
+    Args:
+        path: The path to the `myr-metadata.json` file.
+        specification: The specification to validate against. If not given,
+            the one in the file is used.
+        chunk_size: How many characters to read from the file at a time.
+        cache: The remote cache to fetch a remote specification through.
+
+    Yields:
+        The violations, as soon as they are found.
+    """
+    if not path.exists():
+        yield critical_violation(ViolationType.METADATA_NOT_FOUND, location=str(path))
+        return
+
+    header: dict = {}
+    deferred = False
+    try:
+        with path.open("r", encoding="utf-8") as stream:
+            for item in iter_metadata(stream, chunk_size):
+                if item.index is None:
+                    header[item.key] = item.value
+                    if specification is None and item.key.endswith("specification"):
+                        specification = _load_specification(header, cache)
+                    continue
+
+                # The bundle object is validated without its entries, later
+                header.setdefault(item.key, [])
+                if specification is None:
+                    deferred = True
+                    continue
+                yield from _validate_entry(specification, item)
+
+            if specification is None:
+                yield critical_violation(
+                    ViolationType.INVALID_SPEC_FORMAT, location="/specification"
+                )
+                return
+
+            if deferred:
+                log.debug(f"Specification of {path} follows its content, re-reading")
+                stream.seek(0)
+                for item in iter_metadata(stream, chunk_size):
+                    if item.index is not None:
+                        yield from _validate_entry(specification, item)
+    except json.JSONDecodeError as e:
+        log.error(f"Failed to decode {path}: {e}")
+        yield critical_violation(ViolationType.INVALID_SPEC_FORMAT, location="/")
+        return
+    except InvalidRemoteError as e:
+        log.error(str(e))
+        yield error_violation(ViolationType.INVALID_REMOTE, location=e.location)
+        return
+    except MultipleViolationsError as e:
+        yield from e.violations
+        return
+    except InvalidSpecificationError as e:
+        yield e
+        return
+
+    yield from specification.validate(header)
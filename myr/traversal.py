@@ -0,0 +1,110 @@
+from typing import Callable, Optional, Union
+
+Node = Union[dict, list]
+
+Rewrite = Callable[[str, object, bool], Optional[tuple[str, object, bool]]]
+"""A function taking a key, its value and whether the object holding them is
+inside a list, and returning the new key, the new value and whether to
+descend into the new value - or `None` to drop the key altogether."""
+
+
+def json_pointer(parent: str, key) -> str:
+    """Build the JSON pointer (RFC 6901) of a key or index below `parent`"""
+    return f"{parent}/{str(key).replace('~', '~0').replace('/', '~1')}"
+
+
+def resolve_pointer(structure: Node, pointer: str):
+    """Get the value a JSON pointer (RFC 6901) points to in a structure.
+
+    Raises:
+        KeyError or IndexError if the pointer points to nothing.
+    """
+    node = structure
+    for token in pointer.split("/")[1:]:
+        token = token.replace("~1", "/").replace("~0", "~")
+        node = node[int(token)] if isinstance(node, list) else node[token]
+    return node
+
+
+def pointer_in_list(structure: Node, pointer: str) -> bool:
+    """Test if the value a JSON pointer points to is nested inside a list.
+
+    Raises:
+        KeyError or IndexError if the pointer points to nothing.
+    """
+    node = structure
+    for token in pointer.split("/")[1:]:
+        if isinstance(node, list):
+            return True
+        node = node[token.replace("~1", "/").replace("~0", "~")]
+    return False
+
+
+class Visitor:
+    """A pass over the objects of a structure, run by `walk`."""
+
+    def visit(self, node: dict, pointer: str, in_list: bool) -> None:
+        """Visit an object.
+
+        Args:
+            node: The object being visited.
+            pointer: The JSON pointer to the object.
+            in_list: If the object is nested (at any depth) inside a list.
+        """
+        raise NotImplementedError()
+
+
+def walk(structure: Node, visitors: list[Visitor]) -> None:
+    """Visit every object in a structure with all the visitors, in one pass.
+
+    Objects are visited depth-first, in document order, and each object is
+    given to every visitor in turn before moving on. The walk keeps its own
+    stack, so deeply nested structures do not hit the recursion limit.
+    """
+    stack: list[tuple[Node, str, bool]] = [(structure, "", False)]
+    while stack:
+        node, pointer, in_list = stack.pop()
+        if isinstance(node, dict):
+            for visitor in visitors:
+                visitor.visit(node, pointer, in_list)
+            children = node.items()
+        else:
+            children = enumerate(node)
+            in_list = True
+        # Children are pushed in reverse so they are visited in order
+        for key, value in reversed(list(children)):
+            if isinstance(value, (dict, list)):
+                stack.append((value, json_pointer(pointer, key), in_list))
+
+
+def transform(structure: Node, rewrite: Rewrite) -> Node:
+    """Rebuild a structure, rewriting the keys of every object on the way.
+
+    The structure is not modified: every object and list that is descended
+    into is rebuilt, while the values the rewrite chose not to descend into
+    are kept as they are.
+    """
+    root: Node = {} if isinstance(structure, dict) else []
+    stack: list[tuple[Node, Node, bool]] = [(structure, root, False)]
+    while stack:
+        source, target, in_list = stack.pop()
+        if isinstance(source, dict):
+            for key, value in source.items():
+                rewritten = rewrite(key, value, in_list)
+                if rewritten is None:
+                    continue
+                key, value, descend = rewritten
+                if descend and isinstance(value, (dict, list)):
+                    child: Node = {} if isinstance(value, dict) else []
+                    stack.append((value, child, in_list))
+                    value = child
+                target[key] = value
+        else:
+            for value in source:
+                if isinstance(value, (dict, list)):
+                    child = {} if isinstance(value, dict) else []
+                    stack.append((value, child, True))
+                    value = child
+                target.append(value)
+
+    return root
@@ -0,0 +1,17 @@
+import json
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def user_cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+
+
+def write_bundle(path: Path, data) -> Path:
+    """Write a bundle folder with metadata, given as a structure or as text"""
+    path.mkdir(parents=True)
+    text = data if isinstance(data, str) else json.dumps(data)
+    (path / "myr-metadata.json").write_text(text)
+    return path
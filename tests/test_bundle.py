@@ -0,0 +1,75 @@
+import pytest
+import os
+from copy import deepcopy
+from myr.bundle import *
+from myr.myr import myr_freeze
+from tests.conftest import write_bundle
+from tests.data import COMPLEX_MYR_DATA
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"].append(
+        {
+            "type": "file",
+            "id": "table",
+            "path": "data/table.csv",
+            "MIME_type": "text/csv",
+        }
+    )
+    data["content"].append(
+        {"type": "file", "path": "data/empty.csv", "MIME_type": "text/csv"}
+    )
+    path = write_bundle(tmp_path / "bundle", data)
+    (path / "README.md").write_text("# A bundle\n")
+    (path / "data").mkdir()
+    (path / "data" / "table.csv").write_bytes(os.urandom(100_000))
+    (path / "data" / "empty.csv").write_bytes(b"")
+    return path
+
+
+@pytest.fixture
+def frozen(bundle, tmp_path):
+    output = tmp_path / "bundle.tar"
+    myr_freeze(bundle, output, compression="none")
+    return output
+
+
+@pytest.mark.parametrize("source", ["bundle", "frozen"])
+def test_bundle_buffer(source, bundle, request):
+    table = (bundle / "data" / "table.csv").read_bytes()
+    with Bundle(request.getfixturevalue(source)) as opened:
+        buffer = opened.buffer("table")
+        assert buffer.readonly
+        assert buffer == table
+        assert opened.buffer(opened.metadata["content"][-1]) == b""
+
+        with opened.open("table") as stream:
+            assert stream.read(10) == table[:10]
+            stream.seek(-10, os.SEEK_END)
+            assert stream.read() == table[-10:]
+
+        with pytest.raises(FileNotFoundError):
+            opened.buffer_file("missing.csv")
+        with pytest.raises(KeyError):
+            opened.buffer("missing")
+        del buffer
+
+
+def test_bundle_entry_path(bundle):
+    with Bundle(bundle) as opened:
+        assert opened.entry_path({"path": "./data/table.csv"}) == "data/table.csv"
+        with pytest.raises(ValueError):
+            opened.entry_path({"path": "../secrets"})
+        with pytest.raises(ValueError):
+            opened.entry_path({"type": "author"})
+
+
+def test_bundle_compressed(bundle, tmp_path):
+    output = tmp_path / "bundle.tar.gz"
+    myr_freeze(bundle, output)
+    with pytest.raises(ValueError):
+        Bundle(output)
+    with pytest.raises(FileNotFoundError):
+        Bundle(tmp_path / "nothing")
@@ -0,0 +1,155 @@
+import pytest
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from myr import jsonio
+from myr.cache import *
+from myr.checker import InvalidSpecificationError
+from myr.resolver import retrieve_json
+
+
+@pytest.fixture
+def server():
+    """A local server with a single document, supporting ETag revalidation"""
+    state = {"requests": 0, "not_modified": 0, "body": b'{"name": "doc"}'}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            state["requests"] += 1
+            etag = f'"{hash(state["body"])}"'
+            if self.headers.get("If-None-Match") == etag:
+                state["not_modified"] += 1
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(state["body"])))
+            self.end_headers()
+            self.wfile.write(state["body"])
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    state["url"] = f"http://127.0.0.1:{httpd.server_address[1]}/doc.json"
+    yield state
+    httpd.shutdown()
+
+
+def test_cache_fresh_hit(tmp_path, server):
+    cache = RemoteCache(tmp_path)
+    assert retrieve_json(server["url"], cache=cache) == {"name": "doc"}
+    assert retrieve_json(server["url"], cache=cache) == {"name": "doc"}
+    assert server["requests"] == 1
+
+    # The cache persists across instances
+    cache = RemoteCache(tmp_path)
+    assert retrieve_json(server["url"], cache=cache) == {"name": "doc"}
+    assert server["requests"] == 1
+
+
+def test_cache_revalidation(tmp_path, server):
+    cache = RemoteCache(tmp_path, ttl=0)
+    assert retrieve_json(server["url"], cache=cache) == {"name": "doc"}
+    assert retrieve_json(server["url"], cache=cache) == {"name": "doc"}
+    assert server["requests"] == 2
+    assert server["not_modified"] == 1
+
+    server["body"] = b'{"name": "new doc"}'
+    assert retrieve_json(server["url"], cache=cache) == {"name": "new doc"}
+    assert server["not_modified"] == 1
+
+
+def test_cache_offline(tmp_path, server):
+    retrieve_json(server["url"], cache=RemoteCache(tmp_path))
+
+    cache = RemoteCache(tmp_path, ttl=0, offline=True)
+    assert retrieve_json(server["url"], cache=cache) == {"name": "doc"}
+    assert server["requests"] == 1
+
+    with pytest.raises(InvalidSpecificationError):
+        retrieve_json(server["url"] + "?other", cache=cache)
+
+
+def test_cache_content_addressing(tmp_path):
+    cache = RemoteCache(tmp_path)
+    first = cache.store("http://a/", b"{}")
+    second = cache.store("http://b/", b"{}")
+
+    assert first.digest == second.digest
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+
+
+def test_cache_lru_eviction(tmp_path):
+    cache = RemoteCache(tmp_path, max_size=10)
+    cache.store("http://a/", b"0123")
+    cache.store("http://b/", b"4567")
+    cache.read(cache.lookup("http://a/"))
+    cache.store("http://c/", b"89ab")
+
+    assert cache.lookup("http://a/") is not None
+    assert cache.lookup("http://b/") is None
+    assert cache.lookup("http://c/") is not None
+    assert len(list((tmp_path / "blobs").iterdir())) == 2
+
+
+def test_cache_shared_index(tmp_path):
+    # Two processes with the cache open at once, each storing its own URL
+    first = RemoteCache(tmp_path)
+    second = RemoteCache(tmp_path)
+    first.store("http://a/", b"[1]")
+    second.store("http://b/", b"[2]")
+
+    # Neither overwrote the other, and each sees what the other stored
+    assert first.lookup("http://b/") is not None
+    reopened = RemoteCache(tmp_path)
+    assert reopened.lookup("http://a/") is not None
+    assert reopened.lookup("http://b/") is not None
+
+
+def test_cache_read_does_not_save(tmp_path):
+    cache = RemoteCache(tmp_path)
+    entry = cache.store("http://a/", b"{}")
+    saved = (tmp_path / "index.json").read_bytes()
+
+    assert cache.read(entry) == b"{}"
+    assert (tmp_path / "index.json").read_bytes() == saved
+
+    # Access times older than the resolution are saved again
+    entry.accessed -= ACCESS_TIME_RESOLUTION
+    cache.read(entry)
+    assert (tmp_path / "index.json").read_bytes() != saved
+
+
+def test_cache_concurrent_store(tmp_path):
+    cache = RemoteCache(tmp_path)
+    urls = [f"http://{i}/" for i in range(32)]
+    threads = [threading.Thread(target=cache.store, args=(x, b"{}")) for x in urls]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(RemoteCache(tmp_path).lookup(x) is not None for x in urls)
+    assert [x.name for x in (tmp_path / "blobs").iterdir()] == [
+        cache.lookup(urls[0]).digest
+    ]
+
+
+@pytest.mark.parametrize("backend", ["orjson", "stdlib"])
+def test_canonical_digest(backend):
+    if backend != "stdlib":
+        pytest.importorskip(backend)
+    data = {"b": [1e16, 0.1, "é"], "a": {"y": None, "x": True}}
+    reordered = {"a": {"x": True, "y": None}, "b": [1e16, 0.1, "é"]}
+
+    # The digests saved in the caches do not depend on the JSON backend
+    jsonio.set_backend(backend)
+    try:
+        assert canonical_digest(data) == canonical_digest(reordered)
+        assert canonical_digest(data) == (
+            "03f9861092ad3fe7df1854138f669d44d13cc1fb251caa934d93fd7a9d1aab01"
+        )
+    finally:
+        jsonio.set_backend()
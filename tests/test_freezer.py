@@ -0,0 +1,224 @@
+import pytest
+import gzip
+import io
+import json
+import os
+import subprocess
+import sys
+import tarfile
+from copy import deepcopy
+import zlib
+from pathlib import Path
+from myr.checker import MultipleViolationsError
+from myr.freezer import *
+import myr.myr
+from myr.myr import myr_create, myr_freeze
+from tests.conftest import write_bundle
+from tests.data import COMPLEX_MYR_DATA
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"][0]["id"] = "readme"
+    data["content"].append(
+        {"type": "file", "path": "data/table.csv", "MIME_type": "text/csv"}
+    )
+    data["content"][1][">related"] = "readme"
+    data["specification"]["keys"].append(
+        {"qualifier": "related", "value": "file", "description": "A related file."}
+    )
+    data["specification"]["types"][1]["valid_keys"].append(
+        {"qualifier": "related", "required": False}
+    )
+    path = write_bundle(tmp_path / "bundle", data)
+    (path / "README.md").write_text("# A bundle\n")
+    (path / "data").mkdir()
+    (path / "data" / "table.csv").write_bytes(os.urandom(300_000))
+    return path
+
+
+def test_parallel_gzip_writer():
+    data = os.urandom(100_000) + b"a" * 100_000
+    output = io.BytesIO()
+    with ParallelGzipWriter(output, jobs=4, block_size=7_000) as writer:
+        writer.write(data[:50])
+        writer.end_block()
+        writer.write(data[50:])
+        assert writer.tell() == len(data)
+
+    assert gzip.decompress(output.getvalue()) == data
+
+
+def test_bundle_files(bundle):
+    assert bundle_files(bundle) == [Path("README.md"), Path("data/table.csv")]
+
+
+def test_freeze(bundle, tmp_path):
+    output = tmp_path / "bundle.tar.gz"
+    myr_freeze(bundle, output, jobs=3)
+
+    with tarfile.open(output, "r:gz") as tar:
+        names = tar.getnames()
+        metadata = json.load(tar.extractfile("myr-metadata.json"))
+        table = tar.extractfile("data/table.csv").read()
+        manifest = json.load(tar.extractfile("myr-manifest.json"))
+
+    assert names == [
+        "myr-metadata.json",
+        "myr-manifest.json",
+        "README.md",
+        "data/table.csv",
+    ]
+    assert [x["path"] for x in manifest] == ["README.md", "data/table.csv"]
+    assert metadata["content"][1]["related"]["path"] == "README.md"
+    assert table == (bundle / "data" / "table.csv").read_bytes()
+
+
+def test_freeze_metadata_first(bundle, tmp_path):
+    output = tmp_path / "bundle.tar.gz"
+    with (bundle / "myr-metadata.json").open() as stream:
+        metadata = json.load(stream)
+    freeze_bundle(bundle, output, metadata, jobs=2, block_size=64 * 1024)
+
+    # The first gzip member holds the whole metadata member, and nothing else
+    first_member = zlib.decompressobj(31).decompress(output.read_bytes())
+    with tarfile.open(fileobj=io.BytesIO(first_member + b"\0" * 1024)) as tar:
+        assert tar.getnames() == ["myr-metadata.json"]
+        assert json.load(tar.extractfile("myr-metadata.json")) == metadata
+
+
+def test_freeze_invalid(tmp_path):
+    myr_create(tmp_path / "bundle")
+    (tmp_path / "bundle" / "myr-metadata.json").write_text("{}")
+
+    with pytest.raises(MultipleViolationsError):
+        myr_freeze(tmp_path / "bundle", tmp_path / "bundle.tar.gz")
+    assert not (tmp_path / "bundle.tar.gz").exists()
+
+
+def test_freeze_resolves_once(bundle, tmp_path, monkeypatch):
+    resolved = []
+    resolve = myr.myr.resolve
+
+    def counting_resolve(*args, **kwargs):
+        resolved.append(args[0])
+        return resolve(*args, **kwargs)
+
+    monkeypatch.setattr("myr.myr.resolve", counting_resolve)
+    myr_freeze(bundle, tmp_path / "bundle.tar.gz")
+    assert len(resolved) == 1
+
+    # Unchanged since its last check, the bundle is only resolved to freeze it
+    resolved.clear()
+    myr_freeze(bundle, tmp_path / "again.tar.gz")
+    assert len(resolved) == 1
+
+
+def test_freeze_errors(bundle, tmp_path, monkeypatch):
+    (bundle / "data" / "table.csv").unlink()
+    with pytest.raises(FileNotFoundError):
+        myr_freeze(bundle, tmp_path / "bundle.tar.gz")
+
+    result = subprocess.run(
+        [sys.executable, "-m", "myr", "freeze", str(bundle)], capture_output=True
+    )
+    assert result.returncode == 1
+    assert b"data/table.csv" in result.stderr
+
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(ImportError, match="pip install zstandard"):
+        myr_freeze(bundle, tmp_path / "bundle.tar.zst", compression="zstd")
+
+
+def test_freeze_index(bundle, tmp_path):
+    output = tmp_path / "bundle.tar.gz"
+    myr_freeze(bundle, output, jobs=2)
+    index = read_index(output)
+
+    assert list(index.members) == [
+        "myr-metadata.json",
+        "myr-manifest.json",
+        "README.md",
+        "data/table.csv",
+    ]
+    # The index does not change the content of the archive
+    with tarfile.open(output, "r:gz") as tar:
+        for name, (offset, size) in index.members.items():
+            assert (tar.getmember(name).offset_data, tar.getmember(name).size) == (
+                offset,
+                size,
+            )
+
+
+def write_bytes(path: Path, content: bytes) -> Path:
+    path.write_bytes(content)
+    return path
+
+
+@pytest.mark.parametrize(
+    "comment",
+    [
+        b'{"version": 1, "blo',  # Truncated, without the final NUL
+        b"not json\0",
+        b"[1, 2]\0",
+        b'{"version": 1, "members": {}}\0',
+        b'{"version": 1, "blocks": [[0]], "members": {}}\0',
+        b'{"version": 1, "blocks": [], "members": {"a": ["0", 1]}}\0',
+    ],
+)
+def test_read_index_malformed(tmp_path, comment):
+    output = io.BytesIO(gzip.compress(b"data"))
+    output.seek(0, os.SEEK_END)
+    write_index(output, ArchiveIndex(blocks=[(0, 0)], members={"a": (0, 4)}))
+    raw = output.getvalue()
+    start = raw.index(b"\x1f\x8b\x08\x10")
+    trailer = raw[raw.rindex(b"\x1f\x8b\x08\x04") :]
+    assert read_index(write_bytes(tmp_path / "valid.gz", raw)) is not None
+
+    # The index is ignored, instead of failing to read the archive
+    path = write_bytes(tmp_path / "bundle.gz", raw[: start + 10] + comment + trailer)
+    assert read_index(path) is None
+
+
+def test_inflate_bounded(tmp_path):
+    data = b"\0" * 10_000_000
+    path = write_bytes(tmp_path / "zeros.gz", gzip.compress(data) * 2)
+
+    # However well the data compresses, it is decompressed a piece at a time
+    with path.open("rb") as stream:
+        pieces = list(myr.freezer._inflate(stream, chunk_size=64 * 1024))
+    assert max(len(x) for x in pieces) == 64 * 1024
+    assert b"".join(pieces) == data * 2
+
+
+def test_extract_member(bundle, tmp_path):
+    output = tmp_path / "bundle.tar.gz"
+    with (bundle / "myr-metadata.json").open() as stream:
+        metadata = json.load(stream)
+    freeze_bundle(bundle, output, metadata, jobs=2, block_size=64 * 1024)
+
+    extracted = io.BytesIO()
+    extract_member(output, "data/table.csv", extracted)
+    assert extracted.getvalue() == (bundle / "data" / "table.csv").read_bytes()
+    assert read_frozen_metadata(output) == metadata
+
+    # The table starts in a later block: the ones before it are not read
+    compressed_start, skip, size = read_index(output).locate("data/table.csv")
+    assert compressed_start > 0
+    assert skip < 64 * 1024
+
+    with pytest.raises(KeyError):
+        extract_member(output, "missing.csv", extracted)
+
+
+def test_extract_member_without_index(bundle, tmp_path):
+    output = tmp_path / "bundle.tar"
+    with tarfile.open(output, "w") as tar:
+        tar.add(bundle / "myr-metadata.json", arcname="myr-metadata.json")
+        tar.add(bundle / "README.md", arcname="README.md")
+
+    assert read_index(output) is None
+    extracted = io.BytesIO()
+    extract_member(output, "README.md", extracted)
+    assert extracted.getvalue() == b"# A bundle\n"
@@ -0,0 +1,42 @@
+import pytest
+import json
+from myr import jsonio
+
+
+@pytest.fixture(params=["orjson", "stdlib"])
+def backend(request):
+    if request.param != "stdlib":
+        pytest.importorskip(request.param)
+    yield jsonio.set_backend(request.param)
+    jsonio.set_backend()
+
+
+def test_roundtrip(backend):
+    data = {"b": [1, 2.5, None, True], "a": {"text": "ünïcode"}}
+
+    assert jsonio.loads(jsonio.dumps(data)) == data
+    assert jsonio.loads(jsonio.dumps(data, pretty=True)) == data
+    assert b"\n" not in jsonio.dumps(data)
+    assert b"\n" in jsonio.dumps(data, pretty=True)
+    # Pretty output does not depend on the backend
+    assert jsonio.dumps(data, pretty=True) == json.dumps(data, indent=4).encode()
+    assert jsonio.dumps(data, sort_keys=True).index(b'"a"') == 1
+
+
+def test_fallbacks(backend):
+    # Very large integers and non-string keys are not supported by all backends
+    assert jsonio.loads(jsonio.dumps({"big": 2**70})) == {"big": 2**70}
+    assert jsonio.loads(jsonio.dumps({1: "a"})) == {"1": "a"}
+
+    with pytest.raises(json.JSONDecodeError):
+        jsonio.loads(b'{"unfinished": ')
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv(jsonio.BACKEND_VARIABLE, "stdlib")
+    assert jsonio.set_backend().name == "stdlib"
+    monkeypatch.delenv(jsonio.BACKEND_VARIABLE)
+    assert jsonio.set_backend().name in jsonio.BACKEND_PREFERENCE
+
+    with pytest.raises(ValueError):
+        jsonio.set_backend("nonsense")
@@ -0,0 +1,95 @@
+import pytest
+from copy import deepcopy
+from myr.lazy import *
+from myr.resolver import RemoteFetcher, resolve
+from tests.test_resolver import REMOTE_DOCUMENTS
+
+
+@pytest.fixture
+def remote_documents(monkeypatch):
+    requested = []
+
+    def fake_retrieve_json(url, **kwargs):
+        requested.append(url)
+        return deepcopy(REMOTE_DOCUMENTS[url])
+
+    monkeypatch.setattr("myr.resolver.retrieve_json", fake_retrieve_json)
+    return requested
+
+
+@pytest.fixture
+def test_data():
+    data = {
+        "@specification": ["http://test/spec_a", "http://test/spec_b"],
+        "content": [
+            {"id": "table", "path": "table.csv"},
+            {"@ignored": "http://test/inst", ">source": "table"},
+        ],
+        "author": {"@person": "http://test/person", ">wrote": "table"},
+        "@maintainer": "http://test/person",
+    }
+    return deepcopy(data)
+
+
+@pytest.fixture
+def fetcher():
+    with RemoteFetcher(max_workers=2) as fetcher:
+        yield fetcher
+
+
+def test_lazy_resolution(remote_documents, test_data, fetcher):
+    lazy = LazyObject(test_data, LazyContext(test_data, fetcher))
+
+    assert list(lazy) == ["specification", "content", "author", "maintainer"]
+    assert lazy["content"][1]["source"] == {"path": "table.csv"}
+    # Nothing remote was needed so far
+    assert remote_documents == []
+
+    assert lazy["author"]["person"]["affiliation"] == {"name": "Some institute"}
+    assert remote_documents == ["http://test/person", "http://test/inst"]
+
+    assert fetcher.requests_made == 2
+    expected, _ = resolve(deepcopy(test_data))
+    assert materialize(lazy) == expected
+    assert fetcher.requests_made == 4
+    # Every node is resolved once, and then kept
+    assert lazy["author"] is lazy["author"]
+    assert lazy["maintainer"] is lazy["maintainer"]
+
+
+def test_lazy_errors(remote_documents, fetcher):
+    data = {">missing": "nothing", "ok": [1, {"a": 2}]}
+    lazy = LazyObject(data, LazyContext(data, fetcher))
+
+    assert materialize(lazy["ok"]) == [1, {"a": 2}]
+    assert lazy["ok"][-1]["a"] == 2
+    with pytest.raises(IndexError):
+        lazy["ok"][2]
+    with pytest.raises(KeyError):
+        lazy["missing"]
+
+
+def test_lazy_remote_loop(monkeypatch, fetcher):
+    def fake_retrieve_json(url, **kwargs):
+        return {"@other": url}
+
+    monkeypatch.setattr("myr.resolver.retrieve_json", fake_retrieve_json)
+    data = {"@loop": "http://test/loop"}
+    lazy = LazyObject(data, LazyContext(data, fetcher))
+    with pytest.raises(ValueError):
+        materialize(lazy)
+
+
+def test_lazy_referenced_remote(remote_documents, fetcher):
+    data = {
+        "people": {"id": "me", "@affil": "http://test/inst"},
+        "author": {">who": "me"},
+        "editor": {">who": "me"},
+    }
+    lazy = LazyObject(data, LazyContext(data, fetcher))
+
+    assert lazy["author"]["who"]["affil"] == {"name": "Some institute"}
+    # Every reference shares the same resolved object
+    assert lazy["author"]["who"] is lazy["editor"]["who"]
+    expected, _ = resolve(deepcopy(data))
+    assert materialize(lazy) == expected
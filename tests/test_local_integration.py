@@ -1,8 +1,340 @@
 import pytest
+import io
+import json
+import subprocess
+import sys
+from copy import deepcopy
 from pathlib import Path
+from myr.cache import CheckCache
+from myr.checker import (
+    MultipleViolationsError,
+    Specification,
+    ViolationLimitReached,
+    ViolationSeverity,
+    ViolationSink,
+    ViolationType,
+)
+from myr.myr import *
+from myr.report import JsonLinesWriter
+from tests.conftest import write_bundle
+from tests.data import COMPLEX_MYR_DATA
+
 
 def input_metadata_path(tmp_path) -> Path:
     pass
 
+
 def test_local_integration():
     pass
+
+
+def test_check_created_bundle(tmp_path):
+    myr_create(tmp_path / "bundle")
+
+    assert check_bundle(tmp_path / "bundle") == []
+    myr_check_path([tmp_path])
+
+
+def test_check_complex_bundle(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"][0]["id"] = "readme"
+    data["content"].append({"type": "file", "path": "a", "MIME_type": "b"})
+    data["content"][1][">author"] = "missing"
+    write_bundle(tmp_path / "bundle", data)
+
+    violations = check_bundle(tmp_path / "bundle")
+
+    assert [(x.location, x.violation_type) for x in violations] == [
+        ("/content/1/>author", ViolationType.ID_NOT_FOUND)
+    ]
+
+    data["content"][1][">author"] = "readme"
+    write_bundle(tmp_path / "other", data)
+    violations = check_bundle(tmp_path / "other")
+
+    # The readme file is not a person, so it cannot be an author
+    assert [(x.location, x.violation_type) for x in violations] == [
+        ("/content/1/author", ViolationType.WRONG_KEY_TYPE)
+    ]
+
+
+def test_check_many_bundles(tmp_path):
+    myr_create(tmp_path / "valid")
+    write_bundle(tmp_path / "nested" / "broken", "{not json")
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"][0]["id"] = "id"
+    data["content"][0]["author"]["id"] = "id"
+    write_bundle(tmp_path / "nested" / "duplicated", data)
+
+    assert find_bundles([tmp_path]) == [
+        tmp_path / "nested" / "broken",
+        tmp_path / "nested" / "duplicated",
+        tmp_path / "valid",
+    ]
+
+    with pytest.raises(MultipleViolationsError) as error:
+        myr_check_path([tmp_path / "nested", tmp_path / "valid"], jobs=2)
+
+    found = [
+        (x.violation.location, x.violation.violation_type)
+        for x in error.value.violations
+    ]
+    assert found == [
+        (f"{tmp_path / 'nested' / 'broken'}:/", ViolationType.INVALID_SPEC_FORMAT),
+        (
+            f"{tmp_path / 'nested' / 'duplicated'}:/content/0/author",
+            ViolationType.ID_COLLISION,
+        ),
+    ]
+    assert error.value.max_severity == ViolationSeverity.CRITICAL
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_check_limits(tmp_path, jobs):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"] = [{"type": "file"} for _ in range(5)]
+    write_bundle(tmp_path / "a", data)
+    write_bundle(tmp_path / "b", data)
+
+    with pytest.raises(MultipleViolationsError) as error:
+        myr_check_path([tmp_path], jobs=jobs, max_violations=3)
+    assert len(error.value.violations) == 3
+    assert error.value.sink.total == 20
+    assert error.value.sink.counts == {ViolationType.MISSING_REQUIRED_KEY: 20}
+    assert "... and 17 more" in error.value.message
+
+    with pytest.raises(MultipleViolationsError) as error:
+        myr_check_path([tmp_path], jobs=jobs, fail_fast=ViolationSeverity.ERROR)
+    assert error.value.sink.total == 1
+    assert error.value.violations[0].violation.location.startswith(f"{tmp_path / 'a'}:")
+
+
+def test_check_exit_code(tmp_path):
+    write_bundle(tmp_path / "broken", "{not json")
+
+    result = subprocess.run(
+        [sys.executable, "-m", "myr", "check", str(tmp_path)], capture_output=True
+    )
+
+    assert result.returncode == 2
+    assert b"FOUND 1 VIOLATIONS" in result.stdout
+
+
+def test_check_cache(tmp_path, monkeypatch):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"].append({"type": "file", "path": 1, "MIME_type": "text/csv"})
+    write_bundle(tmp_path / "bundle", data)
+    first = check_bundle(tmp_path / "bundle")
+
+    validated = []
+    collect = Specification.collect
+    collect_batch = Specification.collect_batch
+
+    def counting_collect(self, structure, sink, location=""):
+        validated.append(structure.get("path"))
+        return collect(self, structure, sink, location)
+
+    def counting_collect_batch(self, objects, locations=None):
+        validated.extend(x.get("path") for x in objects)
+        return collect_batch(self, objects, locations)
+
+    monkeypatch.setattr(Specification, "collect", counting_collect)
+    monkeypatch.setattr(Specification, "collect_batch", counting_collect_batch)
+
+    # Unchanged bundles are not validated at all
+    second = check_bundle(tmp_path / "bundle")
+    assert validated == []
+    assert [x.to_dict() for x in first] == [x.to_dict() for x in second]
+
+    # Only the changed entry is validated again, along with the bundle itself
+    data["content"].insert(0, {"type": "file", "path": "new", "MIME_type": 2})
+    (tmp_path / "bundle" / "myr-metadata.json").write_text(json.dumps(data))
+    third = check_bundle(tmp_path / "bundle")
+    assert validated == [None, "new"]
+    assert [(x.location, x.violation_type) for x in third] == [
+        ("/content/0/MIME_type", ViolationType.WRONG_KEY_TYPE),
+        ("/content/2/path", ViolationType.WRONG_KEY_TYPE),
+    ]
+
+    validated.clear()
+    check_bundle(tmp_path / "bundle", use_cache=False)
+    assert validated == [None, "new", "README.md", 1]
+
+
+def test_check_evicted_remote(tmp_path, monkeypatch):
+    # The remote specification is never kept in the remote cache
+    data = deepcopy(COMPLEX_MYR_DATA)
+    specification = data.pop("specification")
+    data["@specification"] = "http://test/spec"
+    monkeypatch.setattr(
+        "myr.resolver.retrieve_json", lambda url, **kwargs: deepcopy(specification)
+    )
+    write_bundle(tmp_path / "bundle", data)
+
+    assert check_bundle(tmp_path / "bundle") == []
+    assert CheckCache().load(tmp_path / "bundle") is None
+
+
+def test_check_cut_short_not_cached(tmp_path, monkeypatch):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"] = [{"type": "file"} for _ in range(5)]
+    write_bundle(tmp_path / "bundle", data)
+
+    sink = ViolationSink(max_violations=1, fail_fast=ViolationSeverity.ERROR)
+    with pytest.raises(ViolationLimitReached):
+        check_bundle(tmp_path / "bundle", sink=sink)
+    assert sink.violations == [sink.stopped_at]
+    assert CheckCache().load(tmp_path / "bundle") is None
+
+    # Bundles with too many violations are checked in bounded memory, uncached
+    monkeypatch.setattr("myr.myr.MAX_RECORDED_VIOLATIONS", 3)
+    sink = ViolationSink(max_violations=1)
+    assert len(check_bundle(tmp_path / "bundle", sink=sink)) == 1
+    assert sink.total == 10
+    assert CheckCache().load(tmp_path / "bundle") is None
+
+    monkeypatch.setattr("myr.myr.MAX_RECORDED_VIOLATIONS", 10)
+    check_bundle(tmp_path / "bundle", sink=ViolationSink(max_violations=1))
+    assert len(CheckCache().load(tmp_path / "bundle").violations) == 10
+
+
+def test_check_streaming_output(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"] = [{"type": "file"} for _ in range(3)]
+    write_bundle(tmp_path / "bundle", data)
+
+    result = subprocess.run(
+        [sys.executable, "-m", "myr", "check", "--format", "jsonl", str(tmp_path)],
+        capture_output=True,
+    )
+
+    assert result.returncode == 1
+    records = [json.loads(x) for x in result.stdout.splitlines()]
+    assert len(records) == 6
+    assert records[0] == {
+        "bundle": str(tmp_path / "bundle"),
+        "location": "/content/0/MIME_type",
+        "violation_type": "MISSING_REQUIRED_KEY",
+        "severity": "ERROR",
+        "context": None,
+    }
+
+    result = subprocess.run(
+        [sys.executable, "-m", "myr", "check", "--format", "sarif", str(tmp_path)],
+        capture_output=True,
+    )
+    assert result.returncode == 1
+    assert len(json.loads(result.stdout)["runs"][0]["results"]) == 6
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_check_streaming_writer(tmp_path, jobs):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"] = [{"type": "file"} for _ in range(3)]
+    for name in "abc":
+        write_bundle(tmp_path / name, data)
+    stream = io.BytesIO()
+
+    # The violations are written as found, not sent back with each bundle
+    with pytest.raises(MultipleViolationsError) as error:
+        myr_check_path(
+            [tmp_path], jobs=jobs, max_violations=0, writer=JsonLinesWriter(stream)
+        )
+
+    assert error.value.violations == []
+    records = [json.loads(x) for x in stream.getvalue().splitlines()]
+    assert len(records) == error.value.sink.total == 18
+    assert sorted(set(x["bundle"] for x in records)) == [
+        str(tmp_path / x) for x in "abc"
+    ]
+
+
+def test_check_stream(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"].extend({"type": "file", "path": i} for i in range(3))
+    write_bundle(tmp_path / "bundle", data)
+
+    with pytest.raises(MultipleViolationsError) as error:
+        myr_check_path([tmp_path], jobs=1, stream=True)
+
+    streamed = [x.violation.to_dict() for x in error.value.violations]
+    for violation in check_bundle(tmp_path / "bundle"):
+        violation.location = f"{tmp_path / 'bundle'}:{violation.location}"
+        assert violation.to_dict() in streamed
+    assert len(streamed) == len(check_bundle(tmp_path / "bundle")) == 6
+
+    result = subprocess.run(
+        [sys.executable, "-m", "myr", "check", "--stream", "--format", "jsonl"]
+        + [str(tmp_path)],
+        capture_output=True,
+    )
+    assert result.returncode == 1
+    assert len(result.stdout.splitlines()) == 6
+
+
+@pytest.mark.parametrize(
+    "change, expected",
+    [
+        ({"@thing": 5}, [("/@thing", ViolationType.INVALID_REMOTE)]),
+        ({"@specification": [5]}, [("/@specification", ViolationType.INVALID_REMOTE)]),
+        ({"specification": 5}, [("/specification", ViolationType.INVALID_SPEC_FORMAT)]),
+        ({">author": ["a"]}, [("/>author", ViolationType.ID_NOT_FOUND)]),
+        ({"id": ["a"]}, [("/id", ViolationType.INVALID_ID)]),
+        ({"type": ["x"]}, [("/type", ViolationType.UNKNOWN_TYPE)]),
+    ],
+)
+def test_check_malformed_metadata(tmp_path, change, expected):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data.update(change)
+    write_bundle(tmp_path / "bundle", data)
+
+    violations = check_bundle(tmp_path / "bundle")
+
+    assert [(x.location, x.violation_type) for x in violations] == expected
+
+
+def test_check_malformed_root(tmp_path):
+    write_bundle(tmp_path / "bundle", "[]")
+
+    violations = check_bundle(tmp_path / "bundle")
+
+    assert [(x.location, x.violation_type) for x in violations] == [
+        ("/", ViolationType.INVALID_SPEC_FORMAT)
+    ]
+
+
+def test_check_remote_loop(tmp_path, monkeypatch):
+    documents = {
+        "http://test/a": {"@next": "http://test/b"},
+        "http://test/b": {"@next": "http://test/a"},
+    }
+    monkeypatch.setattr(
+        "myr.resolver.retrieve_json", lambda url, **kwargs: deepcopy(documents[url])
+    )
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["@source"] = "http://test/a"
+    write_bundle(tmp_path / "bundle", data)
+
+    violations = check_bundle(tmp_path / "bundle", use_cache=False)
+
+    assert [(x.location, x.violation_type) for x in violations] == [
+        ("/@source", ViolationType.INVALID_REMOTE)
+    ]
+
+
+def test_check_malformed_bundle_in_pool(tmp_path):
+    myr_create(tmp_path / "valid")
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["@thing"] = 5
+    write_bundle(tmp_path / "broken", data)
+    write_bundle(tmp_path / "other", {**COMPLEX_MYR_DATA, "specification": 5})
+
+    result = subprocess.run(
+        [sys.executable, "-m", "myr", "check", "-j", "3", str(tmp_path)],
+        capture_output=True,
+    )
+
+    assert result.returncode == 2
+    assert b"Traceback" not in result.stderr
+    assert f"{tmp_path / 'broken'}:/@thing".encode() in result.stdout
+    assert f"{tmp_path / 'other'}:/specification".encode() in result.stdout
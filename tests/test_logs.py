@@ -0,0 +1,24 @@
+import logging
+import pytest
+from myr.logs import *
+
+
+@pytest.fixture
+def myr_logger():
+    logger = logging.getLogger("myr")
+    saved = (logger.level, logger.propagate, list(logger.handlers))
+    yield logger
+    logger.setLevel(saved[0])
+    logger.propagate = saved[1]
+    logger.handlers[:] = saved[2]
+
+
+def test_setup_logging_levels(myr_logger):
+    setup_logging(0)
+    # Debug messages are not even built, unless they would be shown
+    assert not logging.getLogger("myr.checker").isEnabledFor(logging.DEBUG)
+    assert logging.getLogger("myr.checker").isEnabledFor(logging.WARNING)
+
+    setup_logging(2)
+    assert logging.getLogger("myr.checker").isEnabledFor(logging.DEBUG)
+    assert len(myr_logger.handlers) == 1
@@ -0,0 +1,59 @@
+import pytest
+import hashlib
+import os
+from myr.manifest import *
+from tests.data import COMPLEX_MYR_DATA
+
+
+@pytest.fixture
+def files(tmp_path):
+    (tmp_path / "a.txt").write_text("some text")
+    (tmp_path / "b.bin").write_bytes(os.urandom(100_000))
+    return tmp_path
+
+
+def test_hash_file(files):
+    expected = hashlib.sha256((files / "b.bin").read_bytes()).hexdigest()
+
+    assert hash_file(files / "b.bin", chunk_size=4096) == expected
+
+
+def test_referenced_files():
+    assert referenced_files(COMPLEX_MYR_DATA) == ["README.md"]
+
+
+def test_build_manifest(files):
+    manifest = build_manifest(files, ["a.txt", "b.bin"], jobs=2)
+
+    assert list(manifest) == ["a.txt", "b.bin"]
+    assert manifest["a.txt"].size == 9
+    assert manifest["a.txt"].digest == hashlib.sha256(b"some text").hexdigest()
+
+    with pytest.raises(FileNotFoundError):
+        build_manifest(files, ["missing.txt"])
+
+
+def test_manifest_reuse(files, monkeypatch):
+    manifest = build_manifest(files, ["a.txt", "b.bin"])
+    save_manifest(manifest, files / ".myr" / "manifest.json")
+    previous = load_manifest(files / ".myr" / "manifest.json")
+    assert previous == manifest
+
+    (files / "a.txt").write_text("other text")
+    hashed = []
+    monkeypatch.setattr(
+        "myr.manifest.hash_file", lambda path: hashed.append(path.name) or "new"
+    )
+
+    new_manifest = build_manifest(files, ["a.txt", "b.bin"], previous=previous)
+    assert hashed == ["a.txt"]
+    assert new_manifest["b.bin"] == manifest["b.bin"]
+
+
+def test_verify_manifest(files):
+    manifest = build_manifest(files, ["a.txt", "b.bin"])
+    assert verify_manifest(files, manifest) == []
+
+    (files / "a.txt").write_text("changed")
+    (files / "b.bin").unlink()
+    assert verify_manifest(files, manifest) == ["a.txt", "b.bin"]
@@ -0,0 +1,55 @@
+import io
+import json
+from pathlib import Path
+from myr.report import *
+
+
+VIOLATIONS = [
+    SpecificationViolation(
+        "/content/0/path", ViolationType.WRONG_KEY_TYPE, ViolationSeverity.ERROR
+    ),
+    SpecificationViolation(
+        "/", None, ViolationSeverity.WARNING, context={"detail": "something"}
+    ),
+]
+
+
+def test_json_lines_writer():
+    stream = io.BytesIO()
+    with JsonLinesWriter(stream) as writer:
+        for violation in VIOLATIONS:
+            writer.write(Path("/bundle"), violation)
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(x) for x in lines] == [
+        {"bundle": "/bundle", **x.to_dict()} for x in VIOLATIONS
+    ]
+
+
+def test_sarif_writer():
+    stream = io.BytesIO()
+    with SarifWriter(stream) as writer:
+        for violation in VIOLATIONS:
+            writer.write(Path("/bundle"), violation)
+
+    log = json.loads(stream.getvalue())
+    assert log["version"] == "2.1.0"
+    (run,) = log["runs"]
+    rules = run["tool"]["driver"]["rules"]
+    results = run["results"]
+    assert [x["level"] for x in results] == ["error", "warning"]
+    assert rules[results[0]["ruleIndex"]]["id"] == results[0]["ruleId"]
+    assert results[0]["ruleId"] == "WRONG_KEY_TYPE"
+    assert results[0]["locations"][0]["logicalLocations"] == [
+        {"fullyQualifiedName": "/content/0/path", "kind": "object"}
+    ]
+    assert results[0]["locations"][0]["physicalLocation"]["artifactLocation"] == {
+        "uri": "file:///bundle/myr-metadata.json"
+    }
+    assert "ruleId" not in results[1]
+    assert results[1]["properties"]["context"] == {"detail": "something"}
+
+    # An empty run is still a valid log
+    stream = io.BytesIO()
+    SarifWriter(stream).close()
+    assert json.loads(stream.getvalue())["runs"][0]["results"] == []
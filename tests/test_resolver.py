@@ -1,5 +1,6 @@
 import pytest
 from myr.resolver import *
+from myr.checker import InvalidSpecificationError, ViolationType
 from copy import deepcopy
 
 
@@ -63,3 +64,182 @@ def test_fuse_specifications():
         {"a": "key"}, {"banana": "papaya"}]}
 
     assert fuse_specifications(left, right) == expected
+
+
+def test_merge_specifications():
+    base = {
+        "types": [{"qualifier": "base", "valid_keys": []}],
+        "keys": [{"qualifier": "a", "value": "text"}],
+    }
+    layers = [
+        {
+            "types": [deepcopy(base["types"][0]), {"qualifier": f"t{i}"}],
+            "keys": [
+                deepcopy(base["keys"][0]),
+                {"qualifier": f"k{i}"},
+                {"qualifier": f"k{i}", "value": "any"},
+            ],
+        }
+        for i in range(20)
+    ]
+    specifications = [base, *layers]
+    original = deepcopy(specifications)
+
+    merged = merge_specifications(specifications)
+
+    assert specifications == original
+    assert [x["qualifier"] for x in merged["types"]] == ["base"] + [
+        f"t{i}" for i in range(20)
+    ]
+    # Same-qualifier keys within a specification are kept, as before
+    assert len(merged["keys"]) == 1 + 2 * 20
+    # The entries are shared with the inputs, not copied
+    assert merged["keys"][0] is base["keys"][0]
+    assert merged["types"][1] is layers[0]["types"][1]
+
+    conflicting = {"types": [], "keys": [{"qualifier": "a", "value": "any"}]}
+    with pytest.raises(InvalidSpecificationError) as error:
+        merge_specifications([base, conflicting])
+    assert error.value.violation.violation_type == ViolationType.DUPLICATED_QUALIFIER
+    assert error.value.violation.location == "/keys/a/"
+
+    with pytest.raises(InvalidSpecificationError):
+        merge_specifications([base, {"types": []}])
+
+
+REMOTE_DOCUMENTS = {
+    "http://test/spec_a": {"types": [{"qualifier": "a"}], "keys": [{"q": "a"}]},
+    "http://test/spec_b": {"types": [{"qualifier": "b"}], "keys": [{"q": "b"}]},
+    "http://test/person": {"name": "Someone", "@affiliation": "http://test/inst"},
+    "http://test/inst": {"name": "Some institute"},
+}
+
+
+@pytest.fixture
+def remote_documents(monkeypatch):
+    requested = []
+
+    def fake_retrieve_json(url, **kwargs):
+        requested.append(url)
+        return deepcopy(REMOTE_DOCUMENTS[url])
+
+    monkeypatch.setattr("myr.resolver.retrieve_json", fake_retrieve_json)
+    return requested
+
+
+def test_resolve_remote(remote_documents):
+    data = {
+        "type": "myr-bundle",
+        "@specification": ["http://test/spec_a", "http://test/spec_b"],
+        "content": {"author": {"@person": "http://test/person"}},
+        "@maintainer": "http://test/person",
+    }
+    expected = {
+        "type": "myr-bundle",
+        "specification": {
+            "types": [{"qualifier": "a"}, {"qualifier": "b"}],
+            "keys": [{"q": "a"}, {"q": "b"}],
+        },
+        "content": {
+            "author": {
+                "person": {"name": "Someone", "affiliation": {"name": "Some institute"}}
+            }
+        },
+        "maintainer": {"name": "Someone", "affiliation": {"name": "Some institute"}},
+    }
+
+    assert resolve_remote(data, max_workers=4) == expected
+    assert resolve_remote(data, max_workers=1) == expected
+    # Each unique URL is only fetched once per resolution
+    assert len(remote_documents) == 2 * len(REMOTE_DOCUMENTS)
+
+
+def test_resolve_remote_loop(monkeypatch):
+    def fake_retrieve_json(url, **kwargs):
+        return {"@other": url}
+
+    monkeypatch.setattr("myr.resolver.retrieve_json", fake_retrieve_json)
+    with pytest.raises(ValueError):
+        resolve_remote({"@loop": "http://test/loop"})
+
+
+def test_remote_fetcher_deduplication(remote_documents):
+    data = {
+        "first": {"@person": "http://test/person"},
+        "second": {"@person": "http://test/person"},
+        "@maintainer": "http://test/person",
+    }
+
+    with RemoteFetcher(max_workers=2) as fetcher:
+        resolved = resolve_remote(data, fetcher=fetcher)
+        assert fetcher.requests_made == 2
+        assert fetcher.requests_saved == 2
+
+    assert remote_documents == ["http://test/person", "http://test/inst"]
+    assert resolved["first"]["person"] == resolved["maintainer"]
+
+
+def test_find_ids_locations(test_data):
+    ids = find_ids(test_data)
+
+    assert ids.locations == {
+        "wow": "/test_0",
+        "wow2": "/test_0/b",
+        "amazing": "/test_1/nested",
+        "list1": "/list/0",
+    }
+    assert ids.objects["wow"] is test_data["test_0"]
+
+
+def test_find_ids_duplicated(test_data):
+    test_data["list"].append({"id": "amazing"})
+
+    with pytest.raises(DuplicatedIDError, match="/test_1/nested.*/list/3"):
+        find_ids(test_data)
+
+
+def test_resolve(remote_documents, test_data):
+    test_data["test_1"]["@person"] = "http://test/person"
+    test_data["list"].append({"@ignored": "http://test/inst"})
+
+    # Referenced objects have their remote keys resolved, unless in a list
+    test_data["test_0"]["@person"] = "http://test/person"
+    test_data["list"][0]["@ignored"] = "http://test/inst"
+    test_data[">listed"] = "list1"
+
+    resolved, ids = resolve(test_data)
+
+    remote = resolve_remote(test_data)
+    expected = resolve_relative(remote, find_ids(remote))
+    assert resolved == expected
+    assert resolved["relative"]["person"]["name"] == "Someone"
+    assert resolved["listed"]["@ignored"] == "http://test/inst"
+    assert resolved["test_1"]["person"]["affiliation"] == {"name": "Some institute"}
+    assert resolved["list"][3] == {"@ignored": "http://test/inst"}
+    assert set(ids) == {"wow", "wow2", "amazing", "list1"}
+
+
+def test_resolve_referenced_remote(remote_documents):
+    data = {
+        "people": {"id": "me", "@affil": "http://test/inst"},
+        "author": {">who": "me"},
+    }
+
+    resolved, _ = resolve(deepcopy(data))
+
+    remote = resolve_remote(deepcopy(data))
+    assert resolved == resolve_relative(remote, find_ids(remote))
+    assert resolved["author"] == {"who": {"affil": {"name": "Some institute"}}}
+
+
+def test_resolve_relative_in_remote(remote_documents, monkeypatch):
+    monkeypatch.setitem(REMOTE_DOCUMENTS, "http://test/boss", {"name": "a", ">boss": "me"})
+    data = {"people": {"id": "me", "name": "b"}, "author": {"@who": "http://test/boss"}}
+
+    # Unlike the sequential pipeline, relative keys of remote documents are kept
+    resolved, _ = resolve(deepcopy(data))
+    assert resolved["author"] == {"who": {"name": "a", ">boss": "me"}}
+
+    remote = resolve_remote(deepcopy(data))
+    sequential = resolve_relative(remote, find_ids(remote))
+    assert sequential["author"] == {"who": {"name": "a", "boss": {"name": "b"}}}
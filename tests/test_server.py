@@ -0,0 +1,132 @@
+import pytest
+import json
+import socket
+import stat
+import threading
+from copy import deepcopy
+from myr.server import *
+from myr.checker import (
+    MultipleViolationsError,
+    SpecificationRegistry,
+    ViolationType,
+)
+from myr.myr import check_bundle, myr_check_path
+from tests.conftest import write_bundle
+from tests.data import COMPLEX_MYR_DATA
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    registry = SpecificationRegistry()
+    monkeypatch.setattr("myr.checker.SPECIFICATION_REGISTRY", registry)
+    return registry
+
+
+@pytest.fixture
+def server(tmp_path):
+    server = MyrServer(tmp_path / "myr.sock")
+    thread = threading.Thread(
+        target=server.serve_forever, kwargs={"poll_interval": 0.01}
+    )
+    thread.start()
+    yield server
+    ServerClient(server.path).shutdown()
+    thread.join(timeout=10)
+    server.server_close()
+    assert not thread.is_alive()
+
+
+def test_server_check(tmp_path, server, registry):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    valid = write_bundle(tmp_path / "valid", data)
+    data["content"].append({"type": "file", "path": 1})
+    invalid = write_bundle(tmp_path / "invalid", data)
+
+    client = ServerClient(server.path)
+    results = list(client.check([valid, invalid], use_cache=False))
+    assert [x for x, _ in results] == [valid, invalid]
+    assert results[0][1] == []
+    assert [x.to_dict() for x in results[1][1]] == [
+        x.to_dict() for x in check_bundle(invalid, use_cache=False)
+    ]
+
+    # Both bundles share their specification, which was compiled once
+    assert registry.misses == 1
+    assert set(server.state.metadata) == {valid, invalid}
+
+    # Changed metadata is parsed again
+    data["content"].pop()
+    (invalid / "myr-metadata.json").write_text(json.dumps(data, indent=2))
+    assert list(client.check([invalid], use_cache=False)) == [(invalid, [])]
+
+    assert client.resolve(valid)["content"] == COMPLEX_MYR_DATA["content"]
+
+
+def test_server_check_path(tmp_path, server):
+    write_bundle(tmp_path / "broken", {"type": "myr-bundle"})
+
+    with pytest.raises(MultipleViolationsError) as error:
+        myr_check_path([tmp_path / "broken"], server=server.path)
+    assert [x.violation.violation_type for x in error.value.violations] == [
+        ViolationType.INVALID_SPEC_FORMAT
+    ]
+
+    # Without a server, bundles are checked locally
+    with pytest.raises(MultipleViolationsError):
+        myr_check_path([tmp_path / "broken"], server=tmp_path / "nothing.sock")
+
+
+@pytest.mark.parametrize("error", [ServerError("Boom"), socket.timeout("timed out")])
+def test_server_check_path_failure(tmp_path, server, monkeypatch, error):
+    write_bundle(tmp_path / "a", deepcopy(COMPLEX_MYR_DATA))
+    write_bundle(tmp_path / "b", {"type": "myr-bundle"})
+
+    def check(self, bundles, **options):
+        yield (bundles[0], [])
+        raise error
+
+    # The bundles the server did not check are checked locally
+    monkeypatch.setattr(ServerClient, "check", check)
+    with pytest.raises(MultipleViolationsError) as failure:
+        myr_check_path([tmp_path / "a", tmp_path / "b"], server=server.path)
+    assert [x.violation.violation_type for x in failure.value.violations] == [
+        ViolationType.INVALID_SPEC_FORMAT
+    ]
+
+
+def test_server_errors(tmp_path, server):
+    client = ServerClient(server.path)
+    with pytest.raises(ServerError, match="Unknown command"):
+        list(client.request("nonsense"))
+    with pytest.raises(ServerError):
+        client.resolve(tmp_path / "missing")
+
+    # The server is still there, and refuses to be started twice
+    assert is_server_running(server.path)
+    with pytest.raises(OSError):
+        MyrServer(server.path)
+    assert not is_server_running(tmp_path / "nothing.sock")
+
+
+def test_server_concurrent_connections(tmp_path, server):
+    # A client that is slow to send its request does not block the others
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as idle:
+        idle.connect(str(server.path))
+        assert is_server_running(server.path)
+
+    assert stat.S_IMODE(server.path.stat().st_mode) == 0o600
+
+
+def test_server_stale_socket(tmp_path):
+    path = tmp_path / "myr.sock"
+    # A socket left behind by a server that is gone, with nothing listening
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as left:
+        left.bind(str(path))
+
+    server = MyrServer(path)
+    try:
+        assert path.exists()
+        assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    finally:
+        server.server_close()
+    assert not path.exists()
@@ -0,0 +1,100 @@
+import pytest
+import os
+from copy import deepcopy
+from myr.sidecar import *
+from myr.bundle import Bundle
+from myr.myr import check_bundle
+from myr.resolver import IdIndex
+from myr.traversal import resolve_pointer
+from tests.conftest import write_bundle
+from tests.data import COMPLEX_MYR_DATA
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"][0]["author"]["id"] = "a/~author"
+    data["content"].append(
+        {"type": "file", "path": "a", "MIME_type": "b", ">author": "a/~author"}
+    )
+    path = write_bundle(tmp_path / "bundle", data)
+    return path
+
+
+def test_resolve_pointer():
+    data = {"a/b": [{"~c": 1}], "": {"d": None}}
+    assert resolve_pointer(data, "") is data
+    assert resolve_pointer(data, "/a~1b/0/~0c") == 1
+    assert resolve_pointer(data, "//d") is None
+    with pytest.raises(KeyError):
+        resolve_pointer(data, "/missing")
+    with pytest.raises(IndexError):
+        resolve_pointer(data, "/a~1b/1")
+
+
+def test_sidecar_round_trip(bundle):
+    assert read_sidecar(bundle) is None
+    indexed = load_metadata(bundle, write=True)
+    assert sidecar_path(bundle).exists()
+
+    loaded = read_sidecar(bundle)
+    assert loaded is not None
+    assert loaded.metadata == indexed.metadata
+    assert loaded.digest == indexed.digest
+    assert (
+        loaded.references == indexed.references == [("/content/1/>author", "a/~author")]
+    )
+    assert dict(loaded.ids.locations) == {"a/~author": "/content/0/author"}
+    # The ids point into the loaded metadata, and not into a copy of it
+    assert loaded.ids.objects["a/~author"] is loaded.metadata["content"][0]["author"]
+    assert dict(loaded.ids) == dict(IdIndex(loaded.metadata))
+
+
+def test_sidecar_staleness(bundle, monkeypatch):
+    load_metadata(bundle, write=True)
+    metadata_path = bundle / "myr-metadata.json"
+
+    # Touched, but with the same content: the digest still matches
+    stat = metadata_path.stat()
+    os.utime(metadata_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert read_sidecar(bundle) is not None
+    # ...and is not computed again on the next reads
+    with monkeypatch.context() as patched:
+        patched.setattr("hashlib.sha256", None)
+        assert read_sidecar(bundle) is not None
+
+    # Same size, different content
+    text = metadata_path.read_text()
+    metadata_path.write_text(text.replace("a/~author", "b/~author"))
+    os.utime(metadata_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10**9))
+    assert read_sidecar(bundle) is None
+
+    # An existing sidecar is written again when it is stale
+    assert "b/~author" in load_metadata(bundle).ids
+    assert "b/~author" in read_sidecar(bundle).ids
+
+    sidecar_path(bundle).write_bytes(b"garbage")
+    assert read_sidecar(bundle) is None
+
+
+def test_sidecar_signature(bundle, tmp_path, monkeypatch):
+    load_metadata(bundle, write=True)
+    assert read_sidecar(bundle) is not None
+
+    # A sidecar written by someone else, with another key, is not unmarshalled
+    loaded = []
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "other"))
+    monkeypatch.setattr("marshal.loads", loaded.append)
+    assert read_sidecar(bundle) is None
+    assert loaded == []
+
+
+def test_sidecar_check_and_bundle(bundle):
+    assert check_bundle(bundle, use_cache=False) == []
+    assert not sidecar_path(bundle).exists()
+    assert check_bundle(bundle, use_cache=False, sidecar=True) == []
+    assert sidecar_path(bundle).exists()
+    assert check_bundle(bundle, use_cache=False) == []
+
+    with Bundle(bundle) as opened:
+        assert "name" in opened.ids["a/~author"]
@@ -0,0 +1,154 @@
+import io
+import json
+import random
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from copy import deepcopy
+from myr.myr import myr_freeze
+from myr.store import *
+from tests.conftest import write_bundle
+from tests.data import COMPLEX_MYR_DATA
+
+
+SIZES = dict(min_size=1024, average_size=4096, max_size=16384)
+
+
+def random_bytes(size: int, seed: int = 0) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+@pytest.fixture
+def bundle(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"].append(
+        {"type": "file", "path": "data/table.bin", "MIME_type": "text/plain"}
+    )
+    path = write_bundle(tmp_path / "bundle", data)
+    (path / "README.md").write_text("A bundle")
+    (path / "data").mkdir()
+    (path / "data" / "table.bin").write_bytes(random_bytes(100_000))
+    return path
+
+
+def test_iter_chunks():
+    data = random_bytes(200_000)
+    chunks = list(iter_chunks(io.BytesIO(data), **SIZES))
+
+    assert b"".join(chunks) == data
+    assert all(len(x) <= SIZES["max_size"] for x in chunks)
+    assert all(len(x) >= SIZES["min_size"] for x in chunks[:-1])
+    assert len(chunks) > 10
+
+    assert list(iter_chunks(io.BytesIO(b""), **SIZES)) == []
+
+
+def test_iter_chunks_shift_resistance():
+    data = random_bytes(200_000)
+    edited = data[:50_000] + b"inserted" + data[50_000:]
+
+    before = set(iter_chunks(io.BytesIO(data), **SIZES))
+    after = list(iter_chunks(io.BytesIO(edited), **SIZES))
+
+    # Only the chunks around the insertion change
+    assert len([x for x in after if x not in before]) <= 2
+
+
+def test_iter_chunks_low_entropy():
+    # A numeric table: few distinct bytes, with no long runs of any of them
+    generator = random.Random(0)
+    data = b"".join(
+        b",".join(str(generator.randint(0, 999)).encode() for _ in range(8)) + b"\n"
+        for _ in range(20_000)
+    )
+    edited = b"1,2,3\n" + data
+
+    before = list(iter_chunks(io.BytesIO(data), **SIZES))
+    after = set(iter_chunks(io.BytesIO(edited), **SIZES))
+
+    assert len(before) > 50
+    assert sum(len(x) == SIZES["max_size"] for x in before) < len(before) / 10
+    assert len([x for x in before if x in after]) >= len(before) - 2
+
+
+def test_chunk_store_files(tmp_path):
+    store = ChunkStore(tmp_path / "store")
+    path = tmp_path / "file.bin"
+    path.write_bytes(random_bytes(3 * AVERAGE_CHUNK_SIZE))
+
+    stored = store.put_file(path)
+    assert len(stored.chunks) > 1
+    assert stored.new_chunks == len(stored.chunks)
+    assert store.get_file(stored.digest) == stored.chunks
+
+    # Storing the same content again writes no chunk
+    assert store.put_file(path).new_chunks == 0
+
+    output = io.BytesIO()
+    store.read_file(stored.digest, output)
+    assert output.getvalue() == path.read_bytes()
+
+    with pytest.raises(KeyError):
+        store.read_file("0" * 64, output)
+
+
+def test_freeze_to_store(tmp_path, bundle):
+    store_path = tmp_path / "store"
+    myr_freeze(bundle, None, store=store_path, version="v1")
+
+    # The same bundle, with one more file: the known files are not stored again
+    (bundle / "data" / "other.bin").write_bytes(random_bytes(1000, seed=1))
+    myr_freeze(bundle, None, store=store_path, version="v2")
+
+    store = ChunkStore(store_path)
+    assert store.versions() == ["v1", "v2"]
+    assert len(list((store_path / "files").iterdir())) == 3
+
+    index = store.load_version("v2")
+    assert sorted(index["files"]) == ["README.md", "data/other.bin", "data/table.bin"]
+
+    restore_version(store, "v1", tmp_path / "restored")
+    restored = tmp_path / "restored"
+    assert (restored / "data" / "table.bin").read_bytes() == (
+        bundle / "data" / "table.bin"
+    ).read_bytes()
+    assert (restored / "README.md").read_text() == "A bundle"
+    assert not (restored / "data" / "other.bin").exists()
+    metadata = json.loads((restored / "myr-metadata.json").read_text())
+    assert metadata["content"][-1]["path"] == "data/table.bin"
+
+
+def test_freeze_duplicated_files(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"] = [
+        {"type": "file", "path": f"copy_{i}.bin", "MIME_type": "text/plain"}
+        for i in range(32)
+    ]
+    bundle = write_bundle(tmp_path / "bundle", data)
+    content = random_bytes(3 * 1024 * 1024)
+    for i in range(32):
+        (bundle / f"copy_{i}.bin").write_bytes(content)
+
+    store_path = tmp_path / "store"
+    myr_freeze(bundle, None, store=store_path, version="v1", jobs=16)
+
+    store = ChunkStore(store_path)
+    assert len(list((store_path / "files").iterdir())) == 1
+    assert not list(store_path.glob("**/*.tmp"))
+    restore_version(store, "v1", tmp_path / "restored")
+    assert (tmp_path / "restored" / "copy_31.bin").read_bytes() == content
+
+
+def test_chunk_store_concurrent_writers(tmp_path):
+    store = ChunkStore(tmp_path / "store")
+    path = tmp_path / "file.bin"
+    path.write_bytes(random_bytes(4 * MIN_CHUNK_SIZE))
+
+    # Writers storing the same file share every chunk, and the file itself
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        digests = {x.digest for x in pool.map(store.put_file, [path] * 16)}
+
+    assert len(digests) == 1
+    assert not list((tmp_path / "store").glob("**/*.tmp"))
+    output = io.BytesIO()
+    store.read_file(digests.pop(), output)
+    assert output.getvalue() == path.read_bytes()
@@ -0,0 +1,139 @@
+import pytest
+import io
+import json
+import os
+import subprocess
+import sys
+from copy import deepcopy
+from myr.checker import Specification, ViolationType
+from myr.stream import *
+from tests.data import COMPLEX_MYR_DATA
+
+
+def bundle_data():
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"].extend(
+        [
+            {"type": "file", "path": 12, "MIME_type": "text/csv"},
+            {"type": "person", "name": "Someone", ">email": "some-id"},
+            {"type": "person", "name": "Someone", ">nonsense": "some-id"},
+            "not an object",
+        ]
+    )
+    return data
+
+
+def violations_of(violations):
+    return [(x.violation.location, x.violation.violation_type) for x in violations]
+
+
+EXPECTED_VIOLATIONS = [
+    ("/content/1/path", ViolationType.WRONG_KEY_TYPE),
+    ("/content/3/>nonsense", ViolationType.UNKOWN_KEY),
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+def test_iter_metadata(chunk_size):
+    data = bundle_data()
+    stream = io.StringIO(json.dumps(data, indent=4))
+
+    items = list(iter_metadata(stream, chunk_size=chunk_size))
+
+    assert [x.key for x in items] == ["type", "specification"] + ["content"] * 5
+    assert [x.index for x in items] == [None, None, 0, 1, 2, 3, 4]
+    assert [x.value for x in items[2:]] == data["content"]
+
+
+def test_iter_metadata_numbers():
+    stream = io.StringIO('{"a": 1234567, "content": [1234, 5678]}')
+
+    items = list(iter_metadata(stream, chunk_size=2))
+
+    assert [x.value for x in items] == [1234567, 1234, 5678]
+
+
+@pytest.mark.parametrize("chunk_size", [3, 4096])
+def test_validate_stream(tmp_path, chunk_size):
+    path = tmp_path / "myr-metadata.json"
+    path.write_text(json.dumps(bundle_data()))
+
+    found = violations_of(validate_stream(path, chunk_size=chunk_size))
+
+    assert found == EXPECTED_VIOLATIONS
+
+
+def test_validate_stream_specification_last(tmp_path):
+    data = bundle_data()
+    data["specification"] = data.pop("specification")
+    path = tmp_path / "myr-metadata.json"
+    path.write_text(json.dumps(data))
+
+    assert violations_of(validate_stream(path)) == EXPECTED_VIOLATIONS
+
+
+def test_validate_stream_matches_validate(tmp_path):
+    data = bundle_data()
+    path = tmp_path / "myr-metadata.json"
+    path.write_text(json.dumps(data))
+    specification = Specification(data["specification"])
+
+    streamed = violations_of(validate_stream(path, specification=specification))
+    loaded = violations_of(specification.validate(data))
+
+    assert sorted(streamed) == sorted(loaded)
+
+
+def test_validate_stream_utf8(tmp_path):
+    data = bundle_data()
+    data["content"][2]["name"] = "Zoë Ångström"
+    path = tmp_path / "myr-metadata.json"
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+    # The metadata is UTF-8, whatever the encoding of the locale
+    code = (
+        "import sys; from pathlib import Path; from myr.stream import validate_stream; "
+        "print(len(list(validate_stream(Path(sys.argv[1])))))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code, str(path)],
+        capture_output=True,
+        env={
+            **os.environ,
+            "LC_ALL": "C",
+            "PYTHONUTF8": "0",
+            "PYTHONCOERCECLOCALE": "0",
+        },
+    )
+    assert result.stdout == f"{len(EXPECTED_VIOLATIONS)}\n".encode()
+
+
+def test_validate_stream_empty_content(tmp_path):
+    data = deepcopy(COMPLEX_MYR_DATA)
+    data["content"] = []
+    path = tmp_path / "myr-metadata.json"
+    path.write_text(json.dumps(data))
+
+    assert list(validate_stream(path)) == []
+
+
+def test_validate_stream_failures(tmp_path):
+    path = tmp_path / "myr-metadata.json"
+    assert violations_of(validate_stream(path)) == [
+        (str(path), ViolationType.METADATA_NOT_FOUND)
+    ]
+
+    path.write_text('{"type": "myr-bundle", "content": [{"type": ')
+    assert violations_of(validate_stream(path)) == [
+        ("/", ViolationType.INVALID_SPEC_FORMAT)
+    ]
+
+    path.write_text('{"type": "myr-bundle", "specification": 5, "content": []}')
+    assert violations_of(validate_stream(path)) == [
+        ("/specification", ViolationType.INVALID_SPEC_FORMAT)
+    ]
+
+    path.write_text('{"type": "myr-bundle", "@specification": [5], "content": []}')
+    assert violations_of(validate_stream(path)) == [
+        ("/@specification", ViolationType.INVALID_REMOTE)
+    ]
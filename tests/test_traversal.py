@@ -0,0 +1,72 @@
+import sys
+from myr.traversal import *
+
+
+class Recorder(Visitor):
+    def __init__(self):
+        self.visited = []
+
+    def visit(self, node, pointer, in_list):
+        self.visited.append((pointer, in_list))
+
+
+def test_walk_order():
+    data = {"a": {"b": {}}, "c/d": [{"e": {}}, "scalar"], "f": 1}
+    recorder = Recorder()
+    walk(data, [recorder])
+
+    assert recorder.visited == [
+        ("", False),
+        ("/a", False),
+        ("/a/b", False),
+        ("/c~1d/0", True),
+        ("/c~1d/0/e", True),
+    ]
+
+
+def test_transform_rewrites():
+    data = {
+        "drop": 1,
+        "keep": [{"drop": 2, "rename": {"drop": 3}}],
+        "stop": {"drop": 4},
+    }
+
+    def rewrite(key, value, in_list):
+        if key == "drop":
+            return None
+        if key == "stop":
+            return (key, value, False)
+        return (key.replace("rename", "renamed"), value, True)
+
+    result = transform(data, rewrite)
+
+    assert result == {"keep": [{"renamed": {}}], "stop": {"drop": 4}}
+    assert result["stop"] is data["stop"]
+    assert data["drop"] == 1
+
+
+def test_deep_nesting():
+    depth = 10 * sys.getrecursionlimit()
+    data = {}
+    node = data
+    for _ in range(depth):
+        node["child"] = {}
+        node = node["child"]
+
+    recorder = Recorder()
+    walk(data, [recorder])
+    assert len(recorder.visited) == depth + 1
+
+    # Comparing the structures would recurse, so we walk the copy instead
+    copied = transform(data, lambda k, v, in_list: (k, v, True))
+    recorder = Recorder()
+    walk(copied, [recorder])
+    assert len(recorder.visited) == depth + 1
+
+
+def test_pointer_in_list():
+    structure = {"a": {"b": [{"c": {"d": 1}}]}, "e/f": {}}
+
+    assert not pointer_in_list(structure, "/a")
+    assert not pointer_in_list(structure, "/e~1f")
+    assert pointer_in_list(structure, "/a/b/0/c")
@@ -2,6 +2,7 @@ import pytest
 from myr.checker import *
 from tests.data import COMPLEX_MYR_DATA
 import logging
+from copy import deepcopy
 
 root_logger = logging.getLogger("myr")
 for handler in root_logger.handlers:
@@ -230,6 +231,27 @@ def test_specification_key_violations_malformed_validvalues_content():
     assert violation.location == "/keys/test/valid_values/"
 
 
+@pytest.mark.parametrize("pattern", ["[a-z", 12])
+def test_specification_key_violations_malformed_pattern(pattern):
+    keys = [
+        {
+            "qualifier": "test",
+            "description": "Some description",
+            "value": "text",
+            "pattern": pattern,
+        }
+    ]
+
+    result, violations = parse_specification_keys(keys)
+    assert len(result) == 0
+    assert len(violations) == 1
+
+    violation = violations[0].violation
+    assert violation.severity == ViolationSeverity.ERROR
+    assert violation.violation_type == ViolationType.MALFORMED_KEY_PATTERN
+    assert violation.location == "/keys/test/pattern/"
+
+
 def test_specification_key_mixed():
     keys = [
         {"qualifier": "valid", "description": "", "value": "value"},
@@ -472,3 +494,297 @@ def test_multiple_violations_base():
         f"[1 / 2] @ /test/lol -- {ViolationSeverity.ERROR.value}: {ViolationType.UNKOWN_KEY.value}\n"
         f"[2 / 2] @ /other/ -- {ViolationSeverity.WARNING.value}: {ViolationType.MISSING_KEY_VALUE.value}\n"
     )
+
+
+def test_violation_sink():
+    def make(violation_type, severity=ViolationSeverity.ERROR):
+        return SpecificationViolation("/", violation_type, severity)
+
+    sink = ViolationSink(max_violations=2)
+    sink.extend(make(ViolationType.UNKOWN_KEY) for _ in range(3))
+    sink.add(make(ViolationType.WRONG_KEY_TYPE, ViolationSeverity.CRITICAL))
+
+    assert len(sink.violations) == 2 and sink.dropped == 2 and sink.total == 4
+    assert sink.counts == {ViolationType.UNKOWN_KEY: 3, ViolationType.WRONG_KEY_TYPE: 1}
+
+    error = sink.error()
+    # The dropped violations still count towards the severity
+    assert error.max_severity == ViolationSeverity.CRITICAL
+    assert error.message.startswith(" --- FOUND 4 VIOLATIONS ---\n\n[1 / 4] @ /")
+    assert error.message.endswith(
+        " ... and 2 more. All violations:\n"
+        "         3 UNKOWN_KEY\n"
+        "         1 WRONG_KEY_TYPE\n"
+    )
+
+    sink = ViolationSink(fail_fast=ViolationSeverity.ERROR)
+    sink.add(make(ViolationType.UNKOWN_KEY, ViolationSeverity.WARNING))
+    with pytest.raises(ViolationLimitReached) as stop:
+        sink.add(make(ViolationType.UNKOWN_KEY))
+    assert stop.value.violation is sink.violations[-1]
+    assert sink.total == 2
+
+
+def test_violation_sink_merge():
+    def make(violation_type, severity=ViolationSeverity.ERROR):
+        return SpecificationViolation("/", violation_type, severity)
+
+    other = ViolationSink(max_violations=1)
+    other.extend(make(ViolationType.UNKOWN_KEY) for _ in range(3))
+    other.add(make(ViolationType.WRONG_KEY_TYPE, ViolationSeverity.CRITICAL))
+    sink = ViolationSink(max_violations=2)
+    sink.add(make(ViolationType.WRONG_KEY_TYPE, ViolationSeverity.WARNING))
+    sink.merge(other)
+
+    assert len(sink.violations) == 2 and sink.total == 5
+    assert sink.counts == {ViolationType.UNKOWN_KEY: 3, ViolationType.WRONG_KEY_TYPE: 2}
+    assert sink.max_severity == ViolationSeverity.CRITICAL
+
+    # A sink that failed fast stops the one it is merged into
+    other = ViolationSink(max_violations=0, fail_fast=ViolationSeverity.ERROR)
+    with pytest.raises(ViolationLimitReached):
+        other.add(make(ViolationType.UNKOWN_KEY))
+    sink = ViolationSink()
+    with pytest.raises(ViolationLimitReached):
+        sink.merge(other)
+    assert sink.total == 1 and sink.stopped_at is other.stopped_at
+
+
+def test_collect():
+    spec = Specification(COMPLEX_MYR_DATA["specification"])
+    data = {"type": "file", "path": 1, "MIME_type": 2, "a": 3, "b": 4}
+
+    sink = ViolationSink(max_violations=1)
+    spec.collect(data, sink, "/x")
+    assert [x.violation.to_dict() for x in spec.validate(data, "/x")][:1] == [
+        x.to_dict() for x in sink.violations
+    ]
+    assert sink.total == 4
+
+    with pytest.raises(ViolationLimitReached):
+        spec.collect(data, ViolationSink(fail_fast=ViolationSeverity.ERROR))
+
+
+def test_specification_registry():
+    registry = SpecificationRegistry(max_size=2)
+    specification = deepcopy(COMPLEX_MYR_DATA["specification"])
+    reordered = dict(reversed(list(deepcopy(specification).items())))
+
+    compiled = registry.get(specification)
+    assert registry.get(reordered) is compiled
+    assert (registry.hits, registry.misses) == (1, 1)
+
+    # Invalid specifications raise every time, and are never registered
+    for _ in range(2):
+        with pytest.raises(InvalidSpecificationError):
+            registry.get({"types": []})
+    assert len(registry) == 1
+
+    valid = [deepcopy(specification) for _ in range(2)]
+    valid[0]["keys"][0]["description"] = "Something else."
+    valid[1]["keys"][0]["description"] = "Something else again."
+    first = registry.get(valid[0])
+    registry.get(compiled.original_specification)
+    registry.get(valid[1])
+    # The least recently used specification was dropped
+    assert len(registry) == 2
+    assert registry.get(valid[0]) is not first
+
+
+def test_compiled_specification_tables():
+    spec = Specification(COMPLEX_MYR_DATA["specification"])
+
+    assert set(spec.types) == {"myr-bundle", "file", "person"}
+    assert spec.required_keys["file"] == frozenset(["path", "MIME_type"])
+    assert spec.allowed_keys["person"] == frozenset(["name", "email", "ORCID"])
+    assert spec.valid_values == {}
+    with pytest.raises(TypeError):
+        spec.types["new"] = None
+    with pytest.raises(AttributeError):
+        spec.something_else = None
+
+
+def test_validate_complex_data():
+    spec = Specification(COMPLEX_MYR_DATA["specification"])
+
+    assert spec.validate(COMPLEX_MYR_DATA) == []
+
+
+def test_validate_violations():
+    specification = deepcopy(COMPLEX_MYR_DATA["specification"])
+    specification["keys"].append(
+        {
+            "qualifier": "license",
+            "value": "text",
+            "description": "A license.",
+            "valid_values": ["MIT", "CC-BY-4.0"],
+        }
+    )
+    specification["types"][1]["valid_keys"].append(
+        {"qualifier": "license", "required": False}
+    )
+    spec = Specification(specification)
+
+    data = {
+        "type": "myr-bundle",
+        "content": [
+            {"type": "file", "path": 3, "license": "GPL", "nonsense": "a"},
+            {"type": "file", "path": "a", "MIME_type": "b", "author": "Someone"},
+            {
+                "type": "file",
+                "path": "a",
+                "MIME_type": "b",
+                "author": {"type": "person"},
+            },
+            {"type": "unknown"},
+        ],
+    }
+    found = [
+        (x.violation.location, x.violation.violation_type) for x in spec.validate(data)
+    ]
+
+    assert found == [
+        ("/content/0/MIME_type", ViolationType.MISSING_REQUIRED_KEY),
+        ("/content/0/path", ViolationType.WRONG_KEY_TYPE),
+        ("/content/0/license", ViolationType.INVALID_KEY_VALUE),
+        ("/content/0/nonsense", ViolationType.UNKOWN_KEY),
+        ("/content/1/author", ViolationType.WRONG_KEY_TYPE),
+        ("/content/2/author/name", ViolationType.MISSING_REQUIRED_KEY),
+        ("/content/3/type", ViolationType.UNKNOWN_TYPE),
+    ]
+
+
+def test_validate_batch():
+    spec = Specification(COMPLEX_MYR_DATA["specification"])
+    objects = [
+        {"type": "file", "path": 3, "nonsense": "a", ">author": "someone"},
+        {"type": "file", "path": "a", "MIME_type": "b", "author": "Someone"},
+        {"type": "file", "path": "a", "MIME_type": "b", "author": {"type": "person"}},
+        {"type": "file", "path": "b", "MIME_type": "c", "author": {"type": "person"}},
+        {"type": "person", "name": "Someone"},
+        {"type": "unknown"},
+        {"name": "Nobody"},
+        [],
+        deepcopy(COMPLEX_MYR_DATA),
+    ]
+    locations = [f"/content/{i}" for i in range(len(objects))]
+
+    expected = [spec.validate(x, y) for x, y in zip(objects, locations)]
+    found = spec.validate_batch(objects, locations)
+
+    def summary(violations):
+        return [(x.violation.location, x.violation.violation_type) for x in violations]
+
+    assert [summary(x) for x in found] == [summary(x) for x in expected]
+    assert summary(found[2]) == [
+        ("/content/2/author/name", ViolationType.MISSING_REQUIRED_KEY)
+    ]
+    assert found[4] == [] and found[8] == []
+    assert spec.validate_batch([]) == []
+
+
+def test_validate_key_matchers():
+    specification = deepcopy(COMPLEX_MYR_DATA["specification"])
+    specification["keys"].extend(
+        [
+            {
+                "qualifier": "license",
+                "value": "text",
+                "description": "A license.",
+                "valid_values": ["MIT", "CC-BY-4.0", "GPL"],
+                "pattern": "[A-Z]+-.+",
+            },
+            {
+                "qualifier": "version",
+                "value": "text",
+                "description": "A version.",
+                "pattern": r"\d+\.\d+",
+            },
+        ]
+    )
+    specification["types"][1]["valid_keys"].extend(
+        [
+            {"qualifier": "license", "required": False},
+            {"qualifier": "version", "required": False},
+        ]
+    )
+    spec = Specification(specification)
+
+    assert spec.matchers["license"].values == frozenset(["MIT", "CC-BY-4.0", "GPL"])
+    assert spec.matchers["version"].values is None
+    assert spec.matchers["version"]("1.2") and not spec.matchers["version"]("1.2.3")
+    assert "path" not in spec.matchers
+
+    objects = [
+        {"type": "file", "path": "a", "MIME_type": "b", "license": "CC-BY-4.0"},
+        {"type": "file", "path": "a", "MIME_type": "b", "license": "MIT"},
+        {"type": "file", "path": "a", "MIME_type": "b", "license": "BSD-3"},
+        {"type": "file", "path": "a", "MIME_type": "b", "version": "10.04"},
+        {"type": "file", "path": "a", "MIME_type": "b", "version": "v1.0"},
+    ]
+    expected = [
+        [],
+        [("/content/1/license", ViolationType.INVALID_KEY_VALUE)],
+        [("/content/2/license", ViolationType.INVALID_KEY_VALUE)],
+        [],
+        [("/content/4/version", ViolationType.INVALID_KEY_VALUE)],
+    ]
+    locations = [f"/content/{i}" for i in range(len(objects))]
+
+    def summary(violations):
+        return [(x.violation.location, x.violation.violation_type) for x in violations]
+
+    assert [summary(spec.validate(x, y)) for x, y in zip(objects, locations)] == (
+        expected
+    )
+    assert [summary(x) for x in spec.validate_batch(objects, locations)] == expected
+
+
+def test_validate_unhashable_type():
+    spec = Specification(COMPLEX_MYR_DATA["specification"])
+    objects = [{"type": ["file"]}, {"type": {"a": 1}}]
+    locations = ["/content/0", "/content/1"]
+
+    expected = [
+        [("/content/0/type", ViolationType.UNKNOWN_TYPE)],
+        [("/content/1/type", ViolationType.UNKNOWN_TYPE)],
+    ]
+    found = [spec.validate(x, y) for x, y in zip(objects, locations)]
+    assert [
+        [(v.violation.location, v.violation.violation_type) for v in x] for x in found
+    ] == expected
+    found = spec.validate_batch(objects, locations)
+    assert [
+        [(v.violation.location, v.violation.violation_type) for v in x] for x in found
+    ] == expected
+
+
+def test_specification_malformed_entries():
+    with pytest.raises(InvalidSpecificationError) as error:
+        check_parsing_validity(5)
+    assert error.value.violation.violation_type == ViolationType.INVALID_SPEC_FORMAT
+
+    keys, violations = parse_specification_keys(
+        [5, {"qualifier": ["a"]}, {"qualifier": "a", "description": "", "value": [1]}]
+    )
+    assert keys == {}
+    assert [(x.violation.location, x.violation.violation_type) for x in violations] == [
+        ("/keys/", ViolationType.KEYS_VALUE_INVALID),
+        ("/keys/", ViolationType.MISSING_KEY_QUALIFIER),
+        ("/keys/a/value", ViolationType.UNKNOWN_KEY_VALUE),
+    ]
+
+    types, violations = parse_specification_types(
+        [
+            5,
+            {"qualifier": "t", "description": "", "valid_keys": "a"},
+            {"qualifier": "u", "description": "", "valid_keys": [5]},
+        ],
+        {},
+    )
+    assert types == []
+    assert [(x.violation.location, x.violation.violation_type) for x in violations] == [
+        ("/types/", ViolationType.TYPES_VALUE_INVALID),
+        ("/types/t/", ViolationType.MISSING_TYPE_VALID_KEYS),
+        ("/types/u/valid_keys/", ViolationType.MISSING_TYPE_KEY_QUALIFIER),
+    ]